@@ -4,12 +4,14 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
 from app.config.database import get_db
-from app.config.security import create_access_token, verify_password, verify_token
+from app.config.security import create_access_token, verify_and_update_password_async, verify_token
 from app.config.settings import settings
 from app.models import User
 from app.schemas.auth import LoginRequest, LoginResponse, UserInfo, TokenData
 from app.core.rate_limit import limiter, check_failed_login_attempts, record_failed_login_attempt, clear_failed_login_attempts, get_remote_address_with_forwarded
-from app.core.role_permissions import RolePermissions
+from app.core.role_permissions import RolePermissions, AccessScope
+from app.core import token_cache
+from app.core.principal import TokenPrincipal
 from sqlalchemy.orm import joinedload
 
 router = APIRouter()
@@ -49,8 +51,9 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Verificar contraseña
-    if not verify_password(login_data.password, user.password_hash):
+    # Verificar contraseña (bcrypt en el pool de hash, fuera del event loop)
+    password_ok, new_hash = await verify_and_update_password_async(login_data.password, user.password_hash)
+    if not password_ok:
         # Registrar intento fallido
         record_failed_login_attempt(client_ip)
         raise HTTPException(
@@ -66,6 +69,14 @@ async def login(
             detail="Usuario inactivo",
         )
     
+    # Rehash transparente si cambió BCRYPT_ROUNDS. UPDATE directo: la contraseña es la
+    # misma, así que no debe incrementar token_version ni revocar sesiones abiertas
+    if new_hash:
+        db.query(User).filter(User.id == user.id).update(
+            {User.password_hash: new_hash}, synchronize_session=False
+        )
+        print(f"[AUTH] Hash de contraseña actualizado al costo actual para usuario {user.id}")
+    
     # Crear token JWT
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     token_data = {
@@ -75,6 +86,7 @@ async def login(
         "country_id": user.country_id,
         "category_id": user.category_id,
         "country_ids": user.country_ids,  # Nuevos países asignados
+        "ver": user.token_version or 0,  # Versión de token (revocación)
     }
     access_token = create_access_token(
         data=token_data,
@@ -118,48 +130,93 @@ async def logout():
     # eliminando el token del almacenamiento local
     return {"message": "Sesión cerrada exitosamente"}
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Obtener usuario actual desde token JWT"""
-    
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _load_user(db: Session, payload: dict) -> User:
+    """Cargar el usuario del token desde la BD y validar estado y versión de token"""
+    email: str = payload.get("sub")
+    if email is None:
+        raise _credentials_exception()
+    
+    # Buscar usuario en BD con países asignados
+    user = db.query(User).options(
+        joinedload(User.role),
+        joinedload(User.assigned_countries),
+        joinedload(User.category),
+        joinedload(User.country)
+    ).filter(User.email == email).first()
     
+    if user is None:
+        raise _credentials_exception()
+    
+    # Verificar que esté activo
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario inactivo"
+        )
+    
+    # Tokens emitidos antes de cambiar credenciales, rol o países quedan revocados
+    if payload.get("ver", 0) != (user.token_version or 0):
+        raise _credentials_exception()
+    
+    token_cache.put_token_state(user.id, user.token_version or 0, user.is_active)
+    return user
+
+def _user_from_claims(db: Session, payload: dict) -> TokenPrincipal:
+    """
+    Construir el usuario desde los claims del token (principal de solo lectura, sin BD).
+    Solo se consulta la versión de token y el estado activo cuando vence su caché.
+    """
+    user_id = payload["user_id"]
+    state = token_cache.get_token_state(user_id)
+    if state is None:
+        row = db.query(User.token_version, User.is_active).filter(User.id == user_id).first()
+        if row is None:
+            raise _credentials_exception()
+        state = (row.token_version or 0, bool(row.is_active))
+        token_cache.put_token_state(user_id, *state)
+    
+    token_version, is_active = state
+    if not is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario inactivo"
+        )
+    if payload["ver"] != token_version:
+        raise _credentials_exception()
+    
+    return TokenPrincipal.from_claims(payload, token_version)
+
+def get_current_user(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Obtener usuario actual desde token JWT
+    - Con AUTH_TRUST_TOKEN_CLAIMS, las lecturas (GET/HEAD) usan los claims del token (TokenPrincipal)
+    """
     try:
         # Verificar token
         payload = verify_token(token)
         if payload is None:
-            raise credentials_exception
+            raise _credentials_exception()
         
-        # Extraer información del token
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        if (
+            settings.AUTH_TRUST_TOKEN_CLAIMS
+            and request.method in ("GET", "HEAD")
+            and "user_id" in payload
+            and "ver" in payload
+        ):
+            return _user_from_claims(db, payload)
         
-        # Buscar usuario en BD con países asignados
-        user = db.query(User).options(
-            joinedload(User.role),
-            joinedload(User.assigned_countries),
-            joinedload(User.category),
-            joinedload(User.country)
-        ).filter(User.email == email).first()
-        
-        if user is None:
-            raise credentials_exception
-        
-        # Verificar que esté activo
-        if not user.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Usuario inactivo"
-            )
-        
-        return user
+        return _load_user(db, payload)
         
     except HTTPException as he:
         raise he
@@ -169,9 +226,27 @@ def get_current_user(
             detail="Error interno del servidor"
         )
 
+def get_current_db_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """Obtener usuario actual siempre desde la BD (con país, categoría y países asignados)"""
+    payload = verify_token(token)
+    if payload is None:
+        raise _credentials_exception()
+    return _load_user(db, payload)
+
+def get_access_scope(current_user: User = Depends(get_current_user)) -> AccessScope:
+    """Alcance de datos (países/categorías) del usuario actual"""
+    return RolePermissions.get_access_scope(current_user)
+
+def get_report_scope(current_user: User = Depends(get_current_user)) -> AccessScope:
+    """Alcance de datos para reportes (administradores limitados a sus países asignados, si tienen)"""
+    return RolePermissions.get_report_scope(current_user)
+
 @router.get("/me", response_model=UserInfo)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_db_user)
 ):
     """Obtener información del usuario actual"""
     return UserInfo(
@@ -199,7 +274,7 @@ async def get_user_permissions(
     
     return {
         "user_id": current_user.id,
-        "role": current_user.role.name if current_user.role else "unknown",
+        "role": current_user.role_name or "unknown",
         "accessible_modules": accessible_modules,
         "permissions": {
             "can_access_users": RolePermissions.has_module_access(current_user, "users"),
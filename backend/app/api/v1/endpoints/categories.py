@@ -4,13 +4,19 @@ from sqlalchemy.orm import Session
 from typing import List
 from app.config.database import get_db
 from app.models.category import Category
+from app.core.data_versions import conditional_get
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
 from app.api.v1.endpoints.auth import get_current_user
 from app.models.user import User
 
 router = APIRouter()
 
-@router.get("/", response_model=List[CategoryResponse])
+@router.get(
+    "/",
+    response_model=List[CategoryResponse],
+    # El conteo de productos de cada categoría también depende de products
+    dependencies=[Depends(conditional_get("categories", "products"))]
+)
 async def get_categories(
     skip: int = 0,
     limit: int = 100,
@@ -35,6 +41,8 @@ async def get_categories(
             "name": category.name,
             "description": category.description,
             "is_active": category.is_active,
+            "stock_minimo": category.stock_minimo,
+            "stock_critico": category.stock_critico,
             "created_at": category.created_at,
             "updated_at": category.updated_at,
             "product_count": db.query(Product).filter(Product.categoria_id == category.id).count()
@@ -77,7 +85,9 @@ async def create_category(
         db_category = Category(
             name=category.name.upper(),
             description=category.description,
-            is_active=category.is_active
+            is_active=category.is_active,
+            stock_minimo=category.stock_minimo,
+            stock_critico=category.stock_critico
         )
         
         db.add(db_category)
@@ -174,6 +184,8 @@ async def update_category(
             "name": db_category.name,
             "description": db_category.description,
             "is_active": db_category.is_active,
+            "stock_minimo": db_category.stock_minimo,
+            "stock_critico": db_category.stock_critico,
             "created_at": db_category.created_at,
             "updated_at": db_category.updated_at,
             "product_count": 0  # Set default since it's optional in schema
@@ -4,27 +4,24 @@ from sqlalchemy.orm import Session
 from typing import List
 from app.config.database import get_db
 from app.models.country import Country
+from app.core.reference_cache import get_reference_data
+from app.core.data_versions import conditional_get
 from app.schemas.country import CountryCreate, CountryUpdate, CountryResponse
 from app.api.v1.endpoints.auth import get_current_user
 from app.models.user import User
 
 router = APIRouter()
 
-@router.get("/", response_model=List[CountryResponse])
+@router.get("/", response_model=List[CountryResponse], dependencies=[Depends(conditional_get("countries"))])
 async def get_countries(
     skip: int = 0,
     limit: int = 100,
     active_only: bool = False,
     db: Session = Depends(get_db)
 ):
-    """Obtener lista de paises"""
-    query = db.query(Country)
-    
-    if active_only:
-        query = query.filter(Country.is_active == True)
-    
-    countries = query.offset(skip).limit(limit).all()
-    return countries
+    """Obtener lista de paises (desde la caché de referencia)"""
+    countries = get_reference_data(db).country_list(active_only=active_only)
+    return countries[skip:skip + limit]
 
 @router.get("/{country_id}", response_model=CountryResponse)
 async def get_country(
@@ -32,7 +29,7 @@ async def get_country(
     db: Session = Depends(get_db)
 ):
     """Obtener un pais por ID"""
-    country = db.query(Country).filter(Country.id == country_id).first()
+    country = get_reference_data(db).countries.get(country_id)
     if not country:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,18 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
+import json
 
 from app.config.database import get_db
-from app.api.v1.endpoints.auth import get_current_user
+from app.api.v1.endpoints.auth import get_current_user, get_access_scope
+from app.core.role_permissions import RolePermissions, AccessScope
 from app.models.user import User
+from app.models.product import Product
 from app.schemas.movement import (
     MovementEntrada, MovementSalida, MovementAjuste,
     MovementResponse, MovementList, MovementFilters, MovementStats,
-    KardexResponse
+    KardexResponse, KardexPageResponse, KardexBatchRequest
 )
 from app.services.movement_service import MovementService
+from app.config.settings import settings
+from app.core.responses import trusted_response
+from app.utils.date_helpers import get_local_today
+from app.utils.export_helpers import (
+    iter_csv, iter_xlsx, require_xlsx_support, content_disposition,
+    CSV_MEDIA_TYPE, XLSX_MEDIA_TYPE
+)
 
 router = APIRouter()
 
@@ -53,7 +63,7 @@ async def test_movements_simple(
             "message": "Simple movements test",
             "total_movements": total_movements,
             "sample_movements": simple_movements,
-            "user_countries": current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
+            "user_countries": RolePermissions.filter_countries(current_user)
         }
     except Exception as e:
         import traceback
@@ -143,7 +153,8 @@ async def registrar_entrada(
     entrada_data: MovementEntrada,
     response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Registrar entrada de inventario
@@ -173,8 +184,7 @@ async def registrar_entrada(
                 detail="Producto no encontrado"
             )
         
-        user_country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
-        if product.country_id not in user_country_ids:
+        if not scope.has_country_access(product.country_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="No tienes permisos para hacer entradas en este producto"
@@ -213,7 +223,8 @@ async def registrar_salida(
     salida_data: MovementSalida,
     response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Registrar salida de inventario
@@ -243,8 +254,7 @@ async def registrar_salida(
                 detail="Producto no encontrado"
             )
         
-        user_country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
-        if product.country_id not in user_country_ids:
+        if not scope.has_country_access(product.country_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="No tienes permisos para hacer salidas en este producto"
@@ -334,13 +344,18 @@ async def get_movements(
     fecha_hasta: Optional[datetime] = Query(None, description="Fecha hasta (YYYY-MM-DD o YYYY-MM-DD HH:MM:SS)"),
     skip: int = Query(0, ge=0, description="Registros a omitir"),
     limit: int = Query(100, ge=1, le=25000, description="Limite de registros (máximo 25,000 para exportación)"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (header X-Next-Cursor); reemplaza a skip"),
+    include_total: Optional[str] = Query(None, regex="^(estimate|exact)$", description="Incluir total en X-Total-Count: estimate o exact"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Obtener lista de movimientos
     - Usuarios ven solo movimientos de productos de sus paises asignados
     - Admins pueden ver todos los movimientos
+    - Headers: X-Next-Cursor y X-Has-More para la página siguiente;
+      X-Total-Count y X-Total-Estimated si se pide include_total
     """
     try:
         # Debug: imprimir parámetros recibidos
@@ -375,71 +390,151 @@ async def get_movements(
             country_ids = None
         else:
             # Usuarios normales solo ven movimientos de sus países asignados
-            country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
+            country_ids = scope.country_ids
             print(f"[MOVEMENTS] Non-admin user - filtering by country_ids: {country_ids}")
-            if not country_ids:
+            if scope.has_no_countries:
                 # Si no hay países asignados, devolver lista vacía en lugar de error
                 print(f"[MOVEMENTS] User has no assigned countries - returning empty list")
                 return []
         
-        # Obtener movimientos
-        print(f"[MOVEMENTS] Calling MovementService.get_movements with country_ids: {country_ids}")
-        movements = MovementService.get_movements(
+        # Obtener movimientos como proyección de columnas (sin objetos ORM)
+        print(f"[MOVEMENTS] Calling MovementService.get_movements_list with country_ids: {country_ids}")
+        page = MovementService.get_movements_page(
             db=db,
             filters=filters,
-            skip=skip,
             limit=limit,
+            cursor=cursor,
+            skip=skip,
             country_ids=country_ids
         )
+        result = page["items"]
         
-        print(f"[MOVEMENTS] Retrieved {len(movements)} movements from service")
-        
-        # Convertir a lista simplificada
-        result = []
-        for movement in movements:
-            result.append(MovementList(
-                id=movement.id,
-                tipo=movement.tipo,
-                cantidad=movement.cantidad,
-                cantidad_anterior=movement.cantidad_anterior,
-                cantidad_nueva=movement.cantidad_nueva,
-                responsable=movement.responsable,
-                motivo=movement.motivo,
-                fecha_movimiento=movement.fecha_movimiento,
-                product_codigo=movement.product.codigo if movement.product else "",
-                product_nombre=movement.product.nombre if movement.product else "",
-                user_full_name=movement.user.full_name if movement.user else "",
-                diferencia=movement.diferencia
-            ))
+        headers = {}
+        if include_total:
+            total, estimated = MovementService.count_movements(
+                db, filters, country_ids, exact=include_total == "exact"
+            )
+            headers["X-Total-Count"] = str(total)
+            headers["X-Total-Estimated"] = "true" if estimated else "false"
+        headers["X-Has-More"] = "true" if page["has_more"] else "false"
+        if page["next_cursor"]:
+            headers["X-Next-Cursor"] = page["next_cursor"]
         
-        print(f"[MOVEMENTS] Created {len(result)} MovementList objects")
         print(f"[MOVEMENTS] Returning result with {len(result)} movements")
-        return result
+        # Los items ya son MovementList tipados: se serializan sin revalidar
+        return trusted_response(result, headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in get_movements: {str(e)}")
         # Devolver lista vacía si hay error para evitar que falle la página
         return []
 
+@router.get("/export")
+async def export_movements(
+    formato: str = Query("csv", regex="^(csv|ndjson|xlsx)$", description="Formato de exportación: csv, ndjson o xlsx"),
+    search: Optional[str] = Query(None, description="Buscar en codigo, nombre, responsable, motivo"),
+    tipo: Optional[str] = Query(None, description="Filtrar por tipo: entrada, salida, ajuste, inicial"),
+    product_id: Optional[int] = Query(None, description="Filtrar por producto"),
+    responsable: Optional[str] = Query(None, description="Filtrar por responsable"),
+    country_id: Optional[int] = Query(None, description="Filtrar por pais"),
+    fecha_desde: Optional[datetime] = Query(None, description="Fecha desde (YYYY-MM-DD o YYYY-MM-DD HH:MM:SS)"),
+    fecha_hasta: Optional[datetime] = Query(None, description="Fecha hasta (YYYY-MM-DD o YYYY-MM-DD HH:MM:SS)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
+):
+    """
+    Exportar movimientos en streaming (CSV, NDJSON o XLSX)
+    - Mismos filtros y alcance por país que el listado, sin límite de registros
+    """
+    country_ids = scope.require_countries()
+    filters = MovementFilters(
+        search=search,
+        tipo=tipo,
+        product_id=product_id,
+        responsable=responsable,
+        country_id=country_id,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta
+    )
+    rows = MovementService.iter_movements_export(db, filters, country_ids)
+    filename = f"movimientos_{get_local_today().isoformat()}.{formato}"
+    
+    if formato == "ndjson":
+        def lines():
+            for row in rows:
+                yield json.dumps({
+                    "id": row.id,
+                    "fecha_movimiento": row.fecha_movimiento.isoformat() if row.fecha_movimiento else None,
+                    "tipo": row.tipo.value,
+                    "product_codigo": row.product_codigo,
+                    "product_nombre": row.product_nombre,
+                    "cantidad": row.cantidad,
+                    "cantidad_anterior": row.cantidad_anterior,
+                    "cantidad_nueva": row.cantidad_nueva,
+                    "diferencia": row.diferencia,
+                    "responsable": row.responsable,
+                    "motivo": row.motivo,
+                    "observaciones": row.observaciones,
+                    "user_full_name": row.user_full_name
+                }, ensure_ascii=False) + "\n"
+        
+        return StreamingResponse(
+            lines(),
+            media_type="application/x-ndjson",
+            headers=content_disposition(filename)
+        )
+    
+    header = [
+        "Fecha", "Tipo", "Código producto", "Producto", "Cantidad", "Stock anterior",
+        "Stock nuevo", "Responsable", "Motivo", "Observaciones", "Usuario"
+    ]
+    
+    def table_rows():
+        for row in rows:
+            yield [
+                row.fecha_movimiento.isoformat(sep=" ") if row.fecha_movimiento else "",
+                row.tipo.value,
+                row.product_codigo,
+                row.product_nombre,
+                row.cantidad,
+                row.cantidad_anterior,
+                row.cantidad_nueva,
+                row.responsable,
+                row.motivo,
+                row.observaciones or "",
+                row.user_full_name
+            ]
+    
+    if formato == "xlsx":
+        require_xlsx_support()
+        return StreamingResponse(
+            iter_xlsx(header, table_rows(), sheet_title="Movimientos"),
+            media_type=XLSX_MEDIA_TYPE,
+            headers=content_disposition(filename)
+        )
+    
+    return StreamingResponse(
+        iter_csv(header, table_rows()),
+        media_type=CSV_MEDIA_TYPE,
+        headers=content_disposition(filename)
+    )
+
 @router.get("/{movement_id}", response_model=MovementResponse)
 async def get_movement(
     movement_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Obtener movimiento por ID
     - Usuarios solo pueden ver movimientos de productos de sus paises asignados
     """
-    # Determinar paises segun rol del usuario
-    country_ids = None
-    if not current_user.is_admin:
-        country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
-        if not country_ids:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Usuario no tiene paises asignados"
-            )
+    # Determinar paises segun rol del usuario (None = todos)
+    country_ids = scope.require_countries()
     
     movement = MovementService.get_movement_by_id(
         db=db,
@@ -477,21 +572,15 @@ async def get_movement(
 async def get_kardex_by_product(
     product_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Obtener Kardex (historial completo) de un producto
     - Usuarios solo pueden ver Kardex de productos de sus paises asignados
     """
-    # Determinar paises segun rol del usuario
-    country_ids = None
-    if not current_user.is_admin:
-        country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
-        if not country_ids:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Usuario no tiene paises asignados"
-            )
+    # Determinar paises segun rol del usuario (None = todos)
+    country_ids = scope.require_countries()
     
     kardex_data = MovementService.get_kardex_by_product(
         db=db,
@@ -507,10 +596,155 @@ async def get_kardex_by_product(
     
     return KardexResponse(**kardex_data)
 
+@router.get("/kardex/{product_id}/page", response_model=KardexPageResponse)
+async def get_kardex_page(
+    product_id: int,
+    fecha_desde: Optional[datetime] = Query(None, description="Fecha desde (YYYY-MM-DD o YYYY-MM-DD HH:MM:SS)"),
+    fecha_hasta: Optional[datetime] = Query(None, description="Fecha hasta (YYYY-MM-DD o YYYY-MM-DD HH:MM:SS)"),
+    cursor: Optional[str] = Query(None, description="Cursor devuelto en next_cursor de la página anterior"),
+    limit: int = Query(100, ge=1, le=1000, description="Movimientos por página"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
+):
+    """
+    Obtener Kardex paginado de un producto
+    - Incluye el saldo inicial al comienzo del rango
+    - Paginación por cursor en orden cronológico
+    """
+    country_ids = scope.require_countries()
+    
+    kardex_data = MovementService.get_kardex_page(
+        db=db,
+        product_id=product_id,
+        country_ids=country_ids,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        cursor=cursor,
+        limit=limit
+    )
+    
+    if not kardex_data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Producto no encontrado o sin acceso"
+        )
+    
+    return KardexPageResponse(**kardex_data)
+
+@router.get("/kardex/{product_id}/export")
+async def export_kardex(
+    product_id: int,
+    formato: str = Query("csv", regex="^(csv|xlsx)$", description="Formato de exportación: csv o xlsx"),
+    fecha_desde: Optional[datetime] = Query(None, description="Fecha desde (YYYY-MM-DD o YYYY-MM-DD HH:MM:SS)"),
+    fecha_hasta: Optional[datetime] = Query(None, description="Fecha hasta (YYYY-MM-DD o YYYY-MM-DD HH:MM:SS)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
+):
+    """
+    Exportar Kardex de un producto en streaming (CSV o XLSX)
+    - La primera fila de datos es el saldo inicial del rango
+    """
+    country_ids = scope.require_countries()
+    
+    product_query = db.query(Product.id, Product.codigo).filter(Product.id == product_id)
+    if country_ids is not None:
+        product_query = product_query.filter(Product.country_id.in_(country_ids))
+    product = product_query.first()
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Producto no encontrado o sin acceso"
+        )
+    
+    saldo_inicial = MovementService.get_saldo_inicial(db, product_id, fecha_desde)
+    header = ["Fecha", "Tipo", "Motivo", "Responsable", "Cantidad", "Saldo anterior", "Saldo", "Observaciones"]
+    
+    def rows():
+        yield [fecha_desde.isoformat() if fecha_desde else "", "SALDO INICIAL", "", "", "", "", saldo_inicial, ""]
+        for row in MovementService.iter_kardex_rows(db, product_id, fecha_desde, fecha_hasta):
+            yield [
+                row.fecha.isoformat(sep=" ") if row.fecha else "",
+                row.tipo.value,
+                row.motivo,
+                row.responsable,
+                row.cantidad_movimiento,
+                row.cantidad_anterior,
+                row.saldo,
+                row.observaciones or ""
+            ]
+    
+    filename = f"kardex_{product.codigo}.{formato}"
+    if formato == "xlsx":
+        require_xlsx_support()
+        return StreamingResponse(
+            iter_xlsx(header, rows(), sheet_title=f"Kardex {product.codigo}"),
+            media_type=XLSX_MEDIA_TYPE,
+            headers=content_disposition(filename)
+        )
+    
+    return StreamingResponse(
+        iter_csv(header, rows()),
+        media_type=CSV_MEDIA_TYPE,
+        headers=content_disposition(filename)
+    )
+
+@router.post("/kardex/batch")
+async def get_kardex_batch(
+    request: KardexBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
+):
+    """
+    Obtener el Kardex de varios productos en una sola solicitud
+    - Por lista de product_ids y/o filtro de categoria_id / country_id
+    - Respuesta en streaming NDJSON: una línea JSON por producto (ordenados por id)
+    """
+    country_ids = scope.require_countries()
+    
+    products = MovementService.get_kardex_batch_products(
+        db=db,
+        product_ids=request.product_ids,
+        categoria_id=request.categoria_id,
+        country_id=request.country_id,
+        country_ids=country_ids,
+        max_products=settings.KARDEX_BATCH_MAX_PRODUCTS
+    )
+    
+    def lines():
+        for kardex in MovementService.iter_kardex_batch(db, products, request.fecha_desde, request.fecha_hasta):
+            kardex["fecha_desde"] = request.fecha_desde.isoformat() if request.fecha_desde else None
+            kardex["fecha_hasta"] = request.fecha_hasta.isoformat() if request.fecha_hasta else None
+            kardex["movimientos"] = [
+                {
+                    "id": row.id,
+                    "fecha": row.fecha.isoformat() if row.fecha else None,
+                    "tipo": row.tipo.value,
+                    "motivo": row.motivo,
+                    "responsable": row.responsable,
+                    "cantidad_movimiento": row.cantidad_movimiento,
+                    "cantidad_anterior": row.cantidad_anterior,
+                    "cantidad_nueva": row.cantidad_nueva,
+                    "saldo": row.saldo,
+                    "observaciones": row.observaciones
+                }
+                for row in kardex["movimientos"]
+            ]
+            yield json.dumps(kardex, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Total-Products": str(len(products))}
+    )
+
 @router.get("/stats/summary", response_model=MovementStats)
 async def get_movement_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Obtener estadisticas de movimientos
@@ -524,15 +758,8 @@ async def get_movement_stats(
             detail="Rol comercial no tiene acceso a estadisticas de movimientos"
         )
     
-    # Determinar paises segun rol del usuario
-    country_ids = None
-    if not current_user.is_admin:
-        country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
-        if not country_ids:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Usuario no tiene paises asignados"
-            )
+    # Determinar paises segun rol del usuario (None = todos)
+    country_ids = scope.require_countries()
     
     stats = MovementService.get_movement_stats(
         db=db,
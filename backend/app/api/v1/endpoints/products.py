@@ -4,11 +4,12 @@ from sqlalchemy import and_
 from typing import List, Optional
 
 from app.config.database import get_db
-from app.api.v1.endpoints.auth import get_current_user
+from app.api.v1.endpoints.auth import get_current_user, get_access_scope
 from app.models.user import User
 from app.models.product import Product
-from app.models.country import Country
-from app.core.role_permissions import RolePermissions, require_module_access
+from app.core.role_permissions import RolePermissions, AccessScope, require_module_access
+from app.core.responses import trusted_response
+from app.core.reference_cache import get_reference_data
 from app.schemas.product import (
     ProductCreate, 
     ProductUpdate, 
@@ -40,7 +41,8 @@ router = APIRouter()
 async def create_product(
     product_data: ProductCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Crear nuevo producto
@@ -58,7 +60,7 @@ async def create_product(
         print(f"[CREATE_PRODUCT] Requested country_id: {product_data.country_id}")
         
         # Verificar que el país existe
-        country = db.query(Country).filter(Country.id == product_data.country_id).first()
+        country = get_reference_data(db).countries.get(product_data.country_id)
         if not country:
             print(f"[CREATE_PRODUCT] Country not found: {product_data.country_id}")
             raise HTTPException(
@@ -67,7 +69,7 @@ async def create_product(
             )
         
         # Verificar permisos de país
-        if not current_user.has_country_access(product_data.country_id):
+        if not scope.has_country_access(product_data.country_id):
             print(f"[CREATE_PRODUCT] User {current_user.id} doesn't have access to country {product_data.country_id}")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -101,12 +103,11 @@ async def create_product(
     
     # Recargar producto con relaciones para respuesta completa
     product_with_relations = db.query(Product).options(
-        joinedload(Product.categoria),
-        joinedload(Product.country),
         joinedload(Product.creator)
     ).filter(Product.id == product.id).first()
     
-    # Crear respuesta con información de relaciones
+    # Crear respuesta con información de relaciones (nombres desde la caché de referencia)
+    reference = get_reference_data(db)
     response = ProductResponse(
         id=product_with_relations.id,
         codigo=product_with_relations.codigo,
@@ -125,12 +126,15 @@ async def create_product(
         created_by=product_with_relations.created_by,
         created_at=product_with_relations.created_at,
         updated_at=product_with_relations.updated_at,
+        stock_minimo=product_with_relations.stock_minimo,
+        stock_critico=product_with_relations.stock_critico,
+        alert_level=product_with_relations.alert_level,
         codigo_pais=product_with_relations.codigo_pais,
         numero_secuencial=product_with_relations.numero_secuencial,
         dias_para_vencer=product_with_relations.dias_para_vencer,
         estado_vencimiento=product_with_relations.estado_vencimiento,
-        categoria_nombre=product_with_relations.categoria.name if product_with_relations.categoria else None,
-        country_nombre=product_with_relations.country.name if product_with_relations.country else None,
+        categoria_nombre=reference.category_name(product_with_relations.categoria_id),
+        country_nombre=reference.country_name(product_with_relations.country_id),
         creator_nombre=product_with_relations.creator.email if product_with_relations.creator else None
     )
     
@@ -141,10 +145,12 @@ async def get_products(
     search: Optional[str] = Query(None, description="Buscar en nombre, código o lote"),
     categoria_id: Optional[int] = Query(None, description="Filtrar por categoría"),
     estado_vencimiento: Optional[str] = Query(None, description="vigente, por_vencer, vencido"),
+    orden_vencimiento: Optional[str] = Query(None, regex="^(asc|desc)$", description="Ordenar por días para vencer: asc, desc"),
     skip: int = Query(0, ge=0, description="Registros a omitir"),
     limit: int = Query(100, ge=1, le=10000, description="Límite de registros (máximo 10,000 para exportación)"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Obtener lista de productos con paginación
@@ -155,12 +161,13 @@ async def get_products(
     filters = ProductFilters(
         search=search,
         categoria_id=categoria_id,
-        estado_vencimiento=estado_vencimiento
+        estado_vencimiento=estado_vencimiento,
+        orden_vencimiento=orden_vencimiento
     )
     
     # Determinar país según rol del usuario
     print(f"[GET_PRODUCTS] User ID: {current_user.id}")
-    print(f"[GET_PRODUCTS] User role: {current_user.role}")
+    print(f"[GET_PRODUCTS] User role: {current_user.role_name}")
     print(f"[GET_PRODUCTS] Is admin: {current_user.is_admin}")
     print(f"[GET_PRODUCTS] Country IDs: {current_user.country_ids}")
     print(f"[GET_PRODUCTS] Country ID: {current_user.country_id}")
@@ -177,7 +184,7 @@ async def get_products(
     else:
         # Usuarios normales solo ven sus países asignados
         print(f"[GET_PRODUCTS] Non-admin user - checking country assignments")
-        if not current_user.country_ids and not current_user.country_id:
+        if scope.has_no_countries:
             print(f"[GET_PRODUCTS] User has no assigned countries - returning error")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -185,7 +192,7 @@ async def get_products(
             )
         
         # Obtener productos de todos los países asignados al usuario
-        country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
+        country_ids = scope.country_ids
         print(f"[GET_PRODUCTS] Non-admin user - filtering by country_ids: {country_ids}")
         products, total = ProductService.get_products_by_countries_paginated(
             db=db,
@@ -201,18 +208,20 @@ async def get_products(
     
     print(f"[GET_PRODUCTS] Returning {len(products)} products out of {total} total")
     
-    return PaginatedProductsResponse(
+    # Los items ya son ProductList tipados: se serializan sin revalidar
+    return trusted_response(PaginatedProductsResponse.construct(
         items=products,
         total=total,
         page=page,
         per_page=limit,
         total_pages=total_pages
-    )
+    ))
 
 @router.get("/available-countries", response_model=List[CountryResponse])
 async def get_available_countries_for_products(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Obtener países disponibles para crear productos según el rol del usuario
@@ -223,30 +232,29 @@ async def get_available_countries_for_products(
         print(f"[COUNTRIES] Starting available-countries endpoint")
         print(f"[COUNTRIES] User ID: {current_user.id}")
         print(f"[COUNTRIES] User email: {current_user.email}")
-        print(f"[COUNTRIES] User role object: {current_user.role}")
-        print(f"[COUNTRIES] User role name: {current_user.role.name if current_user.role else 'None'}")
+        print(f"[COUNTRIES] User role name: {current_user.role_name}")
         print(f"[COUNTRIES] is_admin property: {current_user.is_admin}")
         
         if current_user.is_admin:
             print("[COUNTRIES] User is admin, returning all countries")
-            countries = db.query(Country).filter(Country.is_active == True).all()
+            countries = get_reference_data(db).country_list(active_only=True)
             print(f"[COUNTRIES] Found {len(countries)} active countries for admin")
             for c in countries:
                 print(f"[COUNTRIES] Country: {c.name} (id: {c.id}, code: {c.code})")
             return countries
         else:
             print("[COUNTRIES] User is not admin, returning assigned countries")
-            user_country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
+            user_country_ids = scope.country_ids
             print(f"[COUNTRIES] User country IDs: {user_country_ids}")
             
             if not user_country_ids:
                 print("[COUNTRIES] User has no assigned countries, returning empty list")
                 return []
             
-            countries = db.query(Country).filter(
-                Country.id.in_(user_country_ids),
-                Country.is_active == True
-            ).all()
+            countries = [
+                country for country in get_reference_data(db).country_list(active_only=True)
+                if country.id in user_country_ids
+            ]
             
             print(f"[COUNTRIES] Found {len(countries)} countries for user")
             for c in countries:
@@ -267,7 +275,8 @@ async def get_available_countries_for_products(
 async def get_product(
     product_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Obtener producto por ID
@@ -276,21 +285,17 @@ async def get_product(
     if current_user.is_admin:
         # Admin puede ver cualquier producto
         product = db.query(Product).options(
-            joinedload(Product.categoria),
-            joinedload(Product.country),
             joinedload(Product.creator)
         ).filter(Product.id == product_id).first()
     else:
         # Usuario normal solo ve productos de sus países asignados
-        if not current_user.country_ids and not current_user.country_id:
+        if scope.has_no_countries:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Usuario no tiene países asignados"
             )
-        country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
+        country_ids = scope.country_ids
         product = db.query(Product).options(
-            joinedload(Product.categoria),
-            joinedload(Product.country),
             joinedload(Product.creator)
         ).filter(
             and_(
@@ -305,7 +310,8 @@ async def get_product(
             detail="Producto no encontrado"
         )
     
-    # Crear respuesta con información de relaciones
+    # Crear respuesta con información de relaciones (nombres desde la caché de referencia)
+    reference = get_reference_data(db)
     response = ProductResponse(
         id=product.id,
         codigo=product.codigo,
@@ -324,12 +330,15 @@ async def get_product(
         created_by=product.created_by,
         created_at=product.created_at,
         updated_at=product.updated_at,
+        stock_minimo=product.stock_minimo,
+        stock_critico=product.stock_critico,
+        alert_level=product.alert_level,
         codigo_pais=product.codigo_pais,
         numero_secuencial=product.numero_secuencial,
         dias_para_vencer=product.dias_para_vencer,
         estado_vencimiento=product.estado_vencimiento,
-        categoria_nombre=product.categoria.name if product.categoria else None,
-        country_nombre=product.country.name if product.country else None,
+        categoria_nombre=reference.category_name(product.categoria_id),
+        country_nombre=reference.country_name(product.country_id),
         creator_nombre=product.creator.email if product.creator else None
     )
     
@@ -340,7 +349,8 @@ async def update_product(
     product_id: int,
     product_data: ProductUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Actualizar producto existente
@@ -363,12 +373,12 @@ async def update_product(
         )
     else:
         # Usuario normal solo puede editar productos de sus países asignados
-        if not current_user.country_ids and not current_user.country_id:
+        if scope.has_no_countries:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Usuario no tiene países asignados"
             )
-        country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
+        country_ids = scope.country_ids
         product = ProductService.update_product_for_countries(
             db=db,
             product_id=product_id,
@@ -378,12 +388,11 @@ async def update_product(
     
     # Recargar producto con relaciones para respuesta completa
     product_with_relations = db.query(Product).options(
-        joinedload(Product.categoria),
-        joinedload(Product.country),
         joinedload(Product.creator)
     ).filter(Product.id == product.id).first()
     
-    # Crear respuesta con información de relaciones
+    # Crear respuesta con información de relaciones (nombres desde la caché de referencia)
+    reference = get_reference_data(db)
     response = ProductResponse(
         id=product_with_relations.id,
         codigo=product_with_relations.codigo,
@@ -402,12 +411,15 @@ async def update_product(
         created_by=product_with_relations.created_by,
         created_at=product_with_relations.created_at,
         updated_at=product_with_relations.updated_at,
+        stock_minimo=product_with_relations.stock_minimo,
+        stock_critico=product_with_relations.stock_critico,
+        alert_level=product_with_relations.alert_level,
         codigo_pais=product_with_relations.codigo_pais,
         numero_secuencial=product_with_relations.numero_secuencial,
         dias_para_vencer=product_with_relations.dias_para_vencer,
         estado_vencimiento=product_with_relations.estado_vencimiento,
-        categoria_nombre=product_with_relations.categoria.name if product_with_relations.categoria else None,
-        country_nombre=product_with_relations.country.name if product_with_relations.country else None,
+        categoria_nombre=reference.category_name(product_with_relations.categoria_id),
+        country_nombre=reference.country_name(product_with_relations.country_id),
         creator_nombre=product_with_relations.creator.email if product_with_relations.creator else None
     )
     
@@ -417,7 +429,8 @@ async def update_product(
 async def delete_product(
     product_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Eliminar producto
@@ -439,12 +452,12 @@ async def delete_product(
         )
     else:
         # Usuario normal solo puede eliminar productos de sus países asignados
-        if not current_user.country_ids and not current_user.country_id:
+        if scope.has_no_countries:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Usuario no tiene países asignados"
             )
-        country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
+        country_ids = scope.country_ids
         ProductService.delete_product_for_countries(
             db=db,
             product_id=product_id,
@@ -456,7 +469,8 @@ async def delete_product(
 @router.get("/stats/summary", response_model=ProductStats)
 async def get_product_stats(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Obtener estadísticas de productos
@@ -477,12 +491,12 @@ async def get_product_stats(
         )
     else:
         # Usuario normal solo ve estadísticas de sus países asignados
-        if not current_user.country_ids and not current_user.country_id:
+        if scope.has_no_countries:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Usuario no tiene países asignados"
             )
-        country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
+        country_ids = scope.country_ids
         stats = ProductService.get_product_stats_for_countries(
             db=db,
             country_ids=country_ids
@@ -528,7 +542,8 @@ class BulkImportRequest(BaseModel):
 async def bulk_import_products(
     import_data: BulkImportRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Import multiple products from parsed Excel data
@@ -577,10 +592,8 @@ async def bulk_import_products(
                         raise ValueError(f"Campo requerido faltante: {field}")
                 
                 # Validate country access for non-admin users
-                if not current_user.is_admin:
-                    user_country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
-                    if processed_data["country_id"] not in user_country_ids:
-                        raise ValueError("No tienes permisos para importar productos a este país")
+                if not scope.has_country_access(processed_data["country_id"]):
+                    raise ValueError("No tienes permisos para importar productos a este país")
                 
                 # Convert to ProductCreate schema
                 product_create = ProductCreate(**processed_data)
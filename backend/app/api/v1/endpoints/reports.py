@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from app.config.database import get_db
-from app.api.v1.endpoints.auth import get_current_user
+from app.config.settings import settings
+from app.api.v1.endpoints.auth import get_current_user, get_access_scope, get_report_scope
 from app.models.user import User
 from app.schemas.report import (
     StockByCategoryResponse, StockByCategoryItem,
@@ -12,14 +15,25 @@ from app.schemas.report import (
     CountrySummaryResponse, CountrySummaryItem,
     LowStockAlertsResponse, LowStockAlert,
     InventoryTableResponse, InventoryTableItem, PageInfo,
+    ExpiringSoonResponse, ExpiringProductItem, ExpiryWorklistResponse,
+    StockAtDateResponse, StockAtDateItem,
     CommercialDashboardData, CommercialReportFilters,
     TimeGroupBy, AlertLevel, StockStatus
 )
 from app.services.report_service import ReportService
-from app.core.role_permissions import RolePermissions, require_module_access
+from app.services.snapshot_service import SnapshotService
+from app.services.expiry_service import ExpiryService
+from app.utils.date_helpers import get_local_today
+from app.core.role_permissions import AccessScope, require_module_access
+from app.core.responses import trusted_response
+from app.core.data_versions import REPORT_TABLES, etag_headers, scoped_conditional_get
+from app.core import live_events
 
 router = APIRouter()
 
+# 304 si no cambió ningún dato del reporte para el alcance del usuario (ni el día)
+report_etag = scoped_conditional_get(*REPORT_TABLES, daily=True)
+
 @router.get("/test")
 async def test_reports():
     """Endpoint de prueba para verificar que los reportes funcionan"""
@@ -61,13 +75,14 @@ async def test_inventory_simple(
         print(f"[TEST_INVENTORY] Traceback: {traceback.format_exc()}")
         return {"error": str(e), "message": "Test failed"}
 
-@router.get("/commercial/inventory-table-simplified")
+@router.get("/commercial/inventory-table-simplified", dependencies=[Depends(report_etag)])
 async def get_inventory_table_simplified(
     category_id: Optional[int] = Query(None),
     limit: int = Query(50, ge=1, le=500),
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """Versión simplificada de inventory table sin usar ReportService"""
     try:
@@ -85,10 +100,8 @@ async def get_inventory_table_simplified(
         )
         
         # Filtros según usuario
-        if not current_user.is_admin:
-            country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
-            if country_ids:
-                query = query.filter(Product.country_id.in_(country_ids))
+        if scope.country_ids:
+            query = query.filter(Product.country_id.in_(scope.country_ids))
         
         if category_id:
             query = query.filter(Product.categoria_id == category_id)
@@ -119,7 +132,7 @@ async def get_inventory_table_simplified(
                 "pais_nombre": product.country.name if product.country else "",
                 "pais_id": product.country_id,
                 "comentarios": product.comentarios,
-                "stock_status": "critical" if product.cantidad <= 5 else "warning" if product.cantidad <= 10 else "normal"
+                "stock_status": product.alert_level or "normal"
             })
         
         return {
@@ -142,31 +155,21 @@ async def get_inventory_table_simplified(
             detail=f"Error: {str(e)}"
         )
 
-@router.get("/commercial/stock-by-category", response_model=StockByCategoryResponse)
+@router.get("/commercial/stock-by-category", response_model=StockByCategoryResponse, dependencies=[Depends(report_etag)])
 @require_module_access("reports")
 async def get_stock_by_category(
     category_id: Optional[int] = Query(None, description="Filtrar por categoria especifica"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_access_scope)
 ):
     """
     Obtener stock agrupado por categoria
     - Para usuarios con acceso a reportes (admin, user, comercial)
     - Aplica filtros según permisos del usuario
     """
-    # Filtrar países según permisos del usuario
-    allowed_country_ids = RolePermissions.filter_countries(current_user)
-    
-    # Si el usuario no tiene países asignados y requiere filtro, no puede ver nada
-    if allowed_country_ids is not None and not allowed_country_ids:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Usuario no tiene paises asignados"
-        )
-    
-    # Si es admin sin países asignados, pasar None para ver todos
-    if not allowed_country_ids and current_user.is_admin:
-        allowed_country_ids = None
+    # Filtrar países según permisos del usuario (400 si requiere filtro y no tiene países)
+    allowed_country_ids = scope.require_countries()
     
     # Obtener datos
     stock_data = ReportService.get_commercial_stock_by_category(
@@ -184,13 +187,14 @@ async def get_stock_by_category(
         total_categories=total_categories
     )
 
-@router.get("/commercial/movements-summary", response_model=MovementsSummaryResponse)
+@router.get("/commercial/movements-summary", response_model=MovementsSummaryResponse, dependencies=[Depends(report_etag)])
 async def get_movements_summary(
     fecha_desde: Optional[datetime] = Query(None, description="Fecha inicio del periodo"),
     fecha_hasta: Optional[datetime] = Query(None, description="Fecha fin del periodo"),
     category_id: Optional[int] = Query(None, description="Filtrar por categoria"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_report_scope)
 ):
     """
     Obtener resumen de movimientos
@@ -204,19 +208,8 @@ async def get_movements_summary(
             detail="No tienes permisos para acceder a estos reportes"
         )
     
-    # Obtener paises asignados
-    country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
-    
-    # Para usuarios admin, si no tienen países asignados, pueden ver todos
-    if not country_ids and not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Usuario no tiene paises asignados"
-        )
-    
-    # Si es admin sin países asignados, pasar None para ver todos
-    if not country_ids and current_user.is_admin:
-        country_ids = None
+    # Países del alcance del usuario (None = todos; 400 si no tiene asignados)
+    country_ids = scope.require_countries()
     
     # Si no se especifican fechas, usar ultimo mes
     if not fecha_desde:
@@ -235,13 +228,14 @@ async def get_movements_summary(
     
     return MovementsSummaryResponse(**summary)
 
-@router.get("/commercial/movements-timeline", response_model=MovementTimelineResponse)
+@router.get("/commercial/movements-timeline", response_model=MovementTimelineResponse, dependencies=[Depends(report_etag)])
 async def get_movements_timeline(
     fecha_desde: Optional[datetime] = Query(None, description="Fecha inicio del periodo"),
     fecha_hasta: Optional[datetime] = Query(None, description="Fecha fin del periodo"),
     group_by: TimeGroupBy = Query(TimeGroupBy.DAY, description="Agrupar por: day, week, month"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_report_scope)
 ):
     """
     Obtener timeline de movimientos
@@ -255,19 +249,8 @@ async def get_movements_timeline(
             detail="No tienes permisos para acceder a estos reportes"
         )
     
-    # Obtener paises asignados
-    country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
-    
-    # Para usuarios admin, si no tienen países asignados, pueden ver todos
-    if not country_ids and not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Usuario no tiene paises asignados"
-        )
-    
-    # Si es admin sin países asignados, pasar None para ver todos
-    if not country_ids and current_user.is_admin:
-        country_ids = None
+    # Países del alcance del usuario (None = todos; 400 si no tiene asignados)
+    country_ids = scope.require_countries()
     
     # Si no se especifican fechas, usar ultimo mes
     if not fecha_desde:
@@ -291,10 +274,11 @@ async def get_movements_timeline(
         fecha_hasta=fecha_hasta
     )
 
-@router.get("/commercial/countries-summary", response_model=CountrySummaryResponse)
+@router.get("/commercial/countries-summary", response_model=CountrySummaryResponse, dependencies=[Depends(report_etag)])
 async def get_countries_summary(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_report_scope)
 ):
     """
     Obtener resumen por paises asignados
@@ -307,19 +291,8 @@ async def get_countries_summary(
             detail="No tienes permisos para acceder a estos reportes"
         )
     
-    # Obtener paises asignados
-    country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
-    
-    # Para usuarios admin, si no tienen países asignados, pueden ver todos
-    if not country_ids and not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Usuario no tiene paises asignados"
-        )
-    
-    # Si es admin sin países asignados, pasar None para ver todos
-    if not country_ids and current_user.is_admin:
-        country_ids = None
+    # Países del alcance del usuario (None = todos; 400 si no tiene asignados)
+    country_ids = scope.require_countries()
     
     # Obtener resumen por paises
     countries_data = ReportService.get_commercial_countries_summary(
@@ -332,11 +305,15 @@ async def get_countries_summary(
         total_countries=len(countries_data)
     )
 
-@router.get("/commercial/low-stock-alerts", response_model=LowStockAlertsResponse)
+@router.get("/commercial/low-stock-alerts", response_model=LowStockAlertsResponse, dependencies=[Depends(report_etag)])
 async def get_low_stock_alerts(
-    min_stock_threshold: int = Query(10, ge=0, le=100, description="Umbral minimo de stock"),
+    min_stock_threshold: Optional[int] = Query(
+        None, ge=0, le=100,
+        description="Umbral global de stock (sin valor se usan los umbrales de cada producto o categoria)"
+    ),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_report_scope)
 ):
     """
     Obtener alertas de stock bajo
@@ -349,19 +326,8 @@ async def get_low_stock_alerts(
             detail="No tienes permisos para acceder a estos reportes"
         )
     
-    # Obtener paises asignados
-    country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
-    
-    # Para usuarios admin, si no tienen países asignados, pueden ver todos
-    if not country_ids and not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Usuario no tiene paises asignados"
-        )
-    
-    # Si es admin sin países asignados, pasar None para ver todos
-    if not country_ids and current_user.is_admin:
-        country_ids = None
+    # Países del alcance del usuario (None = todos; 400 si no tiene asignados)
+    country_ids = scope.require_countries()
     
     # Obtener alertas
     alerts_data = ReportService.get_commercial_low_stock_alerts(
@@ -381,10 +347,11 @@ async def get_low_stock_alerts(
         warning_count=warning_count
     )
 
-@router.get("/commercial/dashboard", response_model=CommercialDashboardData)
+@router.get("/commercial/dashboard", response_model=CommercialDashboardData, dependencies=[Depends(report_etag)])
 async def get_commercial_dashboard(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_report_scope)
 ):
     """
     Obtener todos los datos del dashboard comercial
@@ -398,19 +365,8 @@ async def get_commercial_dashboard(
             detail="No tienes permisos para acceder a estos reportes"
         )
     
-    # Obtener paises asignados
-    country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
-    
-    # Para usuarios admin, si no tienen países asignados, pueden ver todos
-    if not country_ids and not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Usuario no tiene paises asignados"
-        )
-    
-    # Si es admin sin países asignados, pasar None para ver todos
-    if not country_ids and current_user.is_admin:
-        country_ids = None
+    # Países del alcance del usuario (None = todos; 400 si no tiene asignados)
+    country_ids = scope.require_countries()
     
     # Obtener todos los datos
     stock_data = ReportService.get_commercial_stock_by_category(db=db, country_ids=country_ids)
@@ -434,13 +390,63 @@ async def get_commercial_dashboard(
         last_updated=datetime.now()
     )
 
+@router.get("/commercial/live")
+async def stream_live_updates(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_report_scope)
+):
+    """
+    Deltas en vivo para el dashboard comercial (Server-Sent Events)
+    - Eventos: stock (cambio de stock por producto), alert (producto que entra o sube
+      de nivel de alerta), movement (nuevo movimiento) y resync (volver a pedir los reportes)
+    - Solo llegan los cambios de los países y categorías del usuario
+    """
+    if not settings.LIVE_EVENTS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Eventos en vivo deshabilitados"
+        )
+    
+    # Solo usuarios autenticados pueden acceder (admin, user, commercial)
+    if not (current_user.is_admin or current_user.is_user or current_user.is_commercial):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a estos reportes"
+        )
+    
+    # 400 si el usuario no tiene países asignados
+    scope.require_countries()
+    
+    # La conexión dura minutos: la sesión de BD se libera antes de empezar el stream
+    db.close()
+    
+    subscriber = live_events.broker.subscribe(scope)
+    if subscriber is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Demasiadas conexiones en vivo, intenta más tarde",
+            headers={"Retry-After": "30"}
+        )
+    print(f"[LIVE] Cliente conectado (usuario {scope.user_id}, {live_events.broker.subscriber_count} activos)")
+    
+    return StreamingResponse(
+        live_events.event_stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Si el cliente se desconecta antes de empezar el stream, igual se libera su cola
+        background=BackgroundTask(live_events.broker.unsubscribe, subscriber)
+    )
+
 @router.get("/commercial/inventory-table", response_model=InventoryTableResponse)
 async def get_inventory_table(
     category_id: Optional[int] = Query(None, description="Filtrar por categoria especifica"),
     limit: int = Query(100, ge=1, le=500, description="Número de registros por página"),
     offset: int = Query(0, ge=0, description="Número de registros a saltar"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_report_scope),
+    etag: Optional[str] = Depends(report_etag)
 ):
     """
     Obtener tabla completa de inventarios
@@ -462,23 +468,10 @@ async def get_inventory_table(
                 detail="No tienes permisos para acceder a estos reportes"
             )
         
-        # Obtener paises asignados
-        country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
+        # Países del alcance del usuario (None = todos; 400 si no tiene asignados)
+        country_ids = scope.require_countries()
         print(f"[INVENTORY_TABLE] User country IDs: {country_ids}")
         
-        # Para usuarios admin, si no tienen países asignados, pueden ver todos
-        if not country_ids and not current_user.is_admin:
-            print(f"[INVENTORY_TABLE] User has no assigned countries")
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Usuario no tiene paises asignados"
-            )
-        
-        # Si es admin sin países asignados, pasar None para ver todos
-        if not country_ids and current_user.is_admin:
-            country_ids = None
-            print(f"[INVENTORY_TABLE] Admin user, allowing all countries")
-        
         # Obtener datos de inventario
         print(f"[INVENTORY_TABLE] Calling ReportService.get_commercial_inventory_table")
         try:
@@ -498,11 +491,12 @@ async def get_inventory_table(
         
         print(f"[INVENTORY_TABLE] Creating InventoryTableResponse")
         try:
-            response = InventoryTableResponse(
-                products=[InventoryTableItem(**item) for item in inventory_data["products"]],
+            # Datos ya tipados desde la BD: se construyen sin validar y se serializan sin revalidar
+            response = trusted_response(InventoryTableResponse.construct(
+                products=[InventoryTableItem.construct(**item) for item in inventory_data["products"]],
                 total_count=inventory_data["total_count"],
-                page_info=PageInfo(**inventory_data["page_info"])
-            )
+                page_info=PageInfo.construct(**inventory_data["page_info"])
+            ), headers=etag_headers(etag))
             print(f"[INVENTORY_TABLE] Response created successfully")
         except Exception as response_error:
             print(f"[INVENTORY_TABLE] Response creation error: {str(response_error)}")
@@ -526,12 +520,136 @@ async def get_inventory_table(
             detail=f"Error interno del servidor: {str(e)}"
         )
 
-@router.get("/commercial/inventory-rotation")
+@router.get("/commercial/expiring-soon", response_model=ExpiringSoonResponse, dependencies=[Depends(report_etag)])
+async def get_expiring_soon(
+    dias: int = Query(30, ge=1, le=365, description="Dias hacia adelante"),
+    category_id: Optional[int] = Query(None, description="Filtrar por categoria especifica"),
+    limit: int = Query(100, ge=1, le=500, description="Número de registros por página"),
+    offset: int = Query(0, ge=0, description="Número de registros a saltar"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_report_scope)
+):
+    """
+    Obtener productos por vencer en los proximos N dias
+    - Ordenados por fecha de vencimiento (los mas urgentes primero)
+    - Incluye paginación
+    """
+    # Solo usuarios autenticados pueden acceder (admin, user, commercial)
+    if not (current_user.is_admin or current_user.is_user or current_user.is_commercial):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a estos reportes"
+        )
+    
+    # Países del alcance del usuario (None = todos; 400 si no tiene asignados)
+    country_ids = scope.require_countries()
+    
+    expiring_data = ReportService.get_expiring_soon_products(
+        db=db,
+        country_ids=country_ids,
+        dias=dias,
+        category_id=category_id,
+        limit=limit,
+        offset=offset
+    )
+    
+    return ExpiringSoonResponse(
+        products=[ExpiringProductItem(**item) for item in expiring_data["products"]],
+        total_count=expiring_data["total_count"],
+        dias=expiring_data["dias"],
+        page_info=PageInfo(**expiring_data["page_info"])
+    )
+
+@router.get("/commercial/expiry-worklist", response_model=ExpiryWorklistResponse, dependencies=[Depends(report_etag)])
+async def get_expiry_worklist(
+    category_id: Optional[int] = Query(None, description="Filtrar por categoria especifica"),
+    limit_por_pais: int = Query(100, ge=1, le=1000, description="Máximo de productos por país"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_report_scope)
+):
+    """
+    Lista de trabajo de vencimientos por país
+    - Productos que vencen en los próximos EXPIRY_WORKLIST_DAYS días
+    - Precalculada por el barrido diario de medianoche (no se recalcula por solicitud)
+    """
+    # Solo usuarios autenticados pueden acceder (admin, user, commercial)
+    if not (current_user.is_admin or current_user.is_user or current_user.is_commercial):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a estos reportes"
+        )
+    
+    # Países del alcance del usuario (None = todos; 400 si no tiene asignados)
+    country_ids = scope.require_countries()
+    
+    worklist = ExpiryService.get_worklist(
+        db=db,
+        country_ids=country_ids,
+        category_id=category_id,
+        limit_por_pais=limit_por_pais
+    )
+    
+    return ExpiryWorklistResponse(**worklist)
+
+@router.get("/commercial/stock-at-date", response_model=StockAtDateResponse, dependencies=[Depends(report_etag)])
+async def get_stock_at_date(
+    fecha: date = Query(..., description="Fecha de corte (YYYY-MM-DD), saldo al cierre del día"),
+    category_id: Optional[int] = Query(None, description="Filtrar por categoria especifica"),
+    limit: int = Query(100, ge=1, le=1000, description="Número de registros por página"),
+    offset: int = Query(0, ge=0, description="Número de registros a saltar"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_report_scope)
+):
+    """
+    Obtener el inventario histórico al cierre de una fecha (p. ej. cierre de mes)
+    - Parte del corte de stock más cercano y aplica los movimientos posteriores
+    - Incluye totales de cantidad y peso del inventario filtrado
+    """
+    # Solo usuarios autenticados pueden acceder (admin, user, commercial)
+    if not (current_user.is_admin or current_user.is_user or current_user.is_commercial):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para acceder a estos reportes"
+        )
+    
+    if fecha > get_local_today():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La fecha de corte no puede ser futura"
+        )
+    
+    # Países del alcance del usuario (None = todos; 400 si no tiene asignados)
+    country_ids = scope.require_countries()
+    
+    stock_data = SnapshotService.get_stock_at_date(
+        db=db,
+        fecha_corte=fecha,
+        country_ids=country_ids,
+        category_id=category_id,
+        limit=limit,
+        offset=offset
+    )
+    
+    return StockAtDateResponse(
+        fecha_corte=stock_data["fecha_corte"],
+        snapshot_base=stock_data["snapshot_base"],
+        products=[StockAtDateItem(**item) for item in stock_data["products"]],
+        total_count=stock_data["total_count"],
+        total_cantidad=stock_data["total_cantidad"],
+        total_peso=stock_data["total_peso"],
+        page_info=PageInfo(**stock_data["page_info"])
+    )
+
+@router.get("/commercial/inventory-rotation", dependencies=[Depends(report_etag)])
 async def get_inventory_rotation_metrics(
     category_id: Optional[int] = Query(None, description="Filtrar por categoria especifica"),
     days_back: int = Query(90, ge=30, le=365, description="Días hacia atrás para análisis"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: AccessScope = Depends(get_report_scope)
 ):
     """
     Obtener métricas de rotación de inventario y días de permanencia
@@ -547,19 +665,8 @@ async def get_inventory_rotation_metrics(
             detail="No tienes permisos para acceder a estos reportes"
         )
     
-    # Obtener paises asignados
-    country_ids = current_user.country_ids or ([current_user.country_id] if current_user.country_id else [])
-    
-    # Para usuarios admin, si no tienen países asignados, pueden ver todos
-    if not country_ids and not current_user.is_admin:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Usuario no tiene paises asignados"
-        )
-    
-    # Si es admin sin países asignados, pasar None para ver todos
-    if not country_ids and current_user.is_admin:
-        country_ids = None
+    # Países del alcance del usuario (None = todos; 400 si no tiene asignados)
+    country_ids = scope.require_countries()
     
     # Obtener métricas de rotación
     rotation_metrics = ReportService.get_inventory_rotation_metrics(
@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from app.api.deps import get_db
+from app.api.v1.endpoints.auth import get_current_user
+from app.models.user import User
+from app.core.reference_cache import get_reference_data
 import re
 
 router = APIRouter()
@@ -23,15 +26,13 @@ async def get_country_statistics(
     """Obtener estadisticas de un pais especifico"""
     from app.models.product import Product
     from app.models.movement import Movement
-    from app.models.category import Category
-    from app.models.country import Country
     from sqlalchemy import func
     
     # Validar formato del código de país
     validate_country_code(country_code)
     
     # Verificar que el pais existe
-    country = db.query(Country).filter(Country.code == country_code.upper()).first()
+    country = get_reference_data(db).country_by_code(country_code)
     if not country:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -47,7 +48,7 @@ async def get_country_statistics(
     ).count()
     
     # Contar categorias activas
-    categories_count = db.query(Category).filter(Category.is_active == True).count()
+    categories_count = len(get_reference_data(db).category_list(active_only=True))
     
     # Obtener ultima actividad (ultimo movimiento de productos de ese pais)
     last_movement = db.query(Movement.created_at).join(Product).filter(
@@ -72,11 +73,10 @@ async def get_all_countries_statistics(
     """Obtener estadisticas de todos los paises"""
     from app.models.product import Product
     from app.models.movement import Movement
-    from app.models.country import Country
     from sqlalchemy import func
     
     # Obtener todos los paises
-    countries = db.query(Country).all()
+    countries = get_reference_data(db).country_list()
     
     statistics = []
     for country in countries:
@@ -114,13 +114,12 @@ async def delete_country_products(
     """Eliminar todos los productos de un pais (y opcionalmente sus movimientos)"""
     from app.models.product import Product
     from app.models.movement import Movement
-    from app.models.country import Country
     
     # Validar formato del código de país
     validate_country_code(country_code)
     
     # Verificar que el pais existe
-    country = db.query(Country).filter(Country.code == country_code.upper()).first()
+    country = get_reference_data(db).country_by_code(country_code)
     if not country:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -160,13 +159,12 @@ async def delete_country_movements(
     """Eliminar todos los movimientos de productos de un pais"""
     from app.models.product import Product
     from app.models.movement import Movement
-    from app.models.country import Country
     
     # Validar formato del código de país
     validate_country_code(country_code)
     
     # Verificar que el pais existe
-    country = db.query(Country).filter(Country.code == country_code.upper()).first()
+    country = get_reference_data(db).country_by_code(country_code)
     if not country:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -197,13 +195,12 @@ async def delete_all_country_data(
     """Eliminar todos los datos (productos y movimientos) de un pais"""
     from app.models.product import Product
     from app.models.movement import Movement
-    from app.models.country import Country
     
     # Validar formato del código de país
     validate_country_code(country_code)
     
     # Verificar que el pais existe
-    country = db.query(Country).filter(Country.code == country_code.upper()).first()
+    country = get_reference_data(db).country_by_code(country_code)
     if not country:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -232,4 +229,46 @@ async def delete_all_country_data(
         "message": f"Eliminacion completa realizada para {country.name}",
         "deleted_products": products_count,
         "deleted_movements": movements_count
-    }
\ No newline at end of file
+    }
+
+def require_admin(current_user: User) -> None:
+    """Validar que el usuario sea administrador"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Solo los administradores pueden ver el diagnostico de consultas"
+        )
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: Optional[int] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Obtener las consultas lentas registradas (solo administradores)"""
+    from app.core import slow_query
+
+    require_admin(current_user)
+
+    recorder = slow_query.slow_query_recorder
+    if recorder is None:
+        return {"enabled": False, "threshold_ms": None, "samples": []}
+
+    return {
+        "enabled": True,
+        "threshold_ms": recorder.threshold_ms,
+        "samples": recorder.get_samples(limit)
+    }
+
+@router.delete("/slow-queries")
+async def clear_slow_queries(
+    current_user: User = Depends(get_current_user)
+):
+    """Vaciar el registro de consultas lentas (solo administradores)"""
+    from app.core import slow_query
+
+    require_admin(current_user)
+
+    recorder = slow_query.slow_query_recorder
+    cleared = recorder.clear() if recorder is not None else 0
+
+    return {"message": "Registro de consultas lentas vaciado", "cleared": cleared}
@@ -3,13 +3,13 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.config.database import get_db
+from app.config.security import get_password_hash
+from app.core.reference_cache import get_reference_data
+from app.core.data_versions import conditional_get
 from app.api.v1.endpoints.auth import get_current_user
 from app.models.user import User
 from app.services.user_service import UserService
 from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserListResponse
-from app.models.role import Role
-from app.models.category import Category
-from app.models.country import Country
 
 router = APIRouter()
 
@@ -77,9 +77,7 @@ def update_user(
             
         # Actualizar contraseña si se proporciona
         if user_data.password:
-            from passlib.context import CryptContext
-            pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-            user.password_hash = pwd_context.hash(user_data.password)
+            user.password_hash = get_password_hash(user_data.password)
         
         # Actualizar países asignados
         if user_data.country_ids is not None:
@@ -191,22 +189,22 @@ def validate_user_country_access(
     return {"user_id": user_id, "country_id": country_id, "has_access": has_access}
 
 # Endpoints auxiliares para obtener datos de referencia
-@router.get("/reference/roles", response_model=List[dict])
+@router.get("/reference/roles", response_model=List[dict], dependencies=[Depends(conditional_get("roles"))])
 def get_roles(db: Session = Depends(get_db)):
     """Obtener lista de roles disponibles"""
-    roles = db.query(Role).filter(Role.id.isnot(None)).all()
+    roles = get_reference_data(db).roles.values()
     return [{"id": role.id, "name": role.name, "description": role.description} for role in roles]
 
-@router.get("/reference/categories", response_model=List[dict])
+@router.get("/reference/categories", response_model=List[dict], dependencies=[Depends(conditional_get("categories"))])
 def get_categories(db: Session = Depends(get_db)):
     """Obtener lista de categor�as disponibles"""
-    categories = db.query(Category).filter(Category.is_active == True).all()
+    categories = get_reference_data(db).category_list(active_only=True)
     return [{"id": cat.id, "name": cat.name, "description": cat.description} for cat in categories]
 
-@router.get("/reference/countries", response_model=List[dict])
+@router.get("/reference/countries", response_model=List[dict], dependencies=[Depends(conditional_get("countries"))])
 def get_countries(db: Session = Depends(get_db)):
     """Obtener lista de pa�ses disponibles"""
-    countries = db.query(Country).filter(Country.is_active == True).all()
+    countries = get_reference_data(db).country_list(active_only=True)
     return [{"id": country.id, "name": country.name, "code": country.code} for country in countries]
 
 @router.put("/{user_id}/assign-countries")
@@ -17,6 +17,16 @@ engine = create_engine(
     }
 )
 
+# Registro opcional de consultas lentas
+if settings.SLOW_QUERY_LOG_ENABLED:
+    from app.core.slow_query import install_slow_query_log
+    install_slow_query_log(
+        engine,
+        threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+        buffer_size=settings.SLOW_QUERY_BUFFER_SIZE,
+        explain=settings.SLOW_QUERY_EXPLAIN
+    )
+
 # Crear sesión
 SessionLocal = sessionmaker(
     autocommit=False,
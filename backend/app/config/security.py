@@ -1,11 +1,26 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from .settings import settings
 
-# Configuración para hash de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Configuración para hash de contraseñas (único contexto de la aplicación).
+# min/max iguales a rounds: los hashes con otro costo se regeneran al iniciar sesión
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# Pool acotado para bcrypt: no bloquea el event loop ni agota el threadpool de la API
+_password_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.PASSWORD_HASH_WORKERS),
+    thread_name_prefix="password-hash"
+)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Crear token JWT"""
@@ -20,7 +35,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 def verify_token(token: str):
-    """Verificar y decodificar token JWT"""
+    """Verificar y decodificar token JWT (los tokens ya verificados se leen de la caché)"""
+    from app.core import token_cache
+
+    cached = token_cache.get_claims(token)
+    if cached is not None:
+        return cached
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         
@@ -32,7 +53,8 @@ def verify_token(token: str):
         # Verificar campos obligatorios
         if "sub" not in payload:
             return None
-            
+        
+        token_cache.put_claims(token, payload)
         return payload
     except JWTError:
         return None
@@ -43,4 +65,20 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Generar hash de contraseña"""
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verificar contraseña y devolver un hash nuevo si el actual usa otro costo"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """verify_and_update_password en el pool de hash (para endpoints async)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor, verify_and_update_password, plain_password, hashed_password
+    )
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash en el pool de hash (para endpoints async)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
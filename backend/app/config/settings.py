@@ -15,6 +15,22 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "muestras-univar-secret-key-2025-development")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+    # Tokens verificados en memoria (0 = sin caché)
+    JWT_CACHE_SIZE: int = int(os.getenv("JWT_CACHE_SIZE", "2048"))
+    # Construir el usuario desde los claims del token en lecturas (GET), sin consultar la BD
+    AUTH_TRUST_TOKEN_CLAIMS: bool = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "false").lower() == "true"
+    # Segundos que se reutiliza la versión de token / estado activo de un usuario
+    AUTH_TOKEN_STATE_TTL_SECONDS: int = int(os.getenv("AUTH_TOKEN_STATE_TTL_SECONDS", "30"))
+    # Costo de bcrypt (los hashes existentes se actualizan en el siguiente login)
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Hilos dedicados a hash/verificación de contraseñas
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    
+    # Rate limiting: "memory" (por proceso) o "database" (compartido entre workers)
+    RATE_LIMIT_STORAGE: str = os.getenv("RATE_LIMIT_STORAGE", "memory").lower()
+    RATE_LIMIT_STRATEGY: str = os.getenv("RATE_LIMIT_STRATEGY", "sliding-window-counter")
+    # Máximo de IPs con intentos de login fallidos en memoria
+    RATE_LIMIT_MAX_TRACKED_IPS: int = int(os.getenv("RATE_LIMIT_MAX_TRACKED_IPS", "10000"))
     
     # Configuración de la aplicación
     PROJECT_NAME: str = "Muestras Univar API"
@@ -68,6 +84,57 @@ class Settings(BaseSettings):
     PORT: int = 8000
     HOST: str = "0.0.0.0"
     
+    # Compresión de respuestas (brotli requiere el paquete opcional Brotli)
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))  # Bytes
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))  # 1-9
+    COMPRESSION_BROTLI_ENABLED: bool = os.getenv("COMPRESSION_BROTLI_ENABLED", "true").lower() == "true"
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))  # 0-11
+    
+    # Segundos de vigencia de la caché de países/categorías/roles (otros procesos ven cambios al vencer)
+    REFERENCE_CACHE_TTL_SECONDS: int = int(os.getenv("REFERENCE_CACHE_TTL_SECONDS", "300"))
+    # ETag por versión de datos en catálogos y reportes (304 si no hubo cambios)
+    CONDITIONAL_GET_ENABLED: bool = os.getenv("CONDITIONAL_GET_ENABLED", "true").lower() == "true"
+    # Forzar create_all + seeds en cada arranque (por defecto solo si cambió la huella del esquema)
+    SCHEMA_SYNC_FORCE: bool = os.getenv("SCHEMA_SYNC_FORCE", "false").lower() == "true"
+    # Umbrales de stock por defecto (productos y categorías sin umbral propio)
+    LOW_STOCK_WARNING_THRESHOLD: int = int(os.getenv("LOW_STOCK_WARNING_THRESHOLD", "10"))
+    LOW_STOCK_CRITICAL_THRESHOLD: int = int(os.getenv("LOW_STOCK_CRITICAL_THRESHOLD", "5"))
+    
+    # Eventos en vivo (SSE) para los dashboards
+    LIVE_EVENTS_ENABLED: bool = os.getenv("LIVE_EVENTS_ENABLED", "true").lower() == "true"
+    LIVE_EVENTS_MAX_CLIENTS: int = int(os.getenv("LIVE_EVENTS_MAX_CLIENTS", "500"))  # Conexiones abiertas por proceso
+    LIVE_EVENTS_QUEUE_SIZE: int = int(os.getenv("LIVE_EVENTS_QUEUE_SIZE", "100"))  # Deltas pendientes por cliente antes de pedir resync
+    LIVE_EVENTS_HEARTBEAT_SECONDS: int = int(os.getenv("LIVE_EVENTS_HEARTBEAT_SECONDS", "25"))
+    LIVE_EVENTS_MAX_SECONDS: int = int(os.getenv("LIVE_EVENTS_MAX_SECONDS", "900"))  # El cliente se reconecta (revalida el token)
+    
+    # Registro de consultas lentas (opcional, visible para administradores)
+    SLOW_QUERY_LOG_ENABLED: bool = os.getenv("SLOW_QUERY_LOG_ENABLED", "false").lower() == "true"
+    SLOW_QUERY_THRESHOLD_MS: int = int(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500"))
+    SLOW_QUERY_BUFFER_SIZE: int = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+    SLOW_QUERY_EXPLAIN: bool = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+    
+    # Máximo de productos por solicitud de Kardex en lote
+    KARDEX_BATCH_MAX_PRODUCTS: int = int(os.getenv("KARDEX_BATCH_MAX_PRODUCTS", "1000"))
+    
+    # Cortes de stock (saldos históricos por producto)
+    SNAPSHOT_JOB_ENABLED: bool = os.getenv("SNAPSHOT_JOB_ENABLED", "true").lower() == "true"
+    SNAPSHOT_JOB_HOUR: int = int(os.getenv("SNAPSHOT_JOB_HOUR", "0"))
+    SNAPSHOT_JOB_MINUTE: int = int(os.getenv("SNAPSHOT_JOB_MINUTE", "15"))
+    SNAPSHOT_DAILY_RETENTION_DAYS: int = int(os.getenv("SNAPSHOT_DAILY_RETENTION_DAYS", "90"))  # Los cortes de fin de mes no se eliminan
+    
+    # Barrido de vencimientos (medianoche en TIMEZONE): horizonte de la lista de trabajo por país
+    EXPIRY_JOB_ENABLED: bool = os.getenv("EXPIRY_JOB_ENABLED", "true").lower() == "true"
+    EXPIRY_WORKLIST_DAYS: int = int(os.getenv("EXPIRY_WORKLIST_DAYS", "30"))
+    
+    # Particionado mensual de movements (PostgreSQL): meses futuros con partición creada
+    MOVEMENT_PARTITION_MONTHS_AHEAD: int = int(os.getenv("MOVEMENT_PARTITION_MONTHS_AHEAD", "3"))
+    
+    # Archivo de movimientos antiguos (deshabilitado por defecto)
+    ARCHIVE_JOB_ENABLED: bool = os.getenv("ARCHIVE_JOB_ENABLED", "false").lower() == "true"
+    ARCHIVE_HORIZON_DAYS: int = int(os.getenv("ARCHIVE_HORIZON_DAYS", "730"))  # Movimientos más antiguos se archivan
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "5000"))
+    
     @property
     def database_url(self) -> str:
         """Get database URL based on environment"""
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Versiones de datos por tabla y GET condicional (ETag / If-None-Match).
+
+Cada transacción que inserta, modifica o elimina filas de una tabla registrada
+aumenta su contador en data_versions dentro de la misma transacción, así que la
+versión es compartida entre workers y cambia exactamente cuando se confirma el
+cambio. Los endpoints de lectura calculan un ETag con las versiones de las tablas
+que consultan más el alcance del usuario y la URL; si coincide con If-None-Match
+responden 304 sin ejecutar sus consultas.
+"""
+import hashlib
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import event, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.config.database import get_db
+from app.config.settings import settings
+from app.models.data_version import DataVersion
+from app.utils.date_helpers import get_local_today
+
+# Tablas con contador de versión (las que alimentan endpoints con GET condicional)
+TRACKED_TABLES = ("countries", "categories", "roles", "products", "movements")
+
+# Tablas de los reportes (nombres de categorías y países incluidos)
+REPORT_TABLES = ("products", "movements", "categories", "countries")
+
+_CACHE_CONTROL = "private, no-cache"
+
+def get_versions(db: Session, tables: Iterable[str]) -> Optional[Dict[str, int]]:
+    """Versión actual de cada tabla (None si falta algún contador)"""
+    tables = tuple(tables)
+    rows = db.query(DataVersion.table_name, DataVersion.version).filter(
+        DataVersion.table_name.in_(tables)
+    ).all()
+    versions = {name: version for name, version in rows}
+    if len(versions) != len(tables):
+        return None
+    return versions
+
+def build_etag(request: Request, versions: Dict[str, int], scope_key: Tuple = (), daily: bool = False) -> str:
+    """ETag fuerte: versiones de las tablas + alcance del usuario + ruta y parámetros"""
+    query = sorted(request.query_params.multi_items())
+    parts = [request.url.path, repr(query), repr(sorted(versions.items())), repr(scope_key)]
+    if daily:
+        # Reportes con fechas relativas a hoy (vencimientos, últimos 30 días)
+        parts.append(get_local_today().isoformat())
+    digest = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (acepta W/ que agregan compresores y proxies)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def etag_headers(etag: Optional[str]) -> Dict[str, str]:
+    """Headers de validación para respuestas que el endpoint construye directamente"""
+    if etag is None:
+        return {}
+    return {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+
+def _evaluate(
+    request: Request,
+    response: Response,
+    db: Session,
+    tables: Tuple[str, ...],
+    scope_key: Tuple = (),
+    daily: bool = False
+) -> Optional[str]:
+    if not settings.CONDITIONAL_GET_ENABLED:
+        return None
+    versions = get_versions(db, tables)
+    if versions is None:
+        return None
+    etag = build_etag(request, versions, scope_key, daily)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+    response.headers.update(etag_headers(etag))
+    return etag
+
+def conditional_get(*tables: str, daily: bool = False):
+    """
+    Dependencia para endpoints públicos: responde 304 si If-None-Match coincide con
+    la versión actual; si no, agrega ETag a la respuesta y devuelve su valor.
+    """
+    def dependency(request: Request, response: Response, db: Session = Depends(get_db)) -> Optional[str]:
+        return _evaluate(request, response, db, tables, daily=daily)
+    return dependency
+
+def scoped_conditional_get(*tables: str, daily: bool = False):
+    """Igual que conditional_get, con el alcance de reportes del usuario actual en el ETag"""
+    from app.api.v1.endpoints.auth import get_report_scope
+    from app.core.role_permissions import AccessScope
+
+    def dependency(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_db),
+        scope: AccessScope = Depends(get_report_scope)
+    ) -> Optional[str]:
+        scope_key = (scope.user_id, scope.is_admin, scope.country_ids, scope.category_ids)
+        return _evaluate(request, response, db, tables, scope_key, daily)
+    return dependency
+
+# --- Incremento de versiones en las escrituras ---
+
+def increment_versions(connection: Connection, tables: Iterable[str]) -> None:
+    """Aumentar el contador de las tablas (para escrituras hechas fuera de una Session)"""
+    names = sorted({name for name in tables if name in TRACKED_TABLES})
+    if not names:
+        return
+    connection.execute(
+        update(DataVersion.__table__)
+        .where(DataVersion.__table__.c.table_name.in_(names))
+        .values(version=DataVersion.__table__.c.version + 1)
+    )
+
+def _bump(session: Session, tables: Iterable[str]) -> None:
+    """Aumentar (una vez por transacción) el contador de las tablas modificadas"""
+    bumped = session.info.setdefault("data_versions_bumped", set())
+    pending = {name for name in tables if name in TRACKED_TABLES} - bumped
+    if not pending:
+        return
+    bumped.update(pending)
+    increment_versions(session.connection(), pending)
+
+@event.listens_for(Session, "before_flush")
+def _track_flush_changes(session, flush_context, instances):
+    tables = set()
+    for obj in (*session.new, *session.deleted):
+        tables.add(obj.__table__.name)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            tables.add(obj.__table__.name)
+    if tables:
+        session.info.setdefault("data_versions_pending", set()).update(tables)
+
+@event.listens_for(Session, "after_flush")
+def _bump_after_flush(session, flush_context):
+    pending = session.info.pop("data_versions_pending", None)
+    if pending:
+        _bump(session, pending)
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_bulk_statements(orm_execute_state):
+    # query.update()/delete() y session.execute(insert/update/delete) no pasan por el flush
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    name = getattr(table, "name", None)
+    if name:
+        _bump(orm_execute_state.session, (name,))
+
+@event.listens_for(Session, "after_commit")
+def _reset_after_commit(session):
+    session.info.pop("data_versions_bumped", None)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _reset_after_rollback(session, previous_transaction):
+    session.info.pop("data_versions_bumped", None)
+    session.info.pop("data_versions_pending", None)
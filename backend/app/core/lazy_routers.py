@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Registro diferido de los routers de la API.
+
+Importar los módulos de endpoints y construir sus rutas es la parte más lenta del
+import de la aplicación. LazyRouters los importa e incluye en la app en segundo
+plano durante el startup (el servidor empieza a escuchar sin esperarlos) y
+LazyRoutersMiddleware hace que una solicitud que llegue antes espere a que
+terminen, así ninguna ruta responde 404 por llegar temprano.
+"""
+import asyncio
+import importlib
+import threading
+import time
+from typing import Iterable, List, Set, Tuple
+
+import anyio
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+class LazyRouters:
+    """Routers (módulo, prefijo, tags) que se incluyen en la app al primer uso"""
+
+    def __init__(self, app: FastAPI, prefix: str, routers: Iterable[Tuple[str, str, List[str]]]):
+        self.app = app
+        self.prefix = prefix
+        self.routers = tuple(routers)
+        self.loaded = False
+        self._lock = threading.Lock()
+        # Routers ya incluidos: si una carga falla a medias, el reintento no duplica rutas
+        self._included: Set[str] = set()
+
+    def load(self) -> None:
+        """Importar e incluir los routers (una sola vez; seguro desde varios hilos)"""
+        if self.loaded:
+            return
+        with self._lock:
+            if self.loaded:
+                return
+            started = time.perf_counter()
+            # Primero todos los imports (lo que suele fallar), después se incluyen las rutas
+            pending = [
+                (module_path, importlib.import_module(module_path), prefix, tags)
+                for module_path, prefix, tags in self.routers
+                if module_path not in self._included
+            ]
+            for module_path, module, prefix, tags in pending:
+                self.app.include_router(module.router, prefix=f"{self.prefix}{prefix}", tags=tags)
+                self._included.add(module_path)
+            # El esquema OpenAPI se regenera con todas las rutas
+            self.app.openapi_schema = None
+            self.loaded = True
+            print(f"[STARTUP] {len(self.routers)} routers cargados en {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    def load_in_background(self) -> "asyncio.Future":
+        """Cargar los routers en el threadpool (llamar desde el event loop); los errores se registran"""
+        future = asyncio.get_running_loop().run_in_executor(None, self.load)
+        future.add_done_callback(self._log_load_error)
+        return future
+
+    @staticmethod
+    def _log_load_error(future: "asyncio.Future") -> None:
+        if future.cancelled() or future.exception() is None:
+            return
+        # La primera solicitud vuelve a intentar la carga desde LazyRoutersMiddleware
+        print(f"[STARTUP] Error cargando routers: {str(future.exception())}")
+
+class LazyRoutersMiddleware:
+    """Espera a que los routers estén cargados antes de despachar la solicitud"""
+
+    def __init__(self, app: ASGIApp, routers: LazyRouters):
+        self.app = app
+        self.routers = routers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.routers.loaded and scope["type"] in ("http", "websocket"):
+            await anyio.to_thread.run_sync(self.routers.load)
+        await self.app(scope, receive, send)
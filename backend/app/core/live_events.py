@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Eventos en vivo para los dashboards (Server-Sent Events).
+
+Las escrituras de inventario (movimientos de MovementService y cambios de stock o
+de nivel de alerta de productos) generan deltas en el flush y se publican solo si
+la transacción se confirma. Cada cliente conectado tiene una cola acotada en el
+event loop: si se llena (cliente lento), se vacía y se le envía un evento resync
+para que vuelva a pedir los reportes, así la memoria por conexión no crece. Cada
+cliente recibe solo los deltas de los países y categorías de su alcance.
+
+Las conexiones son del proceso: con varios workers cada uno notifica a sus clientes.
+"""
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+import orjson
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.core.reference_cache import get_reference_data
+from app.core.role_permissions import AccessScope
+from app.models.movement import Movement
+from app.models.product import Product, StockAlertLevel
+
+# Evento que pide al cliente recargar los reportes (se perdieron deltas)
+RESYNC = b"event: resync\ndata: {}\n\n"
+
+@dataclass(frozen=True)
+class LiveEvent:
+    """Delta para los dashboards; país y categoría definen qué clientes lo reciben"""
+    type: str
+    data: Dict[str, Any]
+    country_id: Optional[int] = None
+    category_id: Optional[int] = None
+
+    def visible_to(self, scope: AccessScope) -> bool:
+        return scope.has_country_access(self.country_id) and scope.has_category_access(self.category_id)
+
+    def encode(self) -> bytes:
+        return b"event: " + self.type.encode("utf-8") + b"\ndata: " + orjson.dumps(self.data) + b"\n\n"
+
+class Subscriber:
+    """Conexión SSE: alcance del usuario y cola acotada en el event loop del servidor"""
+
+    def __init__(self, scope: AccessScope, loop: asyncio.AbstractEventLoop, max_size: int):
+        self.scope = scope
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self.dropped = 0
+        # Con un resync en la cola los deltas siguientes sobran (el cliente recarga todo)
+        self.resync_pending = False
+
+    def offer(self, items: List[bytes]) -> None:
+        """Encolar (se ejecuta en el event loop); con la cola llena se descarta y se pide resync"""
+        if self.resync_pending:
+            self.dropped += len(items)
+            return
+        for index, item in enumerate(items):
+            try:
+                self.queue.put_nowait(item)
+            except asyncio.QueueFull:
+                self.dropped += self.queue.qsize() + len(items) - index
+                while not self.queue.empty():
+                    self.queue.get_nowait()
+                self.queue.put_nowait(RESYNC)
+                self.resync_pending = True
+                return
+
+class LiveEventBroker:
+    """Clientes conectados en este proceso"""
+
+    def __init__(self):
+        self._subscribers: Set[Subscriber] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, scope: AccessScope) -> Optional[Subscriber]:
+        """Registrar un cliente (llamar desde el event loop); None si se alcanzó el máximo"""
+        with self._lock:
+            if len(self._subscribers) >= settings.LIVE_EVENTS_MAX_CLIENTS:
+                return None
+            subscriber = Subscriber(scope, asyncio.get_running_loop(), settings.LIVE_EVENTS_QUEUE_SIZE)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, events: List[LiveEvent]) -> None:
+        """Entregar los eventos a los clientes cuyo alcance los incluye (seguro desde cualquier hilo)"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+        encoded = [(live_event, live_event.encode()) for live_event in events]
+        for subscriber in subscribers:
+            items = [payload for live_event, payload in encoded if live_event.visible_to(subscriber.scope)]
+            if not items:
+                continue
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, items)
+            except RuntimeError:
+                # Event loop cerrado (el proceso se está deteniendo)
+                self.unsubscribe(subscriber)
+
+broker = LiveEventBroker()
+
+async def event_stream(subscriber: Subscriber) -> AsyncIterator[bytes]:
+    """
+    Cuerpo de la respuesta SSE: deltas agrupados, un comentario de keep-alive cuando
+    no hay actividad y cierre al llegar a LIVE_EVENTS_MAX_SECONDS (el cliente se
+    reconecta y se vuelve a validar su token; tampoco retiene el apagado del servidor).
+    """
+    deadline = time.monotonic() + settings.LIVE_EVENTS_MAX_SECONDS
+    try:
+        yield b"retry: 5000\nevent: ready\ndata: {}\n\n"
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                item = await asyncio.wait_for(
+                    subscriber.queue.get(),
+                    timeout=min(settings.LIVE_EVENTS_HEARTBEAT_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            # Lo que ya esté en la cola sale en el mismo envío
+            chunks = [item]
+            while not subscriber.queue.empty():
+                chunks.append(subscriber.queue.get_nowait())
+            if chunks[-1] is RESYNC:
+                subscriber.resync_pending = False
+            yield b"".join(chunks)
+    finally:
+        broker.unsubscribe(subscriber)
+
+# --- Deltas de las escrituras de inventario ---
+
+def _product_payload(session: Session, product: Product) -> Dict[str, Any]:
+    reference = get_reference_data(session)
+    return {
+        "product_id": product.id,
+        "product_codigo": product.codigo,
+        "product_nombre": product.nombre,
+        "current_stock": product.cantidad,
+        "alert_level": product.alert_level,
+        "country_id": product.country_id,
+        "categoria_id": product.categoria_id,
+        "country_name": reference.country_name(product.country_id, "Sin país"),
+        "category_name": reference.category_name(product.categoria_id, "Sin categoría"),
+    }
+
+def _product_events(session: Session, product: Product, is_new: bool) -> List[LiveEvent]:
+    """Evento stock si cambió la cantidad o el nivel; alert si el producto entra o sube de nivel"""
+    state = inspect(product)
+    cantidad = state.attrs.cantidad.history
+    level = state.attrs.alert_level.history
+    if not is_new and not cantidad.has_changes() and not level.has_changes():
+        return []
+
+    previous_cantidad = cantidad.deleted[0] if cantidad.deleted else (0 if is_new else product.cantidad)
+    if is_new:
+        previous_level = None
+    else:
+        previous_level = level.deleted[0] if level.deleted else product.alert_level
+
+    payload = _product_payload(session, product)
+    payload["previous_stock"] = previous_cantidad
+    payload["previous_alert_level"] = previous_level
+    events = [LiveEvent("stock", payload, product.country_id, product.categoria_id)]
+    if product.alert_level is not None and product.alert_level != previous_level and previous_level != StockAlertLevel.CRITICAL:
+        events.append(LiveEvent("alert", payload, product.country_id, product.categoria_id))
+    return events
+
+def _movement_event(session: Session, movement: Movement) -> Optional[LiveEvent]:
+    product = session.get(Product, movement.product_id)
+    if product is None:
+        return None
+    tipo = movement.tipo.value if hasattr(movement.tipo, "value") else movement.tipo
+    return LiveEvent(
+        "movement",
+        {
+            "id": movement.id,
+            "tipo": tipo,
+            "cantidad": movement.cantidad,
+            "cantidad_anterior": movement.cantidad_anterior,
+            "cantidad_nueva": movement.cantidad_nueva,
+            "fecha_movimiento": movement.fecha_movimiento,
+            "product_id": product.id,
+            "product_codigo": product.codigo,
+            "product_nombre": product.nombre,
+            "country_id": product.country_id,
+            "categoria_id": product.categoria_id,
+        },
+        product.country_id,
+        product.categoria_id
+    )
+
+@event.listens_for(Session, "after_flush")
+def _collect_live_events(session, flush_context):
+    # Sin clientes conectados no se arma ningún delta
+    if not settings.LIVE_EVENTS_ENABLED or not broker.has_subscribers:
+        return
+    # En after_flush los ids ya están asignados y new/dirty e historial conservan el estado previo
+    events: List[LiveEvent] = []
+    for obj in session.new:
+        if isinstance(obj, Product):
+            events.extend(_product_events(session, obj, is_new=True))
+    for obj in session.dirty:
+        if isinstance(obj, Product):
+            events.extend(_product_events(session, obj, is_new=False))
+    for obj in session.new:
+        if isinstance(obj, Movement):
+            movement_event = _movement_event(session, obj)
+            if movement_event is not None:
+                events.append(movement_event)
+    if events:
+        session.info.setdefault("live_events", []).extend(events)
+
+@event.listens_for(Session, "after_commit")
+def _publish_on_commit(session):
+    events = session.info.pop("live_events", None)
+    if events:
+        broker.publish(events)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("live_events", None)
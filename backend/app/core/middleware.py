@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Middlewares ASGI puros (sin BaseHTTPMiddleware): trabajan sobre los mensajes
+http.response.*, por lo que los cuerpos en streaming (exportaciones, descargas,
+SSE) pasan sin buffer.
+"""
+import traceback
+import zlib
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli  # Opcional: paquete Brotli
+except ImportError:
+    brotli = None
+
+# Contenido ya comprimido o que no debe retenerse en un compresor (SSE)
+_UNCOMPRESSIBLE_TYPES = (
+    "text/event-stream",
+    "application/vnd.openxmlformats",
+    "application/zip",
+    "application/gzip",
+    "application/pdf",
+    "image/",
+    "audio/",
+    "video/",
+)
+
+# Cuerpos completos desde este tamaño se comprimen en un hilo (no bloquean el event loop)
+_THREAD_COMPRESS_MIN_SIZE = 256 * 1024
+
+class ResponseHeadersMiddleware:
+    """
+    - Agrega charset UTF-8 a las respuestas JSON (no toca CSV/XLSX/NDJSON).
+    - Convierte errores no controlados en un 500 JSON; al registrarse dentro de
+      CORSMiddleware, la respuesta de error también lleva headers CORS.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                headers = MutableHeaders(scope=message)
+                content_type = headers.get("content-type", "")
+                if content_type.startswith("application/json") and "charset" not in content_type:
+                    headers["content-type"] = "application/json; charset=utf-8"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        except Exception as e:
+            # Si la respuesta ya empezó no se puede reemplazar
+            if response_started:
+                raise
+            print(f"[MIDDLEWARE] Error no controlado en {scope.get('method')} {scope.get('path')}: {str(e)}")
+            traceback.print_exc()
+            response = JSONResponse(status_code=500, content={"detail": "Internal server error"})
+            await response(scope, receive, send_with_headers)
+
+class _StreamCompressor:
+    """Compresor incremental gzip o brotli"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """Vaciar lo pendiente sin cerrar el stream (el cliente puede descomprimir lo recibido)"""
+        if self.encoding == "br":
+            return self._compressor.flush()
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def compress_all(self, data: bytes) -> bytes:
+        return self.compress(data) + self.finish()
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+class CompressionMiddleware:
+    """
+    Compresión gzip/brotli de respuestas.
+    - Respuestas completas: solo si superan minimum_size.
+    - Respuestas en streaming: se comprimen por chunks (sin Content-Length) y cada
+      chunk se vacía del compresor al enviarse (el cliente lo recibe sin esperar al resto).
+    - Vary: Accept-Encoding en toda respuesta comprimible, aunque salga sin comprimir.
+    - No comprime SSE, archivos ya comprimidos (XLSX, ZIP, imágenes) ni respuestas
+      que ya traen Content-Encoding.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        brotli_enabled: bool = True
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.brotli_enabled = brotli_enabled and brotli is not None
+
+    def _select_encoding(self, scope: Scope) -> Optional[str]:
+        accepted = set()
+        for item in Headers(scope=scope).get("accept-encoding", "").split(","):
+            token, _, params = item.strip().partition(";")
+            if params.replace(" ", "") not in ("q=0", "q=0.0"):
+                accepted.add(token.strip().lower())
+        if self.brotli_enabled and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._select_encoding(scope)
+
+        start_message: Optional[Message] = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                compressible = not (
+                    "content-encoding" in headers
+                    or content_type.startswith(_UNCOMPRESSIBLE_TYPES)
+                )
+                if compressible:
+                    # La representación depende de Accept-Encoding aunque esta vaya sin comprimir
+                    MutableHeaders(scope=message).add_vary_header("Accept-Encoding")
+                passthrough = encoding is None or not compressible
+                if passthrough:
+                    await send(message)
+                else:
+                    # Se retiene hasta ver el primer chunk del cuerpo
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+                headers = MutableHeaders(scope=start_message)
+                headers["Content-Encoding"] = encoding
+                # La representación comprimida no es idéntica byte a byte: el ETag pasa a débil
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                if more_body:
+                    del headers["Content-Length"]
+                    await send(start_message)
+                else:
+                    if len(body) >= _THREAD_COMPRESS_MIN_SIZE:
+                        compressed = await anyio.to_thread.run_sync(compressor.compress_all, body)
+                    else:
+                        compressed = compressor.compress_all(body)
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+            chunk = compressor.compress(body)
+            if not more_body:
+                chunk += compressor.finish()
+                await send({"type": "http.response.body", "body": chunk})
+            else:
+                chunk += compressor.flush()
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+        await self.app(scope, receive, send_compressed)
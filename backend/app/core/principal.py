@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Usuario autenticado reconstruido desde los claims del token (AUTH_TRUST_TOKEN_CLAIMS).
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """
+    Usuario de solo lectura para las lecturas (GET/HEAD) sin consultar la BD.
+    Expone lo mismo que User para RolePermissions, AccessScope y los endpoints:
+    id, email, nombre de rol, país principal, categoría y países asignados.
+    """
+    id: int
+    email: str
+    role_name: Optional[str]
+    country_id: Optional[int]
+    category_id: Optional[int]
+    country_ids: Tuple[int, ...]
+    token_version: int
+    is_active: bool = True
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role_name in ("admin", "administrador")
+
+    @property
+    def is_user(self) -> bool:
+        return self.role_name == "user"
+
+    @property
+    def is_commercial(self) -> bool:
+        return self.role_name == "comercial"
+
+    def has_country_access(self, country_id: Optional[int]) -> bool:
+        from app.core.role_permissions import RolePermissions
+        return RolePermissions.get_access_scope(self).has_country_access(country_id)
+
+    @classmethod
+    def from_claims(cls, payload: dict, token_version: int) -> "TokenPrincipal":
+        return cls(
+            id=payload["user_id"],
+            email=payload["sub"],
+            role_name=payload.get("role"),
+            country_id=payload.get("country_id"),
+            category_id=payload.get("category_id"),
+            country_ids=tuple(payload.get("country_ids") or ()),
+            token_version=token_version
+        )
@@ -7,11 +7,22 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from fastapi import Request, HTTPException, status
 import time
-from typing import Dict
 
-# Simple in-memory storage for rate limiting
-# In production, use Redis or similar
-_failed_attempts: Dict[str, Dict[str, any]] = {}
+from app.config.settings import settings
+from app.core.rate_limit_storage import BoundedExpiringCounter, DatabaseStorage
+
+# Failed login policy: block after 5 failures, window extended on every failure
+FAILED_LOGIN_MAX_ATTEMPTS = 5
+FAILED_LOGIN_WINDOW_SECONDS = 900  # 15 minutes
+
+# "memory": per-process counters; "database": counters shared by all workers
+_use_database = settings.RATE_LIMIT_STORAGE == "database"
+
+# Failed login attempts per IP (expiring and size-bounded in memory)
+_failed_attempts = (
+    DatabaseStorage() if _use_database
+    else BoundedExpiringCounter(settings.RATE_LIMIT_MAX_TRACKED_IPS)
+)
 
 def get_remote_address_with_forwarded(request: Request) -> str:
     """
@@ -33,49 +44,45 @@ def get_remote_address_with_forwarded(request: Request) -> str:
 # Initialize limiter
 limiter = Limiter(
     key_func=get_remote_address_with_forwarded,
-    default_limits=["100/minute"]  # Default rate limit for all endpoints
+    default_limits=["100/minute"],  # Default rate limit for all endpoints
+    strategy=settings.RATE_LIMIT_STRATEGY,
+    storage_uri="appdb://" if _use_database else "memory://",
+    # If the database storage is unavailable, fall back to per-process limits
+    in_memory_fallback_enabled=_use_database
 )
 
+def _failed_login_key(client_ip: str) -> str:
+    return f"login-failed/{client_ip}"
+
 def check_failed_login_attempts(client_ip: str) -> None:
     """
     Check if client has too many failed login attempts
     """
-    current_time = time.time()
+    entry = _failed_attempts.lookup(_failed_login_key(client_ip))
+    if entry is None:
+        return
     
-    # Clean old entries (older than 15 minutes)
-    if client_ip in _failed_attempts:
-        attempts = _failed_attempts[client_ip]
-        if current_time - attempts.get("last_attempt", 0) > 900:  # 15 minutes
-            del _failed_attempts[client_ip]
-            return
-        
-        # Check if blocked
-        if attempts.get("count", 0) >= 5:
-            time_remaining = 900 - (current_time - attempts["last_attempt"])
-            if time_remaining > 0:
-                raise HTTPException(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail=f"Demasiados intentos de login fallidos. Intenta de nuevo en {int(time_remaining/60)} minutos."
-                )
+    # Check if blocked (entries expire 15 minutes after the last failure)
+    count, expires_at = entry
+    if count >= FAILED_LOGIN_MAX_ATTEMPTS:
+        time_remaining = expires_at - time.time()
+        if time_remaining > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Demasiados intentos de login fallidos. Intenta de nuevo en {int(time_remaining/60)} minutos."
+            )
 
 def record_failed_login_attempt(client_ip: str) -> None:
     """
     Record a failed login attempt
     """
-    current_time = time.time()
-    
-    if client_ip not in _failed_attempts:
-        _failed_attempts[client_ip] = {"count": 1, "last_attempt": current_time}
-    else:
-        _failed_attempts[client_ip]["count"] += 1
-        _failed_attempts[client_ip]["last_attempt"] = current_time
+    _failed_attempts.record(_failed_login_key(client_ip), FAILED_LOGIN_WINDOW_SECONDS)
 
 def clear_failed_login_attempts(client_ip: str) -> None:
     """
     Clear failed login attempts for successful login
     """
-    if client_ip in _failed_attempts:
-        del _failed_attempts[client_ip]
+    _failed_attempts.clear(_failed_login_key(client_ip))
 
 # Rate limit exceeded handler
 async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
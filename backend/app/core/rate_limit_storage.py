@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Almacenamiento de contadores para rate limiting e intentos de login fallidos.
+
+- BoundedExpiringCounter: contadores en memoria con expiración y tamaño máximo
+  (un solo proceso).
+- DatabaseStorage: contadores en una tabla UNLOGGED de PostgreSQL (tabla normal en
+  otros motores), compartidos entre workers. Se registra en `limits` con el esquema
+  "appdb://" para usarse como storage de slowapi.
+"""
+import threading
+import time
+from collections import OrderedDict
+from math import floor
+from typing import Optional, Tuple
+
+from limits.storage import Storage, SlidingWindowCounterSupport
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+TABLE_NAME = "rate_limit_counters"
+
+# Cada cuántos segundos un proceso elimina los contadores expirados de la tabla
+_SWEEP_INTERVAL_SECONDS = 60
+
+class BoundedExpiringCounter:
+    """
+    Contadores por clave con expiración deslizante (cada registro la extiende) y
+    tamaño acotado. Las claves se mantienen ordenadas por último registro: las
+    expiradas y, si se supera el máximo, las más antiguas se descartan desde el inicio.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()  # clave -> (conteo, expira)
+        self._lock = threading.Lock()
+
+    def _sweep(self, now: float) -> None:
+        while self._entries:
+            key, (_, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+    def record(self, key: str, ttl: int) -> int:
+        """Incrementar el contador de la clave y extender su expiración a ahora + ttl"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            count = entry[0] + 1 if entry and entry[1] > now else 1
+            self._entries[key] = (count, now + ttl)
+            self._sweep(now)
+            return count
+
+    def lookup(self, key: str) -> Optional[Tuple[int, float]]:
+        """(conteo, expira) de la clave, o None si no existe o expiró"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                return None
+            return entry
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class DatabaseStorage(Storage, SlidingWindowCounterSupport):
+    """
+    Storage de `limits` sobre la base de datos de la aplicación (estrategias
+    fixed-window y sliding-window-counter). Cada operación es un upsert atómico,
+    válido con varios workers.
+    """
+
+    STORAGE_SCHEME = ["appdb"]
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions, **options)
+        self._table_ready = False
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def base_exceptions(self):
+        return SQLAlchemyError
+
+    @staticmethod
+    def _engine():
+        from app.config.database import engine
+        return engine
+
+    def _ensure_table(self) -> None:
+        if self._table_ready:
+            return
+        with self._lock:
+            if self._table_ready:
+                return
+            engine = self._engine()
+            # UNLOGGED: sin WAL (contadores efímeros; se pierden en un crash, lo cual es aceptable)
+            unlogged = "UNLOGGED " if engine.dialect.name == "postgresql" else ""
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f"CREATE {unlogged}TABLE IF NOT EXISTS {TABLE_NAME} ("
+                    "rate_key VARCHAR(255) PRIMARY KEY, "
+                    "count INTEGER NOT NULL, "
+                    "expires_at FLOAT NOT NULL)"
+                ))
+            self._table_ready = True
+
+    def _connect(self):
+        self._ensure_table()
+        return self._engine().begin()
+
+    def _sweep(self, conn, now: float) -> None:
+        if now - self._last_sweep < _SWEEP_INTERVAL_SECONDS:
+            return
+        self._last_sweep = now
+        conn.execute(text(f"DELETE FROM {TABLE_NAME} WHERE expires_at <= :now"), {"now": now})
+
+    def _upsert(self, key: str, expiry: int, amount: int, extend: bool) -> int:
+        """Sumar amount a la clave; una clave expirada reinicia su conteo y expiración"""
+        now = time.time()
+        # extend=True: cada registro mueve la expiración a ahora + expiry
+        keep_expiry = ":expires_at" if extend else f"{TABLE_NAME}.expires_at"
+        with self._connect() as conn:
+            count = conn.execute(text(
+                f"INSERT INTO {TABLE_NAME} (rate_key, count, expires_at) "
+                "VALUES (:key, :amount, :expires_at) "
+                "ON CONFLICT (rate_key) DO UPDATE SET "
+                f"count = CASE WHEN {TABLE_NAME}.expires_at <= :now THEN :amount "
+                f"ELSE {TABLE_NAME}.count + :amount END, "
+                f"expires_at = CASE WHEN {TABLE_NAME}.expires_at <= :now THEN :expires_at "
+                f"ELSE {keep_expiry} END "
+                "RETURNING count"
+            ), {"key": key, "amount": amount, "expires_at": now + expiry, "now": now}).scalar()
+            self._sweep(conn, now)
+        return count
+
+    def _read(self, conn, key: str, now: float) -> Tuple[int, float]:
+        row = conn.execute(text(
+            f"SELECT count, expires_at FROM {TABLE_NAME} WHERE rate_key = :key AND expires_at > :now"
+        ), {"key": key, "now": now}).first()
+        return (row.count, row.expires_at) if row else (0, now)
+
+    # --- Interfaz de limits.storage.Storage ---
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        return self._upsert(key, expiry, amount, extend=False)
+
+    def get(self, key: str) -> int:
+        with self._connect() as conn:
+            return self._read(conn, key, time.time())[0]
+
+    def get_expiry(self, key: str) -> float:
+        with self._connect() as conn:
+            return self._read(conn, key, time.time())[1]
+
+    def check(self) -> bool:
+        try:
+            with self._connect() as conn:
+                conn.execute(text("SELECT 1"))
+            return True
+        except SQLAlchemyError:
+            return False
+
+    def reset(self) -> Optional[int]:
+        with self._connect() as conn:
+            return conn.execute(text(f"DELETE FROM {TABLE_NAME}")).rowcount
+
+    def clear(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute(text(f"DELETE FROM {TABLE_NAME} WHERE rate_key = :key"), {"key": key})
+
+    # --- Ventana deslizante (contador actual + anterior ponderado, O(1) por clave) ---
+
+    @staticmethod
+    def _window_keys(key: str, expiry: int, now: float) -> Tuple[str, str]:
+        window = int(now / expiry)
+        return f"{key}/{window - 1}", f"{key}/{window}"
+
+    def _window_info(self, conn, key: str, expiry: int, now: float) -> Tuple[int, float, int, float]:
+        previous_key, current_key = self._window_keys(key, expiry, now)
+        previous_count = self._read(conn, previous_key, now)[0]
+        current_count = self._read(conn, current_key, now)[0]
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        with self._connect() as conn:
+            return self._window_info(conn, key, expiry, time.time())
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._connect() as conn:
+            previous_count, previous_ttl, current_count, _ = self._window_info(conn, key, expiry, now)
+        if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+            return False
+
+        # Registrar y volver a validar: si otro worker ganó la carrera se revierte el registro
+        _, current_key = self._window_keys(key, expiry, now)
+        current_count = self.incr(current_key, 2 * expiry, amount)
+        if floor(previous_count * previous_ttl / expiry + current_count) > limit:
+            self.incr(current_key, 2 * expiry, -amount)
+            return False
+        return True
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self._window_keys(key, expiry, time.time())
+        with self._connect() as conn:
+            conn.execute(
+                text(f"DELETE FROM {TABLE_NAME} WHERE rate_key IN (:previous, :current)"),
+                {"previous": previous_key, "current": current_key}
+            )
+
+    # --- Intentos fallidos (misma interfaz que BoundedExpiringCounter) ---
+
+    def record(self, key: str, ttl: int) -> int:
+        return self._upsert(key, ttl, 1, extend=True)
+
+    def lookup(self, key: str) -> Optional[Tuple[int, float]]:
+        with self._connect() as conn:
+            count, expires_at = self._read(conn, key, time.time())
+        return (count, expires_at) if count else None
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Caché en memoria de datos de referencia: países, categorías y roles.
+
+Se carga completa en una sola lectura y se guarda como copias inmutables (no objetos
+ORM, que quedarían ligados a la sesión que los cargó). Cada carga tiene un número de
+versión. Cualquier commit que cree, modifique o elimine un país, categoría o rol la
+invalida; en otros procesos el cambio se ve al vencer REFERENCE_CACHE_TTL_SECONDS.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.models.category import Category
+from app.models.country import Country
+from app.models.role import Role
+
+@dataclass(frozen=True)
+class CountryRef:
+    id: int
+    name: str
+    code: str
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+@dataclass(frozen=True)
+class CategoryRef:
+    id: int
+    name: str
+    description: Optional[str]
+    is_active: bool
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+@dataclass(frozen=True)
+class RoleRef:
+    id: int
+    name: str
+    description: Optional[str]
+    permissions: tuple
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """Una versión de los datos de referencia (mapas id -> obj y código/nombre -> obj)"""
+    version: int
+    loaded_at: float
+    countries: Dict[int, CountryRef] = field(default_factory=dict)
+    countries_by_code: Dict[str, CountryRef] = field(default_factory=dict)
+    categories: Dict[int, CategoryRef] = field(default_factory=dict)
+    roles: Dict[int, RoleRef] = field(default_factory=dict)
+    roles_by_name: Dict[str, RoleRef] = field(default_factory=dict)
+
+    def country_list(self, active_only: bool = False) -> List[CountryRef]:
+        return [c for c in self.countries.values() if c.is_active or not active_only]
+
+    def category_list(self, active_only: bool = False) -> List[CategoryRef]:
+        return [c for c in self.categories.values() if c.is_active or not active_only]
+
+    def country_by_code(self, code: str) -> Optional[CountryRef]:
+        return self.countries_by_code.get((code or "").upper())
+
+    def country_name(self, country_id: Optional[int], default: Optional[str] = None) -> Optional[str]:
+        country = self.countries.get(country_id)
+        return country.name if country else default
+
+    def category_name(self, category_id: Optional[int], default: Optional[str] = None) -> Optional[str]:
+        category = self.categories.get(category_id)
+        return category.name if category else default
+
+_data: Optional[ReferenceData] = None
+_version = 0
+_lock = threading.Lock()
+
+def _load(db: Session, version: int) -> ReferenceData:
+    countries = {
+        c.id: CountryRef(c.id, c.name, c.code, bool(c.is_active), c.created_at, c.updated_at)
+        for c in db.query(Country).order_by(Country.id)
+    }
+    categories = {
+        c.id: CategoryRef(c.id, c.name, c.description, bool(c.is_active), c.created_at, c.updated_at)
+        for c in db.query(Category).order_by(Category.id)
+    }
+    roles = {
+        r.id: RoleRef(r.id, r.name, r.description, tuple(r.permissions or ()))
+        for r in db.query(Role).order_by(Role.id)
+    }
+    return ReferenceData(
+        version=version,
+        loaded_at=time.monotonic(),
+        countries=countries,
+        countries_by_code={c.code.upper(): c for c in countries.values()},
+        categories=categories,
+        roles=roles,
+        roles_by_name={r.name: r for r in roles.values()},
+    )
+
+def get_reference_data(db: Session) -> ReferenceData:
+    """Datos de referencia vigentes (se cargan con db si no hay versión o venció el TTL)"""
+    data = _data
+    if data is not None and data.version == _version and \
+            time.monotonic() - data.loaded_at <= settings.REFERENCE_CACHE_TTL_SECONDS:
+        return data
+
+    with _lock:
+        version = _version
+    loaded = _load(db, version)
+    _store(loaded)
+    print(f"[REFERENCE_CACHE] Datos de referencia cargados (versión {version}): "
+          f"{len(loaded.countries)} países, {len(loaded.categories)} categorías, {len(loaded.roles)} roles")
+    return loaded
+
+def _store(loaded: ReferenceData) -> None:
+    global _data
+    with _lock:
+        # Si hubo una invalidación durante la carga, se descarta (la próxima lectura recarga)
+        if loaded.version == _version:
+            _data = loaded
+
+def invalidate() -> None:
+    """Descartar la versión actual"""
+    global _data, _version
+    with _lock:
+        _version += 1
+        _data = None
+
+# --- Invalidación por cambios confirmados en la sesión ---
+
+_REFERENCE_MODELS = (Country, Category, Role)
+
+@event.listens_for(Session, "before_flush")
+def _track_reference_changes(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _REFERENCE_MODELS):
+            session.info["reference_data_changed"] = True
+            return
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("reference_data_changed", False):
+        invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop("reference_data_changed", None)
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Respuestas JSON serializadas con orjson.
+
+- ORJSONResponse: clase de respuesta por defecto de la aplicación.
+- trusted_response: devuelve datos que ya tienen la forma del response_model sin que
+  FastAPI vuelva a validarlos ni pase por jsonable_encoder.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+def _default(obj: Any) -> Any:
+    """Tipos que orjson no serializa de forma nativa (fechas, enums y UUID sí los maneja)"""
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse con orjson (acepta modelos Pydantic y Decimal)"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+def trusted_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> ORJSONResponse:
+    """
+    Respuesta sin la validación de response_model: solo para datos ya tipados
+    (p. ej. modelos creados con construct() a partir de una proyección de columnas).
+    El response_model del endpoint se mantiene para la documentación.
+    """
+    return ORJSONResponse(content=content, status_code=status_code, headers=headers)
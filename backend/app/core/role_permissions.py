@@ -2,10 +2,50 @@
 """
 Sistema de permisos y control de acceso por roles
 """
+from dataclasses import dataclass, field
 from functools import wraps
 from fastapi import HTTPException, status
 from app.models.user import User
-from typing import List, Optional
+from app.core.principal import TokenPrincipal
+from typing import FrozenSet, List, Optional, Tuple
+
+@dataclass(frozen=True)
+class AccessScope:
+    """
+    Alcance de datos de un usuario, calculado una vez por solicitud.
+    None en países/categorías significa sin restricción.
+    """
+    user_id: int
+    is_admin: bool
+    countries: Optional[FrozenSet[int]]
+    categories: Optional[FrozenSet[int]]
+    # Listas ordenadas para pasar a los servicios (IN ...)
+    country_ids: Optional[Tuple[int, ...]] = field(init=False)
+    category_ids: Optional[Tuple[int, ...]] = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "country_ids", tuple(sorted(self.countries)) if self.countries is not None else None)
+        object.__setattr__(self, "category_ids", tuple(sorted(self.categories)) if self.categories is not None else None)
+
+    @property
+    def has_no_countries(self) -> bool:
+        """Usuario restringido por país sin países asignados"""
+        return self.countries is not None and not self.countries
+
+    def has_country_access(self, country_id: Optional[int]) -> bool:
+        return self.countries is None or country_id in self.countries
+
+    def has_category_access(self, category_id: Optional[int]) -> bool:
+        return self.categories is None or category_id in self.categories
+
+    def require_countries(self) -> Optional[Tuple[int, ...]]:
+        """Países del alcance (None = todos); error 400 si el usuario no tiene países asignados"""
+        if self.has_no_countries:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Usuario no tiene paises asignados"
+            )
+        return self.country_ids
 
 class RolePermissions:
     """
@@ -56,10 +96,10 @@ class RolePermissions:
         """
         Verificar si un usuario tiene acceso a un módulo específico
         """
-        if not user or not user.role:
+        if not user or not user.role_name:
             return False
             
-        role_name = user.role.name
+        role_name = user.role_name
         if role_name not in cls.ROLE_PERMISSIONS:
             return False
             
@@ -70,10 +110,10 @@ class RolePermissions:
         """
         Verificar si el usuario debe tener filtro por país
         """
-        if not user or not user.role:
+        if not user or not user.role_name:
             return True
             
-        role_name = user.role.name
+        role_name = user.role_name
         if role_name not in cls.ROLE_PERMISSIONS:
             return True
             
@@ -84,10 +124,10 @@ class RolePermissions:
         """
         Verificar si el usuario debe tener filtro por categoría
         """
-        if not user or not user.role:
+        if not user or not user.role_name:
             return False
             
-        role_name = user.role.name
+        role_name = user.role_name
         if role_name not in cls.ROLE_PERMISSIONS:
             return False
             
@@ -98,10 +138,10 @@ class RolePermissions:
         """
         Obtener lista de módulos accesibles para un usuario
         """
-        if not user or not user.role:
+        if not user or not user.role_name:
             return []
             
-        role_name = user.role.name
+        role_name = user.role_name
         if role_name not in cls.ROLE_PERMISSIONS:
             return []
             
@@ -117,28 +157,18 @@ class RolePermissions:
         - List[int]: Lista de IDs de países permitidos
         - []: Lista vacía si no tiene acceso a ningún país
         """
-        if not user or not user.role:
+        if not user or not user.role_name:
             return []
-            
-        # Admin puede ver todos los países
-        if user.is_admin:
-            return None
-            
-        # Si el usuario no requiere filtro por país, puede ver todos
-        if not cls.requires_country_filter(user):
+        
+        scope = cls.get_access_scope(user)
+        if scope.countries is None:
             return None
-            
-        # Filtrar por países asignados al usuario
-        user_country_ids = user.country_ids
         
-        if not user_country_ids:
-            return []  # No tiene países asignados
-            
         # Si se proporciona una lista específica, filtrar
         if country_ids is not None:
-            return [cid for cid in country_ids if cid in user_country_ids]
+            return [cid for cid in country_ids if cid in scope.countries]
             
-        return user_country_ids
+        return list(scope.country_ids)
     
     @classmethod
     def filter_categories(cls, user: User, category_ids: List[int] = None) -> Optional[List[int]]:
@@ -149,23 +179,72 @@ class RolePermissions:
         - None: Si el usuario puede ver todas las categorías
         - List[int]: Lista de IDs de categorías permitidos
         """
-        if not user or not user.role:
+        if not user or not user.role_name:
             return []
-            
-        # Si el usuario no requiere filtro por categoría, puede ver todas
-        if not cls.requires_category_filter(user):
+        
+        scope = cls.get_access_scope(user)
+        if scope.categories is None:
             return None
+        
+        if category_ids is not None:
+            return [cid for cid in category_ids if cid in scope.categories]
             
-        # Para usuarios comerciales, filtrar por categoría asignada
-        if user.is_commercial and user.category_id:
-            user_category_ids = [user.category_id]
-            
-            if category_ids is not None:
-                return [cid for cid in category_ids if cid in user_category_ids]
-                
-            return user_category_ids
-            
-        return None
+        return list(scope.category_ids)
+    
+    @classmethod
+    def get_access_scope(cls, user: User) -> AccessScope:
+        """
+        Alcance de datos del usuario (países y categorías permitidos).
+        Se calcula una vez y queda guardado en el objeto del usuario (User o TokenPrincipal).
+        """
+        scope = getattr(user, "_access_scope", None)
+        if scope is not None:
+            return scope
+
+        if user.is_admin or not cls.requires_country_filter(user):
+            countries = None
+        else:
+            # Países asignados, o el país principal en usuarios anteriores a la asignación múltiple
+            countries = frozenset(user.country_ids or ([user.country_id] if user.country_id else []))
+
+        categories = None
+        if cls.requires_category_filter(user) and user.is_commercial and user.category_id:
+            categories = frozenset([user.category_id])
+
+        scope = AccessScope(
+            user_id=user.id,
+            is_admin=user.is_admin,
+            countries=countries,
+            categories=categories
+        )
+        # object.__setattr__: TokenPrincipal es una dataclass congelada
+        object.__setattr__(user, "_access_scope", scope)
+        return scope
+
+    @classmethod
+    def get_report_scope(cls, user: User) -> AccessScope:
+        """
+        Alcance de datos para los reportes comerciales.
+        Igual al general, salvo que un administrador con países asignados solo ve
+        esos países en los reportes (sin países asignados ve todos).
+        """
+        scope = cls.get_access_scope(user)
+        if not scope.is_admin:
+            return scope
+
+        report_scope = getattr(user, "_report_scope", None)
+        if report_scope is not None:
+            return report_scope
+
+        assigned = user.country_ids or ([user.country_id] if user.country_id else [])
+        report_scope = AccessScope(
+            user_id=scope.user_id,
+            is_admin=True,
+            countries=frozenset(assigned) if assigned else None,
+            categories=scope.categories
+        )
+        object.__setattr__(user, "_report_scope", report_scope)
+        return report_scope
 
 def require_module_access(module: str):
     """
@@ -177,7 +256,7 @@ def require_module_access(module: str):
             # Buscar el usuario en los argumentos
             current_user = None
             for key, value in kwargs.items():
-                if key == 'current_user' and isinstance(value, User):
+                if key == 'current_user' and isinstance(value, (User, TokenPrincipal)):
                     current_user = value
                     break
             
@@ -207,7 +286,7 @@ def require_role(required_roles: List[str]):
             # Buscar el usuario en los argumentos
             current_user = None
             for key, value in kwargs.items():
-                if key == 'current_user' and isinstance(value, User):
+                if key == 'current_user' and isinstance(value, (User, TokenPrincipal)):
                     current_user = value
                     break
             
@@ -217,7 +296,7 @@ def require_role(required_roles: List[str]):
                     detail="Usuario no autenticado"
                 )
             
-            if not current_user.role or current_user.role.name not in required_roles:
+            if not current_user.role_name or current_user.role_name not in required_roles:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail=f"Requiere uno de estos roles: {', '.join(required_roles)}"
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Tareas diarias en segundo plano dentro del proceso de la API.
+
+Cada tarea corre en el threadpool (son funciones sincronas con su propia
+sesion de BD). Con varios workers cada proceso ejecuta la tarea, por eso
+las tareas deben ser idempotentes.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.date_helpers import get_local_now
+
+_tasks: List[asyncio.Task] = []
+
+
+def _next_run(hour: int, minute: int) -> datetime:
+    """Proxima hora:minuto en la zona horaria local"""
+    now = get_local_now()
+    target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return target
+
+
+async def _sleep_until(target: datetime) -> None:
+    # asyncio.sleep usa el reloj monotonico: si despierta antes de la hora local
+    # (p. ej. 23:59:59.9 para una tarea de medianoche) se vuelve a dormir
+    while True:
+        remaining = (target - get_local_now()).total_seconds()
+        if remaining <= 0:
+            return
+        await asyncio.sleep(remaining)
+
+
+async def _run_job(name: str, job: Callable[[], None]) -> None:
+    try:
+        print(f"[SCHEDULER] Ejecutando tarea {name}")
+        await run_in_threadpool(job)
+    except Exception as e:
+        print(f"[SCHEDULER] Error en tarea {name}: {str(e)}")
+
+
+async def _daily_loop(name: str, hour: int, minute: int, job: Callable[[], None], run_on_start: bool) -> None:
+    if run_on_start:
+        await _run_job(name, job)
+    while True:
+        await _sleep_until(_next_run(hour, minute))
+        await _run_job(name, job)
+
+
+def schedule_daily(name: str, hour: int, minute: int, job: Callable[[], None], run_on_start: bool = False) -> None:
+    """Programar una tarea diaria (llamar desde el evento startup)"""
+    _tasks.append(asyncio.create_task(_daily_loop(name, hour, minute, job, run_on_start)))
+    print(f"[SCHEDULER] Tarea {name} programada a las {hour:02d}:{minute:02d}")
+
+
+def cancel_all() -> None:
+    """Cancelar las tareas programadas (evento shutdown)"""
+    for task in _tasks:
+        task.cancel()
+    _tasks.clear()
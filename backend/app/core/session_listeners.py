@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+Registro de los listeners de Session definidos en app.core.
+
+Los listeners de los modelos (alert_level, expiry_bucket, token_version) se
+registran al importar app.models; los de este paquete (versiones de datos para
+ETag, caché de referencia y deltas en vivo) se registran aquí una sola vez, desde
+el arranque de la API o de los scripts, y no dependen de qué servicio se importe.
+"""
+_registered = False
+
+def register_session_listeners() -> None:
+    """Registrar los listeners de Session de app.core (idempotente)"""
+    global _registered
+    if _registered:
+        return
+    # Cada módulo registra sus listeners con @event.listens_for al importarse
+    from app.core import data_versions, live_events, reference_cache  # noqa: F401
+    _registered = True
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Registro opcional de consultas lentas.
+
+Se engancha a los eventos del engine de SQLAlchemy y guarda en un buffer
+circular las sentencias que superan el umbral configurado, junto con sus
+parametros, la funcion de servicio que las origino y el plan de ejecucion.
+"""
+import json
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Modulos cuyo frame se reporta como origen de la consulta (en orden de preferencia)
+_CALLER_PREFIXES = ("app.services.", "app.repositories.", "app.api.")
+_MAX_PARAM_LENGTH = 2000
+
+_local = threading.local()
+
+
+def _find_caller() -> Optional[str]:
+    """Buscar en la pila la funcion de servicio/endpoint que ejecuto la consulta"""
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith(_CALLER_PREFIXES):
+            code = frame.f_code
+            name = getattr(code, "co_qualname", code.co_name)
+            if module.startswith(_CALLER_PREFIXES[0]):
+                return name
+            if fallback is None:
+                fallback = name
+        frame = frame.f_back
+    return fallback
+
+
+def _format_parameters(parameters: Any) -> str:
+    """Serializar parametros de forma segura y acotada"""
+    try:
+        text = json.dumps(parameters, default=str, ensure_ascii=False)
+    except (TypeError, ValueError):
+        text = repr(parameters)
+    if len(text) > _MAX_PARAM_LENGTH:
+        text = text[:_MAX_PARAM_LENGTH] + "..."
+    return text
+
+
+class SlowQueryRecorder:
+    """Buffer circular de consultas lentas con captura de EXPLAIN"""
+
+    def __init__(self, threshold_ms: int, buffer_size: int, explain: bool = True):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self._samples: deque = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._engine: Optional[Engine] = None
+
+    def install(self, engine: Engine) -> None:
+        """Registrar los listeners en el engine"""
+        self._engine = engine
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        print(f"[SLOW_QUERY] Registro activo (umbral {self.threshold_ms} ms, "
+              f"buffer {self._samples.maxlen}, explain={self.explain})")
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # El inicio se guarda en el contexto de ejecucion: si la sentencia falla no queda nada pendiente
+        context._query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is None:
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        # Ignorar consultas rapidas y las propias sentencias EXPLAIN
+        if elapsed_ms < self.threshold_ms or getattr(_local, "explaining", False):
+            return
+
+        sample = {
+            "timestamp": datetime.utcnow().isoformat(),
+            "duration_ms": round(elapsed_ms, 2),
+            "statement": statement,
+            "parameters": _format_parameters(parameters),
+            "executemany": executemany,
+            "caller": _find_caller(),
+            "plan": None,
+        }
+        if self.explain and not executemany:
+            sample["plan"] = self._capture_plan(conn, statement, parameters)
+
+        with self._lock:
+            self._samples.append(sample)
+        print(f"[SLOW_QUERY] {sample['duration_ms']} ms en {sample['caller']}")
+
+    def _capture_plan(self, conn, statement: str, parameters: Any) -> Optional[Any]:
+        """Obtener el plan de ejecucion en una conexion separada"""
+        if self._engine is None or conn.dialect.name != "postgresql":
+            return None
+        # ANALYZE vuelve a ejecutar la sentencia: solo se permite en SELECT simples
+        # (un WITH puede envolver INSERT/UPDATE/DELETE y queda con EXPLAIN sin ANALYZE)
+        is_select = statement.lstrip().upper().startswith("SELECT")
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if is_select else "FORMAT JSON"
+
+        _local.explaining = True
+        try:
+            with self._engine.connect() as explain_conn:
+                result = explain_conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters)
+                row = result.first()
+                return row[0] if row else None
+        except Exception as e:
+            return {"error": str(e)}
+        finally:
+            _local.explaining = False
+
+    def get_samples(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Obtener muestras, las mas recientes primero"""
+        with self._lock:
+            samples = list(self._samples)
+        samples.reverse()
+        return samples[:limit] if limit else samples
+
+    def clear(self) -> int:
+        """Vaciar el buffer y devolver cuantas muestras se eliminaron"""
+        with self._lock:
+            count = len(self._samples)
+            self._samples.clear()
+        return count
+
+
+# Instancia global (None si el registro esta deshabilitado)
+slow_query_recorder: Optional[SlowQueryRecorder] = None
+
+
+def install_slow_query_log(engine: Engine, threshold_ms: int, buffer_size: int, explain: bool) -> SlowQueryRecorder:
+    """Crear e instalar el registro de consultas lentas en el engine"""
+    global slow_query_recorder
+    slow_query_recorder = SlowQueryRecorder(threshold_ms, buffer_size, explain)
+    slow_query_recorder.install(engine)
+    return slow_query_recorder
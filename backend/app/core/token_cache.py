@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Cachés de autenticación en memoria del proceso.
+
+- Tokens verificados: hash SHA-256 del token -> claims, LRU acotado por
+  JWT_CACHE_SIZE. Una entrada vencida (exp) se descarta al consultarla.
+- Estado de token por usuario: (token_version, is_active) con TTL corto.
+  Se invalida al cambiar credenciales, rol o países del usuario; en otros
+  procesos el cambio se ve al vencer el TTL.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.config.settings import settings
+
+_tokens: "OrderedDict[str, dict]" = OrderedDict()
+_token_states: Dict[int, Tuple[int, bool, float]] = {}
+_lock = threading.Lock()
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def get_claims(token: str) -> Optional[dict]:
+    """Claims de un token ya verificado (None si no está en caché o venció)"""
+    if settings.JWT_CACHE_SIZE <= 0:
+        return None
+    key = _token_key(token)
+    with _lock:
+        claims = _tokens.get(key)
+        if claims is None:
+            return None
+        if claims["exp"] <= time.time():
+            del _tokens[key]
+            return None
+        _tokens.move_to_end(key)
+        return claims
+
+
+def put_claims(token: str, claims: dict) -> None:
+    """Guardar los claims de un token verificado"""
+    if settings.JWT_CACHE_SIZE <= 0:
+        return
+    key = _token_key(token)
+    with _lock:
+        _tokens[key] = claims
+        _tokens.move_to_end(key)
+        while len(_tokens) > settings.JWT_CACHE_SIZE:
+            _tokens.popitem(last=False)
+
+
+def get_token_state(user_id: int) -> Optional[Tuple[int, bool]]:
+    """(token_version, is_active) de un usuario si la entrada sigue vigente"""
+    with _lock:
+        state = _token_states.get(user_id)
+    if state is None or time.monotonic() - state[2] > settings.AUTH_TOKEN_STATE_TTL_SECONDS:
+        return None
+    return state[0], state[1]
+
+
+def put_token_state(user_id: int, token_version: int, is_active: bool) -> None:
+    with _lock:
+        _token_states[user_id] = (token_version, is_active, time.monotonic())
+
+
+def invalidate_user(user_id: int) -> None:
+    """Descartar el estado en caché de un usuario (cambio de credenciales, rol o países)"""
+    with _lock:
+        _token_states.pop(user_id, None)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Inicializacion de la base de datos al arrancar.
+
+La sincronizacion completa (create_all, columnas e indices faltantes, seeds y
+recalculo de niveles de alerta de stock y estados de vencimiento) solo se ejecuta cuando cambia la huella
+del esquema: un hash del DDL de los modelos, de los datos de los seeds y de los
+umbrales de stock por defecto. La huella aplicada se guarda en la tabla
+schema_state; si coincide, el arranque hace una sola consulta. Con PostgreSQL, un advisory lock
+evita que varios workers sincronicen a la vez.
+"""
+import hashlib
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.models.base import BaseModel
+
+MARKER_TABLE = "schema_state"
+MARKER_NAME = "schema"
+
+# Aumentar al cambiar la lógica de sincronización sin cambiar modelos ni seeds
+BOOTSTRAP_REVISION = 1
+
+# Clave del advisory lock de PostgreSQL para la sincronización
+_LOCK_KEY = 482_210_047
+
+
+class StepTimer:
+    """Duración de cada paso del arranque"""
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self._last = self.started
+        self.steps: List[Tuple[str, float]] = []
+
+    def mark(self, step: str) -> None:
+        now = time.perf_counter()
+        self.steps.append((step, now - self._last))
+        self._last = now
+
+    def summary(self) -> str:
+        parts = [f"{step} {seconds * 1000:.0f}ms" for step, seconds in self.steps]
+        total = (self._last - self.started) * 1000
+        return f"{' | '.join(parts)} | total {total:.0f}ms"
+
+
+def schema_fingerprint(engine: Engine) -> str:
+    """Hash del DDL de los modelos (en el dialecto del engine), de los seeds y de los umbrales de stock"""
+    from app.config.settings import settings
+    from app.core.data_versions import TRACKED_TABLES
+    from app.db.seeds.admin_user import ADMIN_EMAIL
+    from app.db.seeds.countries import COUNTRIES
+    from app.db.seeds.roles import ROLES
+
+    digest = hashlib.sha256(f"revision {BOOTSTRAP_REVISION}".encode("utf-8"))
+    for table in BaseModel.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=engine.dialect)).encode("utf-8"))
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=engine.dialect)).encode("utf-8"))
+    digest.update(repr((COUNTRIES, ROLES, ADMIN_EMAIL, TRACKED_TABLES)).encode("utf-8"))
+    # Umbrales de stock por defecto: al cambiarlos se recalculan los niveles de alerta
+    digest.update(repr((settings.LOW_STOCK_WARNING_THRESHOLD, settings.LOW_STOCK_CRITICAL_THRESHOLD)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def read_marker(engine: Engine) -> Optional[str]:
+    """Huella aplicada por la última sincronización (None si nunca se sincronizó)"""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                text(f"SELECT fingerprint FROM {MARKER_TABLE} WHERE name = :name"),
+                {"name": MARKER_NAME}
+            ).scalar()
+    except SQLAlchemyError:
+        # La tabla aún no existe
+        return None
+
+
+def write_marker(engine: Engine, fingerprint: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {MARKER_TABLE} ("
+            "name VARCHAR(64) PRIMARY KEY, "
+            "fingerprint VARCHAR(64) NOT NULL, "
+            "applied_at VARCHAR(32) NOT NULL)"
+        ))
+        conn.execute(text(f"DELETE FROM {MARKER_TABLE} WHERE name = :name"), {"name": MARKER_NAME})
+        conn.execute(
+            text(f"INSERT INTO {MARKER_TABLE} (name, fingerprint, applied_at) VALUES (:name, :fingerprint, :applied_at)"),
+            {"name": MARKER_NAME, "fingerprint": fingerprint, "applied_at": datetime.now().isoformat(timespec="seconds")}
+        )
+
+
+@contextmanager
+def _bootstrap_lock(engine: Engine):
+    """Lock entre procesos durante la sincronización (solo PostgreSQL)"""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+
+
+def run_seeds(engine: Engine) -> None:
+    """Seeds básicos en una sola transacción (una inserción por tabla)"""
+    from app.core.data_versions import increment_versions
+    from app.db.seeds.admin_user import seed_admin_user
+    from app.db.seeds.countries import seed_countries
+    from app.db.seeds.data_versions import seed_data_versions
+    from app.db.seeds.roles import seed_roles
+
+    with engine.begin() as conn:
+        seed_data_versions(conn)
+        inserted = {
+            "countries": seed_countries(conn),
+            "roles": seed_roles(conn),
+        }
+        seed_admin_user(conn)
+        # Los procesos que ya estaban sirviendo ven los catálogos nuevos
+        increment_versions(conn, [table for table, count in inserted.items() if count])
+
+
+def initialize_database(engine: Engine, timer: StepTimer, force: bool = False) -> bool:
+    """
+    Sincronizar esquema y seeds si la huella cambió (o si force).
+    Devuelve True si se ejecutó la sincronización.
+    """
+    from app.db.schema import ensure_columns, ensure_indexes
+    from app.models.product import refresh_alert_levels, refresh_expiry_buckets
+
+    fingerprint = schema_fingerprint(engine)
+    current = read_marker(engine)
+    timer.mark("verificacion de esquema")
+    if current == fingerprint and not force:
+        print("[BOOTSTRAP] Esquema y seeds al dia, se omite la sincronizacion")
+        return False
+
+    with _bootstrap_lock(engine):
+        # Otro worker pudo completar la sincronización mientras se esperaba el lock
+        if not force and read_marker(engine) == fingerprint:
+            timer.mark("espera de sincronizacion")
+            print("[BOOTSTRAP] Esquema sincronizado por otro proceso")
+            return False
+
+        print("[BOOTSTRAP] Huella de esquema distinta, sincronizando...")
+        BaseModel.metadata.create_all(bind=engine)
+        timer.mark("create_all")
+        ensure_columns(engine)
+        ensure_indexes(engine)
+        timer.mark("columnas e indices")
+        run_seeds(engine)
+        timer.mark("seeds")
+        with engine.begin() as conn:
+            updated = refresh_alert_levels(conn)
+        print(f"[BOOTSTRAP] Niveles de alerta de stock recalculados: {updated} productos")
+        timer.mark("niveles de alerta")
+        with engine.begin() as conn:
+            updated = refresh_expiry_buckets(conn)
+        print(f"[BOOTSTRAP] Estados de vencimiento recalculados: {updated} productos")
+        timer.mark("estados de vencimiento")
+        write_marker(engine, fingerprint)
+        timer.mark("marcador")
+    return True
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Particionado mensual de la tabla movements (solo PostgreSQL).
+
+- convert_movements_to_partitioned: convierte la tabla existente en una tabla
+  particionada por rango de fecha_movimiento (una particion por mes).
+- ensure_future_partitions: crea las particiones de los meses siguientes
+  (se ejecuta al arrancar y en la tarea diaria).
+- detach_partition: separa la particion de un mes (para archivarla o eliminarla).
+
+Los indices se declaran en la tabla padre; PostgreSQL los crea en cada
+particion, incluidas las nuevas. La llave primaria pasa a ser
+(id, fecha_movimiento) porque debe incluir la columna de particion.
+"""
+from datetime import date
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.models.movement import Movement
+from app.utils.date_helpers import get_local_today
+
+TABLE_NAME = Movement.__tablename__
+LEGACY_TABLE_NAME = f"{TABLE_NAME}_sin_particionar"
+DEFAULT_PARTITION_NAME = f"{TABLE_NAME}_default"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def partition_name(month: date) -> str:
+    """Nombre de la particion de un mes, p. ej. movements_p2025_01"""
+    return f"{TABLE_NAME}_p{month.year:04d}_{month.month:02d}"
+
+
+def is_postgresql(engine: Engine) -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def is_partitioned(engine: Engine, table_name: str = TABLE_NAME) -> bool:
+    """Indicar si la tabla ya es particionada"""
+    if not is_postgresql(engine):
+        return False
+    with engine.connect() as conn:
+        return bool(conn.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+                "WHERE c.relname = :name AND pg_catalog.pg_table_is_visible(c.oid)"
+            ),
+            {"name": table_name}
+        ).first())
+
+
+def partitioned_tables(engine: Engine) -> List[str]:
+    """Tablas particionadas del esquema actual"""
+    if not is_postgresql(engine):
+        return []
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(text(
+            "SELECT c.relname FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE pg_catalog.pg_table_is_visible(c.oid)"
+        ))]
+
+
+def list_partitions(engine: Engine) -> List[Tuple[str, str]]:
+    """Particiones de movements con su rango: [(nombre, 'FOR VALUES FROM ... TO ...')]"""
+    with engine.connect() as conn:
+        return [(row[0], row[1]) for row in conn.execute(text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :name ORDER BY c.relname"
+        ), {"name": TABLE_NAME})]
+
+
+def _create_month_partition(conn, month: date) -> bool:
+    """Crear la particion de un mes si no existe. Devuelve True si se creo."""
+    name = partition_name(month)
+    exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+    if exists:
+        return False
+
+    bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+    rango = {"desde": month, "hasta": _add_months(month, 1)}
+    has_default_partition = conn.execute(
+        text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION_NAME}
+    ).scalar()
+    has_default_rows = has_default_partition and conn.execute(text(
+        f'SELECT 1 FROM "{DEFAULT_PARTITION_NAME}" '
+        f"WHERE fecha_movimiento >= :desde AND fecha_movimiento < :hasta LIMIT 1"
+    ), rango).first()
+
+    if not has_default_rows:
+        conn.execute(text(f'CREATE TABLE "{name}" PARTITION OF "{TABLE_NAME}" {bounds}'))
+        return True
+
+    # PostgreSQL no permite crear la particion si la particion por defecto tiene filas del rango:
+    # se mueven a una tabla nueva y luego se adjunta
+    conn.execute(text(f'CREATE TABLE "{name}" (LIKE "{TABLE_NAME}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    conn.execute(text(
+        f'WITH movidos AS (DELETE FROM "{DEFAULT_PARTITION_NAME}" '
+        f"WHERE fecha_movimiento >= :desde AND fecha_movimiento < :hasta RETURNING *) "
+        f'INSERT INTO "{name}" SELECT * FROM movidos'
+    ), rango)
+    conn.execute(text(f'ALTER TABLE "{TABLE_NAME}" ATTACH PARTITION "{name}" {bounds}'))
+    return True
+
+
+def _drop_foreign_keys(conn, table_name: str) -> None:
+    """
+    Quitar las llaves foraneas de una tabla que la aplicacion ya no lee (tabla original o
+    particion separada): sus filas no deben impedir eliminar productos o usuarios
+    """
+    for constraint_name, in conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:name AS regclass) AND contype = 'f'"
+    ), {"name": table_name}).all():
+        conn.execute(text(f'ALTER TABLE "{table_name}" DROP CONSTRAINT "{constraint_name}"'))
+
+
+def ensure_future_partitions(engine: Engine, months_ahead: int = 3) -> List[str]:
+    """Crear particiones desde el mes actual hasta `months_ahead` meses adelante"""
+    if not is_partitioned(engine):
+        return []
+    current = _month_start(get_local_today())
+    created = []
+    with engine.begin() as conn:
+        for offset in range(months_ahead + 1):
+            month = _add_months(current, offset)
+            if _create_month_partition(conn, month):
+                created.append(partition_name(month))
+    if created:
+        print(f"[PARTITIONS] Particiones creadas: {', '.join(created)}")
+    return created
+
+
+def convert_movements_to_partitioned(
+    engine: Engine,
+    months_ahead: int = 3,
+    drop_legacy: bool = False
+) -> dict:
+    """
+    Convertir movements en tabla particionada por mes, en una sola transaccion.
+    La tabla original se conserva como movements_sin_particionar (sin llaves foraneas)
+    salvo drop_legacy.
+    """
+    if not is_postgresql(engine):
+        raise RuntimeError("El particionado solo esta disponible en PostgreSQL")
+    if is_partitioned(engine):
+        raise RuntimeError(f"La tabla {TABLE_NAME} ya esta particionada")
+
+    with engine.begin() as conn:
+        # Bloquear escrituras durante la copia
+        conn.execute(text(f'LOCK TABLE "{TABLE_NAME}" IN ACCESS EXCLUSIVE MODE'))
+        fecha_min, fecha_max, total = conn.execute(text(
+            f'SELECT min(fecha_movimiento), max(fecha_movimiento), count(*) FROM "{TABLE_NAME}"'
+        )).one()
+
+        conn.execute(text(f'ALTER TABLE "{TABLE_NAME}" RENAME TO "{LEGACY_TABLE_NAME}"'))
+        # Liberar los nombres de indices para la tabla nueva
+        for index_name, in conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :name"
+        ), {"name": LEGACY_TABLE_NAME}).all():
+            conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_sin_particionar"'))
+        # La copia de respaldo no se lee: sus llaves foraneas bloquearian eliminar productos y usuarios
+        _drop_foreign_keys(conn, LEGACY_TABLE_NAME)
+
+        # Mismas columnas, tipos y defaults (incluida la secuencia del id)
+        conn.execute(text(
+            f'CREATE TABLE "{TABLE_NAME}" (LIKE "{LEGACY_TABLE_NAME}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f"PARTITION BY RANGE (fecha_movimiento)"
+        ))
+        conn.execute(text(f'ALTER TABLE "{TABLE_NAME}" ADD CONSTRAINT "{TABLE_NAME}_pkey" PRIMARY KEY (id, fecha_movimiento)'))
+        for fk in Movement.__table__.foreign_keys:
+            column = fk.parent.name
+            conn.execute(text(
+                f'ALTER TABLE "{TABLE_NAME}" ADD CONSTRAINT "{TABLE_NAME}_{column}_fkey" '
+                f'FOREIGN KEY ({column}) REFERENCES "{fk.column.table.name}" ({fk.column.name})'
+            ))
+        sequence = conn.execute(text(
+            "SELECT pg_get_serial_sequence(:name, 'id')"
+        ), {"name": LEGACY_TABLE_NAME}).scalar()
+        if sequence:
+            conn.execute(text(f'ALTER SEQUENCE {sequence} OWNED BY "{TABLE_NAME}".id'))
+
+        # Particiones mensuales para todo el historico y los meses siguientes
+        first_month = _month_start(fecha_min.date()) if fecha_min else _month_start(get_local_today())
+        last_month = _add_months(_month_start(get_local_today()), months_ahead)
+        if fecha_max and _month_start(fecha_max.date()) > last_month:
+            last_month = _month_start(fecha_max.date())
+        month = first_month
+        partitions = 0
+        while month <= last_month:
+            _create_month_partition(conn, month)
+            partitions += 1
+            month = _add_months(month, 1)
+        # Filas fuera de los rangos creados (fechas erroneas) no deben romper las inserciones
+        conn.execute(text(f'CREATE TABLE "{DEFAULT_PARTITION_NAME}" PARTITION OF "{TABLE_NAME}" DEFAULT'))
+
+        # Indices declarados en el modelo (se propagan a cada particion)
+        for index in Movement.__table__.indexes:
+            index.create(bind=conn)
+
+        conn.execute(text(f'INSERT INTO "{TABLE_NAME}" SELECT * FROM "{LEGACY_TABLE_NAME}"'))
+        copied = conn.execute(text(f'SELECT count(*) FROM "{TABLE_NAME}"')).scalar()
+        if copied != total:
+            raise RuntimeError(f"Copia incompleta: {copied} de {total} movimientos")
+
+        if drop_legacy:
+            conn.execute(text(f'DROP TABLE "{LEGACY_TABLE_NAME}"'))
+
+    with engine.begin() as conn:
+        conn.execute(text(f'ANALYZE "{TABLE_NAME}"'))
+
+    return {"movements": total, "partitions": partitions, "legacy_table": None if drop_legacy else LEGACY_TABLE_NAME}
+
+
+def detach_partition(engine: Engine, month: date, drop: bool = False) -> Optional[str]:
+    """
+    Separar la particion de un mes de la tabla movements.
+    La tabla separada queda como tabla independiente sin llaves foraneas (o se elimina con drop=True).
+    """
+    name = partition_name(_month_start(month))
+    with engine.begin() as conn:
+        exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if not exists:
+            return None
+        conn.execute(text(f'ALTER TABLE "{TABLE_NAME}" DETACH PARTITION "{name}"'))
+        if drop:
+            conn.execute(text(f'DROP TABLE "{name}"'))
+        else:
+            _drop_foreign_keys(conn, name)
+    return name
+
+
+def run_scheduled_job() -> None:
+    """Tarea programada: mantener creadas las particiones de los meses siguientes"""
+    from app.config.database import engine
+    from app.config.settings import settings
+
+    try:
+        ensure_future_partitions(engine, settings.MOVEMENT_PARTITION_MONTHS_AHEAD)
+    except Exception as e:
+        print(f"[PARTITIONS] Error creando particiones: {str(e)}")
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Sincronizacion de esquema complementaria a create_all.
+
+create_all no agrega columnas ni indices nuevos a tablas que ya existen;
+ensure_columns y ensure_indexes crean los declarados en los modelos que aun
+no esten en la base.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.models.base import BaseModel
+
+
+def ensure_indexes(engine: Engine) -> None:
+    """Crear indices declarados en los modelos que falten en la base de datos"""
+    from app.db.partitioning import partitioned_tables
+
+    # Los indices de tablas particionadas se administran en app/db/partitioning.py
+    skip = set(partitioned_tables(engine))
+    for table in BaseModel.metadata.sorted_tables:
+        if table.name in skip:
+            continue
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                print(f"[SCHEMA] No se pudo crear el indice {index.name}: {str(e)}")
+
+
+def ensure_columns(engine: Engine) -> None:
+    """
+    Agregar columnas declaradas en los modelos que falten en tablas existentes.
+    Las columnas NOT NULL deben declarar server_default para las filas existentes.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in BaseModel.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column.type.compile(dialect=engine.dialect)}'
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(ddl))
+                print(f"[SCHEMA] Columna agregada: {table.name}.{column.name}")
+            except Exception as e:
+                print(f"[SCHEMA] No se pudo agregar la columna {table.name}.{column.name}: {str(e)}")
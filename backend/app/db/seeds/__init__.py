@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Utilidades de los seeds: cada seed inserta sus filas con una sola sentencia
+(INSERT ... ON CONFLICT DO NOTHING), sin consultar fila por fila.
+"""
+from typing import Dict, List
+
+from sqlalchemy import Table, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+
+def insert_missing(conn: Connection, table: Table, rows: List[Dict], key: str) -> int:
+    """Insertar las filas cuya clave única aún no existe; devuelve cuántas se crearon"""
+    if not rows:
+        return 0
+
+    dialects = {"postgresql": postgresql, "sqlite": sqlite}
+    dialect = dialects.get(conn.dialect.name)
+    if dialect is not None:
+        statement = dialect.insert(table).values(rows).on_conflict_do_nothing(index_elements=[key])
+        return conn.execute(statement).rowcount
+
+    # Otros motores: una lectura de las claves existentes y una inserción de las faltantes
+    column = table.c[key]
+    existing = {value for (value,) in conn.execute(select(column).where(column.in_([row[key] for row in rows])))}
+    missing = [row for row in rows if row[key] not in existing]
+    if missing:
+        conn.execute(table.insert(), missing)
+    return len(missing)
@@ -1,45 +1,46 @@
 # -*- coding: utf-8 -*-
-from app.config.database import SessionLocal
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+
+from app.config.database import engine
 from app.models.user import User
 from app.models.role import Role
 from app.utils.password_utils import get_password_hash
-from sqlalchemy.exc import IntegrityError
 
-def seed_admin_user():
+ADMIN_EMAIL = "admin@muestrasunivar.com"
+
+def seed_admin_user(conn: Optional[Connection] = None) -> int:
     """Crear usuario administrador basico"""
-    db = SessionLocal()
+    if conn is None:
+        with engine.begin() as conn:
+            return seed_admin_user(conn)
+    
+    users = User.__table__
+    roles = Role.__table__
+    
+    # Verificar si ya existe el usuario admin
+    if conn.execute(select(users.c.id).where(users.c.email == ADMIN_EMAIL)).first():
+        print("[SEED] Admin user already exists, skipping...")
+        return 0
+    
+    # Obtener rol de administrador
+    admin_role_id = conn.execute(select(roles.c.id).where(roles.c.name == "administrador")).scalar()
+    if admin_role_id is None:
+        print("[SEED] Admin role not found! Make sure roles are seeded first.")
+        return 0
     
-    try:
-        # Verificar si ya existe el usuario admin
-        existing_user = db.query(User).filter(User.email == "admin@muestrasunivar.com").first()
-        if existing_user:
-            print("[SEED] Admin user already exists, skipping...")
-            return
-            
-        # Obtener rol de administrador
-        admin_role = db.query(Role).filter(Role.name == "administrador").first()
-        if not admin_role:
-            print("[SEED] Admin role not found! Make sure roles are seeded first.")
-            return
-        
-        # Crear usuario administrador
-        admin_user = User(
-            email="admin@muestrasunivar.com",
-            password_hash=get_password_hash("gmZvTiZtA5g31eJl"),
-            first_name="Admin",
-            last_name="Sistema",
-            role_id=admin_role.id,
-            is_active=True
-        )
-        
-        db.add(admin_user)
-        db.commit()
-        print("[SEED] Created admin user successfully")
-        print("[SEED] Login: admin@muestrasunivar.com / gmZvTiZtA5g31eJl")
-        print("[SEED] WARNING: Change this password in production!")
-        
-    except Exception as e:
-        db.rollback()
-        print(f"[SEED] Error creating admin user: {str(e)}")
-    finally:
-        db.close()
\ No newline at end of file
+    # Crear usuario administrador (el hash solo se calcula si hace falta)
+    conn.execute(users.insert().values(
+        email=ADMIN_EMAIL,
+        password_hash=get_password_hash("gmZvTiZtA5g31eJl"),
+        first_name="Admin",
+        last_name="Sistema",
+        role_id=admin_role_id,
+        is_active=True
+    ))
+    print("[SEED] Created admin user successfully")
+    print(f"[SEED] Login: {ADMIN_EMAIL} / gmZvTiZtA5g31eJl")
+    print("[SEED] WARNING: Change this password in production!")
+    return 1
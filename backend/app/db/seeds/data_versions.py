@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from typing import Optional
+
+from sqlalchemy.engine import Connection
+
+from app.config.database import engine
+from app.core.data_versions import TRACKED_TABLES
+from app.db.seeds import insert_missing
+from app.models.data_version import DataVersion
+
+def seed_data_versions(conn: Optional[Connection] = None) -> int:
+    """Crear los contadores de versión de las tablas que aún no lo tengan"""
+    if conn is None:
+        with engine.begin() as conn:
+            return seed_data_versions(conn)
+    
+    rows = [{"table_name": name, "version": 0} for name in TRACKED_TABLES]
+    inserted = insert_missing(conn, DataVersion.__table__, rows, "table_name")
+    if inserted:
+        print(f"[SEED] Created {inserted} data version counters")
+    return inserted
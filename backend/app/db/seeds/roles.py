@@ -1,49 +1,36 @@
 # -*- coding: utf-8 -*-
-from app.config.database import SessionLocal
+from typing import Optional
+
+from sqlalchemy.engine import Connection
+
+from app.config.database import engine
+from app.db.seeds import insert_missing
 from app.models.role import Role
-from sqlalchemy.exc import IntegrityError
 
-def seed_roles():
+ROLES = [
+    {
+        "name": "administrador",
+        "description": "Administrador del sistema - Acceso completo a todos los módulos",
+        "permissions": []
+    },
+    {
+        "name": "user",
+        "description": "Usuario regular - Acceso a productos, movimientos y reportes de países asignados",
+        "permissions": []
+    },
+    {
+        "name": "comercial",
+        "description": "Usuario comercial - Solo acceso a reportes de países y categorías asignadas",
+        "permissions": []
+    }
+]
+
+def seed_roles(conn: Optional[Connection] = None) -> int:
     """Crear todos los roles del sistema"""
-    db = SessionLocal()
-    
-    roles_to_create = [
-        {
-            "name": "administrador",
-            "description": "Administrador del sistema - Acceso completo a todos los módulos"
-        },
-        {
-            "name": "user",
-            "description": "Usuario regular - Acceso a productos, movimientos y reportes de países asignados"
-        },
-        {
-            "name": "comercial",
-            "description": "Usuario comercial - Solo acceso a reportes de países y categorías asignadas"
-        }
-    ]
+    if conn is None:
+        with engine.begin() as conn:
+            return seed_roles(conn)
     
-    try:
-        for role_data in roles_to_create:
-            # Verificar si el rol ya existe
-            existing_role = db.query(Role).filter(Role.name == role_data["name"]).first()
-            if existing_role:
-                print(f"[SEED] Role '{role_data['name']}' already exists, skipping...")
-                continue
-                
-            # Crear el rol
-            new_role = Role(
-                name=role_data["name"],
-                description=role_data["description"]
-            )
-            
-            db.add(new_role)
-            print(f"[SEED] Created role '{role_data['name']}' successfully")
-        
-        db.commit()
-        print("[SEED] All roles created successfully")
-        
-    except Exception as e:
-        db.rollback()
-        print(f"[SEED] Error creating roles: {str(e)}")
-    finally:
-        db.close()
\ No newline at end of file
+    inserted = insert_missing(conn, Role.__table__, ROLES, "name")
+    print(f"[SEED] Roles: {inserted} created, {len(ROLES) - inserted} already existed")
+    return inserted
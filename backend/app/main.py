@@ -1,21 +1,31 @@
+import time
+
+# Inicio del proceso (para el desglose de tiempos del arranque)
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from app.config.settings import settings
 from app.config.database import engine
-from app.api.v1.endpoints import auth, products, users, movements, reports, countries, categories, statistics
 from app.core.rate_limit import limiter, rate_limit_exceeded_handler
+from app.core.middleware import ResponseHeadersMiddleware, CompressionMiddleware
+from app.core.lazy_routers import LazyRouters, LazyRoutersMiddleware
+from app.core.responses import ORJSONResponse
+from app.core.session_listeners import register_session_listeners
 from slowapi.errors import RateLimitExceeded
 # Importar modelos para SQLAlchemy
 from app import models
 from app.models.base import BaseModel
 import os
 
+# Listeners de Session de app.core (versiones de datos, caché de referencia, eventos en vivo)
+register_session_listeners()
+
 # Configurar zona horaria para Centroamerica
 os.environ['TZ'] = settings.TIMEZONE
 try:
-    import time
     time.tzset()
     print(f"[TIMEZONE] Successfully set timezone to: {settings.TIMEZONE}")
 except:
@@ -27,7 +37,8 @@ app = FastAPI(
     version=settings.VERSION,
     description="API para Sistema de Gestion de Muestras Univar",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Configurar rate limiting
@@ -57,60 +68,35 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         }
     )
 
-# Middleware para configurar encoding UTF-8
-@app.middleware("http")
-async def add_utf8_header(request: Request, call_next):
-    response = await call_next(request)
-    response.headers["Content-Type"] = "application/json; charset=utf-8"
-    return response
-
-# Middleware para manejar redirecciones y CORS en producción
-@app.middleware("http") 
-async def handle_cors_redirects(request: Request, call_next):
-    print(f"[CORS_MIDDLEWARE] Processing {request.method} request to {request.url}")
-    
-    # Manejar preflight OPTIONS requests
-    if request.method == "OPTIONS":
-        print("[CORS_MIDDLEWARE] Handling OPTIONS preflight request")
-        from fastapi.responses import Response
-        return Response(
-            status_code=200,
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, PATCH, OPTIONS, HEAD",
-                "Access-Control-Allow-Headers": "*",
-                "Access-Control-Max-Age": "86400",
-                "Access-Control-Allow-Credentials": "false"
-            }
-        )
-    
-    # Procesar request normal
-    try:
-        response = await call_next(request)
-        print(f"[CORS_MIDDLEWARE] Response status: {response.status_code}")
-        
-        # Forzar headers CORS en TODAS las respuestas
-        response.headers["Access-Control-Allow-Origin"] = "*"
-        response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, PATCH, OPTIONS, HEAD"
-        response.headers["Access-Control-Allow-Headers"] = "*"
-        response.headers["Access-Control-Max-Age"] = "86400"
-        response.headers["Vary"] = "Origin"
-        
-        print(f"[CORS_MIDDLEWARE] Added CORS headers to response")
-        return response
-    except Exception as e:
-        print(f"[CORS_MIDDLEWARE] Error: {str(e)}")
-        # Aún en caso de error, devolver respuesta con CORS headers
-        from fastapi.responses import JSONResponse
-        return JSONResponse(
-            status_code=500,
-            content={"detail": "Internal server error"},
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "GET, POST, PUT, DELETE, PATCH, OPTIONS, HEAD",
-                "Access-Control-Allow-Headers": "*"
-            }
-        )
+# Routers de la API (módulo, prefijo, tags). Se importan en segundo plano al arrancar:
+# construir sus rutas es lo más lento del import de la aplicación
+api_routers = LazyRouters(app, settings.API_V1_PREFIX, (
+    ("app.api.v1.endpoints.auth", "/auth", ["authentication"]),
+    ("app.api.v1.endpoints.products", "/products", ["products"]),
+    ("app.api.v1.endpoints.users", "/users", ["users"]),
+    ("app.api.v1.endpoints.movements", "/movements", ["movements"]),
+    ("app.api.v1.endpoints.reports", "/reports", ["reports"]),
+    ("app.api.v1.endpoints.countries", "/countries", ["countries"]),
+    ("app.api.v1.endpoints.categories", "/categories", ["categories"]),
+    ("app.api.v1.endpoints.statistics", "/statistics", ["statistics"]),
+))
+
+# Las solicitudes que lleguen antes de terminar la carga la esperan
+app.add_middleware(LazyRoutersMiddleware, routers=api_routers)
+
+# Headers de respuesta (UTF-8 en JSON, 500 JSON con CORS) como middleware ASGI puro.
+# Se registra antes que CORSMiddleware para quedar dentro de él
+app.add_middleware(ResponseHeadersMiddleware)
+
+# Compresión gzip/brotli (también por chunks en respuestas en streaming)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        brotli_enabled=settings.COMPRESSION_BROTLI_ENABLED
+    )
 
 # Configurar CORS usando settings
 print(f"[CORS] Configured origins: {settings.cors_origins}")
@@ -139,95 +125,80 @@ app.add_middleware(
     max_age=86400  # Cache preflight requests for 24 hours
 )
 
-# Incluir rutas de autenticacion
-app.include_router(
-    auth.router,
-    prefix=f"{settings.API_V1_PREFIX}/auth",
-    tags=["authentication"]
-)
-
-# Incluir rutas de productos
-app.include_router(
-    products.router,
-    prefix=f"{settings.API_V1_PREFIX}/products",
-    tags=["products"]
-)
-
-# Incluir rutas de usuarios
-app.include_router(
-    users.router,
-    prefix=f"{settings.API_V1_PREFIX}/users",
-    tags=["users"]
-)
-
-# Incluir rutas de movimientos
-from app.api.v1.endpoints import movements
-app.include_router(
-    movements.router,
-    prefix=f"{settings.API_V1_PREFIX}/movements",
-    tags=["movements"]
-)
-
-# Incluir rutas de reportes
-app.include_router(
-    reports.router,
-    prefix=f"{settings.API_V1_PREFIX}/reports",
-    tags=["reports"]
-)
-
-# Incluir rutas de países
-app.include_router(
-    countries.router,
-    prefix=f"{settings.API_V1_PREFIX}/countries",
-    tags=["countries"]
-)
-
-# Incluir rutas de categorías
-app.include_router(
-    categories.router,
-    prefix=f"{settings.API_V1_PREFIX}/categories",
-    tags=["categories"]
-)
-
-# Incluir rutas de estadísticas
-app.include_router(
-    statistics.router,
-    prefix=f"{settings.API_V1_PREFIX}/statistics",
-    tags=["statistics"]
-)
-
 # Inicializar base de datos al arrancar la aplicación
 @app.on_event("startup")
 async def startup_event():
-    """Inicializar base de datos y seeds al arrancar"""
+    """Inicializar base de datos y seeds al arrancar (solo si cambió el esquema)"""
+    from app.db.bootstrap import StepTimer, initialize_database
+    
+    timer = StepTimer(started=_import_started)
+    timer.mark("importaciones")
+    
+    # Los routers se cargan en un hilo mientras se verifica la base de datos
+    api_routers.load_in_background()
+    
     try:
         print("[STARTUP] Initializing database...")
-        
-        # Debug CORS configuration
-        print(f"[STARTUP] CORS Debug - Environment: {settings.ENVIRONMENT}")
-        print(f"[STARTUP] CORS Debug - Settings origins: {settings.cors_origins}")
-        print(f"[STARTUP] CORS Debug - Allow all: {settings.CORS_ALLOW_ALL}")
-        
-        # Crear todas las tablas
-        BaseModel.metadata.create_all(bind=engine)
-        print("[STARTUP] Tables created successfully")
-        
-        # Ejecutar seeds básicos
-        from app.db.seeds.countries import seed_countries
-        from app.db.seeds.roles import seed_roles
-        from app.db.seeds.categories import seed_categories
-        from app.db.seeds.admin_user import seed_admin_user
-        
-        seed_countries()
-        seed_roles()
-        seed_categories()
-        seed_admin_user()
-        
+        initialize_database(engine, timer, force=settings.SCHEMA_SYNC_FORCE)
         print("[STARTUP] Database initialization completed successfully")
         
     except Exception as e:
         print(f"[STARTUP] Error during database initialization: {str(e)}")
         # No fallar el startup, solo logear el error
+    
+    # Tareas programadas
+    if settings.SNAPSHOT_JOB_ENABLED:
+        from app.core.scheduler import schedule_daily
+        from app.services.snapshot_service import SnapshotService
+        # Al arrancar se completan los cortes que falten (p. ej. si el servicio estuvo detenido)
+        schedule_daily(
+            "stock_snapshots",
+            settings.SNAPSHOT_JOB_HOUR,
+            settings.SNAPSHOT_JOB_MINUTE,
+            SnapshotService.run_scheduled_job,
+            run_on_start=True
+        )
+    
+    if settings.ARCHIVE_JOB_ENABLED:
+        from app.core.scheduler import schedule_daily
+        from app.services.archive_service import ArchiveService
+        schedule_daily(
+            "movement_archive",
+            settings.SNAPSHOT_JOB_HOUR,
+            settings.SNAPSHOT_JOB_MINUTE,
+            ArchiveService.run_scheduled_job
+        )
+    
+    if settings.EXPIRY_JOB_ENABLED:
+        from app.core.scheduler import schedule_daily
+        from app.services.expiry_service import ExpiryService
+        # Cambio de día de los estados de vencimiento y lista de trabajo (al arrancar por si se perdió la medianoche)
+        schedule_daily("expiry_sweep", 0, 0, ExpiryService.run_scheduled_job, run_on_start=True)
+    
+    try:
+        from app.db.partitioning import is_partitioned
+        if is_partitioned(engine):
+            from app.core.scheduler import schedule_daily
+            from app.db import partitioning
+            schedule_daily(
+                "movement_partitions",
+                settings.SNAPSHOT_JOB_HOUR,
+                settings.SNAPSHOT_JOB_MINUTE,
+                partitioning.run_scheduled_job,
+                run_on_start=True
+            )
+    except Exception as e:
+        print(f"[STARTUP] Error checking movement partitions: {str(e)}")
+        # No fallar el startup, solo logear el error
+    timer.mark("tareas programadas")
+    
+    print(f"[STARTUP] Arranque: {timer.summary()}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Detener tareas programadas"""
+    from app.core.scheduler import cancel_all
+    cancel_all()
 
 @app.get("/")
 async def root():
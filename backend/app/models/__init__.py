@@ -8,5 +8,9 @@ from .user_category import user_categories_table
 from .user import User
 from .product import Product
 from .movement import Movement
+from .stock_snapshot import StockSnapshot
+from .movement_archive import ArchivedMovement, MovementArchiveCheckpoint
+from .data_version import DataVersion
+from .expiry_worklist import ExpiryWorklistItem
 
-__all__ = ['BaseModel', 'Role', 'Country', 'Category', 'User', 'Product', 'Movement', 'user_countries_table', 'user_categories_table']
\ No newline at end of file
+__all__ = ['BaseModel', 'Role', 'Country', 'Category', 'User', 'Product', 'Movement', 'StockSnapshot', 'ArchivedMovement', 'MovementArchiveCheckpoint', 'DataVersion', 'ExpiryWorklistItem', 'user_countries_table', 'user_categories_table']
\ No newline at end of file
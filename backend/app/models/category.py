@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Boolean
+from sqlalchemy import Column, String, Text, Boolean, Integer
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 from .user_category import user_categories_table
@@ -10,6 +10,10 @@ class Category(BaseModel):
     description = Column(Text)
     is_active = Column(Boolean, default=True)
     
+    # Umbrales de reposición para los productos sin umbral propio (None = los de settings)
+    stock_minimo = Column(Integer, nullable=True)
+    stock_critico = Column(Integer, nullable=True)
+    
     # Relación con usuarios comerciales (backward compatibility)
     users = relationship("User", back_populates="category")
     
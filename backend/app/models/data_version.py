@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, BigInteger
+from .base import BaseModel
+
+class DataVersion(BaseModel):
+    """Contador de versión de una tabla: aumenta en cada transacción que la modifica"""
+    __tablename__ = "data_versions"
+    
+    table_name = Column(String(64), nullable=False, unique=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<DataVersion {self.table_name}: {self.version}>"
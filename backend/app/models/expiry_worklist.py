@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, Index, UniqueConstraint
+from .base import BaseModel
+
+class ExpiryWorklistItem(BaseModel):
+    """Producto de la lista de trabajo de vencimientos del día (vence dentro del horizonte configurado)"""
+    __tablename__ = "expiry_worklist"
+    __table_args__ = (
+        # Un producto por lista diaria
+        UniqueConstraint("fecha_corte", "product_id", name="uq_expiry_worklist_fecha_producto"),
+        # Lectura de la lista del día por país, los más urgentes primero
+        Index("ix_expiry_worklist_fecha_pais", "fecha_corte", "country_id", "fecha_vencimiento"),
+    )
+    
+    fecha_corte = Column(Date, nullable=False)
+    country_id = Column(Integer, ForeignKey("countries.id", ondelete="CASCADE"), nullable=False)
+    categoria_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    fecha_vencimiento = Column(Date, nullable=False)
+    dias_para_vencer = Column(Integer, nullable=False)
+    
+    def __repr__(self):
+        return f"<ExpiryWorklistItem {self.fecha_corte} producto={self.product_id}: {self.dias_para_vencer} días>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, ForeignKey, Enum
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base import BaseModel
@@ -12,6 +12,12 @@ class MovementType(enum.Enum):
 
 class Movement(BaseModel):
     __tablename__ = "movements"
+    __table_args__ = (
+        # Kardex por producto ordenado por fecha (saldo inicial y paginación por llave)
+        Index("ix_movements_product_fecha", "product_id", "fecha_movimiento", "id"),
+        # Listado general ordenado por (fecha_movimiento DESC, id DESC)
+        Index("ix_movements_fecha_id", "fecha_movimiento", "id"),
+    )
     
     # Informaci�n b�sica del movimiento
     tipo = Column(Enum(MovementType), nullable=False, index=True)
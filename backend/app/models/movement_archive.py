@@ -0,0 +1,36 @@
+from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, Enum, Index
+from .base import BaseModel
+from .movement import MovementType
+
+class ArchivedMovement(BaseModel):
+    """Movimiento antiguo movido fuera de la tabla movements (conserva su id)"""
+    __tablename__ = "movements_archive"
+    __table_args__ = (
+        # Solo el índice del Kardex para mantener la tabla compacta
+        Index("ix_movements_archive_product_fecha", "product_id", "fecha_movimiento", "id"),
+    )
+    
+    # Mismas columnas que Movement (se copian con INSERT ... SELECT)
+    tipo = Column(Enum(MovementType), nullable=False)
+    cantidad = Column(Integer, nullable=False)
+    cantidad_anterior = Column(Integer, nullable=False)
+    cantidad_nueva = Column(Integer, nullable=False)
+    responsable = Column(String(255), nullable=False)
+    motivo = Column(String(500), nullable=False)
+    observaciones = Column(Text, nullable=True)
+    fecha_movimiento = Column(DateTime, nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+class MovementArchiveCheckpoint(BaseModel):
+    """Saldo de un producto al último movimiento archivado"""
+    __tablename__ = "movement_archive_checkpoints"
+    
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, unique=True)
+    archivado_hasta = Column(DateTime, nullable=False)  # Todos los movimientos anteriores están archivados
+    cantidad = Column(Integer, nullable=False)  # cantidad_nueva del último movimiento archivado
+    fecha_ultimo_movimiento = Column(DateTime, nullable=False)
+    movimientos_archivados = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<MovementArchiveCheckpoint producto={self.product_id}: {self.cantidad} hasta {self.archivado_hasta}>"
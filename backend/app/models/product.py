@@ -1,10 +1,46 @@
-from sqlalchemy import Column, String, Integer, Float, Date, Text, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy import Column, String, Integer, Float, Date, Text, ForeignKey, DateTime, Index, and_, case, event, func, inspect, select, text
+from sqlalchemy.orm import relationship, Session
+from sqlalchemy.ext.hybrid import hybrid_property
+from datetime import datetime, timedelta
 from .base import BaseModel
+from app.config.settings import settings
+from app.utils.date_helpers import get_local_today, dias_hasta
+
+# Días antes del vencimiento en que un producto pasa a "por_vencer"
+DIAS_POR_VENCER = 30
+
+class ExpiryBucket:
+    VIGENTE = "vigente"
+    POR_VENCER = "por_vencer"  # Vence dentro de DIAS_POR_VENCER días
+    VENCIDO = "vencido"
+
+class StockAlertLevel:
+    CRITICAL = "critical"  # Stock en o bajo el umbral crítico
+    WARNING = "warning"    # Stock en o bajo el umbral mínimo
+
+def stock_alert_level(cantidad: int, stock_minimo: int, stock_critico: int):
+    """Nivel de alerta para una cantidad y umbrales efectivos (None = stock normal)"""
+    if cantidad <= stock_critico:
+        return StockAlertLevel.CRITICAL
+    if cantidad <= stock_minimo:
+        return StockAlertLevel.WARNING
+    return None
 
 class Product(BaseModel):
     __tablename__ = "products"
+    __table_args__ = (
+        # Filtros/orden por vencimiento dentro del país (listados, estadísticas, reporte por vencer)
+        Index("ix_products_country_fecha_vencimiento", "country_id", "fecha_vencimiento"),
+        # Conteos y filtros por estado de vencimiento precalculado dentro del país
+        Index("ix_products_country_expiry_bucket", "country_id", "expiry_bucket", "fecha_vencimiento"),
+        # Solo productos en alerta: el listado de alertas recorre estas filas (index-only en PostgreSQL)
+        Index(
+            "ix_products_en_alerta", "country_id", "cantidad",
+            postgresql_where=text("alert_level IS NOT NULL"),
+            sqlite_where=text("alert_level IS NOT NULL"),
+            postgresql_include=["id", "alert_level", "codigo", "nombre", "categoria_id"],
+        ),
+    )
     
     # Información básica del producto
     codigo = Column(String(20), unique=True, nullable=False, index=True)  # SV100825001
@@ -16,9 +52,18 @@ class Product(BaseModel):
     peso_unitario = Column(Float, nullable=False)  # En Kg
     peso_total = Column(Float, nullable=False)     # En Kg
     
+    # Umbrales de reposición (None = los de la categoría o, si no tiene, los de settings)
+    stock_minimo = Column(Integer, nullable=True)   # En o bajo este stock: alerta "warning"
+    stock_critico = Column(Integer, nullable=True)  # En o bajo este stock: alerta "critical"
+    # Nivel de alerta vigente (None = normal); se recalcula al cambiar la cantidad o los umbrales
+    alert_level = Column(String(10), nullable=True)
+    
     # Fechas importantes
     fecha_registro = Column(Date, nullable=False, default=datetime.utcnow().date())
     fecha_vencimiento = Column(Date, nullable=False)
+    # Estado de vencimiento precalculado (vigente, por_vencer, vencido): se asigna al escribir
+    # fecha_vencimiento y el barrido diario de medianoche aplica los cambios de día
+    expiry_bucket = Column(String(12), nullable=True)
     
     # Información del proveedor y responsable
     proveedor = Column(String(255), nullable=False)
@@ -48,23 +93,135 @@ class Product(BaseModel):
         """Obtener el número secuencial del código"""
         return self.codigo[-3:] if len(self.codigo) >= 3 else ""
     
-    @property
+    @hybrid_property
     def dias_para_vencer(self):
         """Calcular días hasta vencimiento"""
-        from datetime import date
-        today = date.today()
-        return (self.fecha_vencimiento - today).days
+        return (self.fecha_vencimiento - get_local_today()).days
     
-    @property
+    @dias_para_vencer.expression
+    def dias_para_vencer(cls):
+        return dias_hasta(cls.fecha_vencimiento)
+    
+    @hybrid_property
     def estado_vencimiento(self):
         """Obtener estado del producto basado en fecha de vencimiento"""
         dias = self.dias_para_vencer
         if dias < 0:
             return "vencido"
-        elif dias <= 30:
+        elif dias <= DIAS_POR_VENCER:
             return "por_vencer"
         else:
             return "vigente"
     
+    @estado_vencimiento.expression
+    def estado_vencimiento(cls):
+        dias = dias_hasta(cls.fecha_vencimiento)
+        return case(
+            (dias < 0, "vencido"),
+            (dias <= DIAS_POR_VENCER, "por_vencer"),
+            else_="vigente"
+        )
+    
+    @classmethod
+    def filtro_estado_vencimiento(cls, estado: str, today=None):
+        """
+        Condición por rango de fechas equivalente a estado_vencimiento.
+        A diferencia de comparar la expresión, puede usar el índice de fecha_vencimiento.
+        """
+        today = today or get_local_today()
+        limite = today + timedelta(days=DIAS_POR_VENCER)
+        if estado == "vencido":
+            return cls.fecha_vencimiento < today
+        if estado == "por_vencer":
+            return and_(cls.fecha_vencimiento >= today, cls.fecha_vencimiento <= limite)
+        return cls.fecha_vencimiento > limite
+    
+    @classmethod
+    def expiry_bucket_expression(cls, today):
+        """Estado de vencimiento a la fecha `today` en SQL (para el barrido en bloque)"""
+        return case(
+            (cls.fecha_vencimiento < today, ExpiryBucket.VENCIDO),
+            (cls.fecha_vencimiento <= today + timedelta(days=DIAS_POR_VENCER), ExpiryBucket.POR_VENCER),
+            else_=ExpiryBucket.VIGENTE
+        )
+    
+    @classmethod
+    def alert_level_expression(cls):
+        """Nivel de alerta calculado en SQL con los umbrales efectivos (para recalcular en bloque)"""
+        from app.models.category import Category
+        def umbral(columna_producto, columna_categoria, default):
+            categoria = select(columna_categoria).where(Category.id == cls.categoria_id).scalar_subquery()
+            return func.coalesce(columna_producto, categoria, default)
+        minimo = umbral(cls.stock_minimo, Category.stock_minimo, settings.LOW_STOCK_WARNING_THRESHOLD)
+        critico = umbral(cls.stock_critico, Category.stock_critico, settings.LOW_STOCK_CRITICAL_THRESHOLD)
+        return case(
+            (cls.cantidad <= critico, StockAlertLevel.CRITICAL),
+            (cls.cantidad <= minimo, StockAlertLevel.WARNING),
+            else_=None
+        )
+    
     def __repr__(self):
-        return f"<Product {self.codigo}: {self.nombre}>"
\ No newline at end of file
+        return f"<Product {self.codigo}: {self.nombre}>"
+
+# Atributos que cambian el nivel de alerta de un producto
+_ALERT_ATTRIBUTES = ("cantidad", "stock_minimo", "stock_critico", "categoria_id")
+_ALERT_CATEGORIES_KEY = "alert_level_categories"
+
+def refresh_alert_levels(connection, category_ids=None) -> int:
+    """Recalcular alert_level en bloque (todas las filas o las de ciertas categorías)"""
+    table = Product.__table__
+    nivel = Product.alert_level_expression()
+    statement = table.update().where(table.c.alert_level.is_distinct_from(nivel)).values(alert_level=nivel)
+    if category_ids is not None:
+        statement = statement.where(table.c.categoria_id.in_(category_ids))
+    return connection.execute(statement).rowcount
+
+@event.listens_for(Session, "before_flush")
+def _update_alert_levels(session, flush_context, instances):
+    """Mantener alert_level en cada escritura de cantidad (movimientos, edición, importación)"""
+    from app.models.category import Category
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Product):
+            state = inspect(obj)
+            if obj not in session.new and not any(
+                state.attrs[name].history.has_changes() for name in _ALERT_ATTRIBUTES
+            ):
+                continue
+            minimo, critico = obj.stock_minimo, obj.stock_critico
+            if (minimo is None or critico is None) and obj.categoria_id is not None:
+                categoria = session.get(Category, obj.categoria_id)
+                if categoria is not None:
+                    minimo = minimo if minimo is not None else categoria.stock_minimo
+                    critico = critico if critico is not None else categoria.stock_critico
+            obj.alert_level = stock_alert_level(
+                obj.cantidad or 0,
+                minimo if minimo is not None else settings.LOW_STOCK_WARNING_THRESHOLD,
+                critico if critico is not None else settings.LOW_STOCK_CRITICAL_THRESHOLD
+            )
+        elif isinstance(obj, Category) and obj not in session.new:
+            state = inspect(obj)
+            if state.attrs.stock_minimo.history.has_changes() or state.attrs.stock_critico.history.has_changes():
+                session.info.setdefault(_ALERT_CATEGORIES_KEY, set()).add(obj.id)
+
+@event.listens_for(Session, "after_flush")
+def _refresh_category_alert_levels(session, flush_context):
+    """Los productos sin umbral propio heredan los de su categoría"""
+    category_ids = session.info.pop(_ALERT_CATEGORIES_KEY, None)
+    if category_ids:
+        refresh_alert_levels(session.connection(), sorted(category_ids))
+
+def refresh_expiry_buckets(connection, today=None) -> int:
+    """Recalcular expiry_bucket en bloque; solo se escriben las filas que cambian de estado"""
+    table = Product.__table__
+    estado = Product.expiry_bucket_expression(today or get_local_today())
+    statement = table.update().where(table.c.expiry_bucket.is_distinct_from(estado)).values(expiry_bucket=estado)
+    return connection.execute(statement).rowcount
+
+@event.listens_for(Session, "before_flush")
+def _update_expiry_buckets(session, flush_context, instances):
+    """Asignar el estado de vencimiento al crear un producto o cambiar su fecha de vencimiento"""
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Product) and obj.fecha_vencimiento is not None and (
+            obj in session.new or inspect(obj).attrs.fecha_vencimiento.history.has_changes()
+        ):
+            obj.expiry_bucket = obj.estado_vencimiento
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, Date, ForeignKey, UniqueConstraint
+from .base import BaseModel
+
+class SnapshotPeriod:
+    DIARIO = "diario"
+    MENSUAL = "mensual"  # Cierre de mes (se conserva indefinidamente)
+
+class StockSnapshot(BaseModel):
+    """Saldo de un producto al cierre de un día (fecha_corte inclusive)"""
+    __tablename__ = "stock_snapshots"
+    __table_args__ = (
+        # Un saldo por producto y fecha; también sirve para leer un corte completo
+        UniqueConstraint("fecha_corte", "product_id", name="uq_stock_snapshots_fecha_producto"),
+    )
+    
+    fecha_corte = Column(Date, nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    cantidad = Column(Integer, nullable=False)
+    periodo = Column(String(10), nullable=False, default=SnapshotPeriod.DIARIO)
+    
+    def __repr__(self):
+        return f"<StockSnapshot {self.fecha_corte} producto={self.product_id}: {self.cantidad}>"
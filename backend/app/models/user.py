@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Boolean, Integer, ForeignKey, DateTime, event, inspect
+from sqlalchemy.orm import relationship, Session
 from .base import BaseModel
 from .user_country import user_countries_table
 from .user_category import user_categories_table
@@ -22,6 +22,8 @@ class User(BaseModel):
     
     # Metadatos
     last_login = Column(DateTime(timezone=True), nullable=True)
+    # Se incrementa al cambiar credenciales, rol o países: invalida los tokens emitidos antes
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Relaciones ORM
     role = relationship("Role", back_populates="users")
@@ -53,6 +55,10 @@ class User(BaseModel):
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
     
+    @property
+    def role_name(self):
+        return self.role.name if self.role else None
+    
     @property
     def is_admin(self):
         return self.role.name in ["admin", "administrador"] if self.role else False
@@ -87,9 +93,8 @@ class User(BaseModel):
     
     def has_country_access(self, country_id):
         """Verificar si el usuario tiene acceso a un país específico"""
-        if self.is_admin:
-            return True  # Admin puede acceder a todos los países
-        return country_id in self.country_ids
+        from app.core.role_permissions import RolePermissions
+        return RolePermissions.get_access_scope(self).has_country_access(country_id)
     
     def has_category_access(self, category_id):
         """Verificar si el usuario tiene acceso a una categoría específica"""
@@ -98,4 +103,37 @@ class User(BaseModel):
         return category_id in self.category_ids
     
     def __repr__(self):
-        return f"<User {self.email}>"
\ No newline at end of file
+        return f"<User {self.email}>"
+
+# Atributos que invalidan los tokens emitidos al cambiar
+_TOKEN_ATTRIBUTES = (
+    "email", "password_hash", "is_active", "role_id", "country_id", "category_id",
+    "assigned_countries", "assigned_categories"
+)
+_INVALIDATED_KEY = "usuarios_token_invalidado"
+
+@event.listens_for(Session, "before_flush")
+def _bump_token_version(session, flush_context, instances):
+    """Incrementar token_version de los usuarios con cambios de credenciales, rol o países"""
+    for user in session.dirty:
+        if not isinstance(user, User):
+            continue
+        state = inspect(user)
+        if any(state.attrs[name].history.has_changes() for name in _TOKEN_ATTRIBUTES):
+            user.token_version = (user.token_version or 0) + 1
+            session.info.setdefault(_INVALIDATED_KEY, set()).add(user.id)
+    for user in session.deleted:
+        if isinstance(user, User):
+            session.info.setdefault(_INVALIDATED_KEY, set()).add(user.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_token_state(session):
+    user_ids = session.info.pop(_INVALIDATED_KEY, None)
+    if user_ids:
+        from app.core.token_cache import invalidate_user
+        for user_id in user_ids:
+            invalidate_user(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_token_invalidations(session):
+    session.info.pop(_INVALIDATED_KEY, None)
@@ -92,13 +92,11 @@ class UserRepository:
     
     def assign_countries(self, user: User, country_ids: List[int]) -> User:
         """Asignar pa�ses a un usuario"""
-        # Limpiar pa�ses existentes
-        user.assigned_countries.clear()
-        
-        # Asignar nuevos pa�ses
+        # Reemplazar los países asignados (solo las diferencias cuentan como cambio)
+        countries = []
         if country_ids:
             countries = self.db.query(Country).filter(Country.id.in_(country_ids)).all()
-            user.assigned_countries = countries
+        user.assigned_countries = countries
         
         self.db.commit()
         self.db.refresh(user)
@@ -106,13 +104,11 @@ class UserRepository:
     
     def assign_categories(self, user: User, category_ids: List[int]) -> User:
         """Asignar categorías a un usuario"""
-        # Limpiar categorías existentes
-        user.assigned_categories.clear()
-        
-        # Asignar nuevas categorías
+        # Reemplazar las categorías asignadas (solo las diferencias cuentan como cambio)
+        categories = []
         if category_ids:
             categories = self.db.query(Category).filter(Category.id.in_(category_ids)).all()
-            user.assigned_categories = categories
+        user.assigned_categories = categories
         
         self.db.commit()
         self.db.refresh(user)
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
@@ -7,6 +7,9 @@ class CategoryBase(BaseModel):
     name: str
     description: Optional[str] = None
     is_active: bool = True
+    # Umbrales de stock para productos sin umbral propio (None = los globales)
+    stock_minimo: Optional[int] = Field(None, ge=0)
+    stock_critico: Optional[int] = Field(None, ge=0)
 
 class CategoryCreate(CategoryBase):
     pass
@@ -15,6 +18,8 @@ class CategoryUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     is_active: Optional[bool] = None
+    stock_minimo: Optional[int] = Field(None, ge=0)
+    stock_critico: Optional[int] = Field(None, ge=0)
 
 class CategoryResponse(CategoryBase):
     id: int
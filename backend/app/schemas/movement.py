@@ -156,4 +156,31 @@ class KardexResponse(BaseModel):
     movimientos: List[KardexEntry]
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class KardexPageResponse(BaseModel):
+    """Página del Kardex de un producto en un rango de fechas"""
+    product_id: int
+    product_codigo: str
+    product_nombre: str
+    saldo_actual: int
+    fecha_desde: Optional[datetime] = None
+    fecha_hasta: Optional[datetime] = None
+    saldo_inicial: int  # Saldo antes de fecha_desde
+    movimientos: List[KardexEntry]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+class KardexBatchRequest(BaseModel):
+    """Solicitud de Kardex para varios productos (auditorías por lote, categoría o país)"""
+    product_ids: Optional[List[int]] = None
+    categoria_id: Optional[int] = None
+    country_id: Optional[int] = None
+    fecha_desde: Optional[datetime] = None
+    fecha_hasta: Optional[datetime] = None
+    
+    @validator('product_ids')
+    def validate_product_ids(cls, v):
+        if v is not None and len(v) == 0:
+            raise ValueError('La lista de productos no puede estar vacía')
+        return v
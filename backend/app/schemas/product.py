@@ -1,5 +1,5 @@
 from pydantic import BaseModel, validator, Field
-from typing import Optional
+from typing import Optional, Literal
 from datetime import date, datetime
 from enum import Enum
 
@@ -29,6 +29,8 @@ class ProductBase(BaseModel):
     responsable: str = Field(..., min_length=1, max_length=255, description="Responsable del producto")
     comentarios: Optional[str] = Field(None, max_length=1000, description="Comentarios adicionales")
     categoria_id: int = Field(..., description="ID de la categoria")
+    stock_minimo: Optional[int] = Field(None, ge=0, description="Umbral de alerta (None = el de la categoria)")
+    stock_critico: Optional[int] = Field(None, ge=0, description="Umbral critico (None = el de la categoria)")
 
     @validator('fecha_registro', pre=True)
     def validate_fecha_registro(cls, v, values):
@@ -122,6 +124,8 @@ class ProductUpdate(BaseModel):
     responsable: Optional[str] = Field(None, min_length=1, max_length=255)
     comentarios: Optional[str] = Field(None, max_length=1000)
     categoria_id: Optional[int] = None
+    stock_minimo: Optional[int] = Field(None, ge=0)
+    stock_critico: Optional[int] = Field(None, ge=0)
 
 # Schema de respuesta básico
 class ProductBase_Response(BaseModel):
@@ -142,6 +146,9 @@ class ProductBase_Response(BaseModel):
     created_by: int
     created_at: datetime
     updated_at: Optional[datetime]
+    stock_minimo: Optional[int] = None
+    stock_critico: Optional[int] = None
+    alert_level: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -189,6 +196,7 @@ class ProductFilters(BaseModel):
     fecha_vencimiento_desde: Optional[date] = Field(None, description="Fecha vencimiento desde")
     fecha_vencimiento_hasta: Optional[date] = Field(None, description="Fecha vencimiento hasta")
     country_id: Optional[int] = Field(None, description="Filtrar por pais")
+    orden_vencimiento: Optional[Literal["asc", "desc"]] = Field(None, description="Ordenar por dias para vencer")
 
 # Schema para estadisticas
 class ProductStats(BaseModel):
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import datetime, date
 from typing import Optional, List
 from enum import Enum
 
@@ -153,8 +153,8 @@ class InventoryTableItem(BaseModel):
     cantidad: int
     peso_unitario: Optional[float] = None
     peso_total: Optional[float] = None
-    fecha_registro: Optional[datetime] = None
-    fecha_vencimiento: Optional[datetime] = None
+    fecha_registro: Optional[date] = None
+    fecha_vencimiento: Optional[date] = None
     proveedor: Optional[str] = None
     responsable: Optional[str] = None
     categoria_nombre: str
@@ -177,6 +177,62 @@ class PageInfo(BaseModel):
     class Config:
         from_attributes = True
 
+class ExpiringProductItem(BaseModel):
+    """Producto proximo a vencer"""
+    product_id: int
+    codigo: str
+    nombre: str
+    lote: Optional[str] = None
+    cantidad: int
+    fecha_vencimiento: date
+    dias_para_vencer: int
+    categoria_nombre: str
+    pais_nombre: str
+    pais_id: int
+
+class ExpiringSoonResponse(BaseModel):
+    """Respuesta del reporte de productos por vencer"""
+    products: List[ExpiringProductItem]
+    total_count: int
+    dias: int
+    page_info: PageInfo
+
+class ExpiryWorklistCountry(BaseModel):
+    """Productos por vencer de un país en la lista de trabajo del día"""
+    pais_id: int
+    pais_nombre: str
+    total: int
+    products: List[ExpiringProductItem]
+
+class ExpiryWorklistResponse(BaseModel):
+    """Lista de trabajo de vencimientos generada por el barrido diario"""
+    fecha_corte: Optional[date] = None
+    dias: int
+    countries: List[ExpiryWorklistCountry]
+    total_count: int
+
+class StockAtDateItem(BaseModel):
+    """Saldo de un producto a una fecha"""
+    product_id: int
+    codigo: str
+    nombre: str
+    lote: Optional[str] = None
+    categoria_nombre: str
+    pais_nombre: str
+    peso_unitario: float
+    cantidad: int
+    peso_total: float
+
+class StockAtDateResponse(BaseModel):
+    """Inventario histórico al cierre de una fecha"""
+    fecha_corte: date
+    snapshot_base: Optional[date] = None  # Corte guardado usado como punto de partida
+    products: List[StockAtDateItem]
+    total_count: int
+    total_cantidad: int
+    total_peso: float
+    page_info: PageInfo
+
 class InventoryTableResponse(BaseModel):
     """Respuesta de la tabla de inventarios"""
     products: List[InventoryTableItem]
@@ -0,0 +1,167 @@
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, select, union_all, insert, delete
+from typing import Dict, Optional
+from datetime import datetime, time, timedelta
+
+from app.config.settings import settings
+from app.models.movement import Movement
+from app.models.movement_archive import ArchivedMovement, MovementArchiveCheckpoint
+from app.utils.date_helpers import get_local_today
+
+# Columnas compartidas por movements y movements_archive
+_COLUMN_NAMES = [column.name for column in Movement.__table__.columns]
+
+# Movement sobre movements UNION ALL movements_archive (mismas columnas, mismo mapeo ORM)
+movements_with_archive = aliased(
+    Movement,
+    union_all(
+        select(*[Movement.__table__.c[name] for name in _COLUMN_NAMES]),
+        select(*[ArchivedMovement.__table__.c[name] for name in _COLUMN_NAMES])
+    ).subquery("movements_all"),
+    name="movements_all"
+)
+
+class ArchiveService:
+    """
+    Archivo de movimientos antiguos.
+    Los movimientos anteriores al horizonte se mueven a movements_archive y se guarda,
+    por producto, el saldo del último movimiento archivado. Las lecturas solo incluyen
+    el archivo cuando el rango de fechas lo alcanza.
+    """
+
+    @staticmethod
+    def get_archive_cutoff(db: Session) -> Optional[datetime]:
+        """Fecha antes de la cual los movimientos están archivados (None si no hay archivo)"""
+        return db.query(func.max(MovementArchiveCheckpoint.archivado_hasta)).scalar()
+
+    @staticmethod
+    def get_checkpoint(db: Session, product_id: int) -> Optional[MovementArchiveCheckpoint]:
+        return db.query(MovementArchiveCheckpoint).filter(
+            MovementArchiveCheckpoint.product_id == product_id
+        ).first()
+
+    @staticmethod
+    def reaches_archive(cutoff: Optional[datetime], fecha_desde: Optional[datetime]) -> bool:
+        """Indicar si un rango que empieza en fecha_desde incluye movimientos archivados"""
+        return cutoff is not None and (fecha_desde is None or fecha_desde < cutoff)
+
+    @staticmethod
+    def movement_source(db: Session, fecha_desde: Optional[datetime] = None, product_id: Optional[int] = None):
+        """
+        Entidad a consultar: Movement, o Movement + archivo si el rango lo alcanza.
+        Con product_id se usa el checkpoint del producto (productos sin archivo leen solo movements).
+        """
+        if product_id is not None:
+            checkpoint = db.query(MovementArchiveCheckpoint.archivado_hasta).filter(
+                MovementArchiveCheckpoint.product_id == product_id
+            ).first()
+            cutoff = checkpoint.archivado_hasta if checkpoint else None
+        else:
+            cutoff = ArchiveService.get_archive_cutoff(db)
+
+        if ArchiveService.reaches_archive(cutoff, fecha_desde):
+            return movements_with_archive
+        return Movement
+
+    @staticmethod
+    def _update_checkpoints(db: Session, archived_counts: Dict[int, int], cutoff: datetime) -> None:
+        """Recalcular el checkpoint de los productos con movimientos recién archivados"""
+        product_ids = list(archived_counts.keys())
+        ultimo = db.query(
+            ArchivedMovement.product_id,
+            ArchivedMovement.cantidad_nueva,
+            ArchivedMovement.fecha_movimiento,
+            func.row_number().over(
+                partition_by=ArchivedMovement.product_id,
+                order_by=(ArchivedMovement.fecha_movimiento.desc(), ArchivedMovement.id.desc())
+            ).label("posicion")
+        ).filter(ArchivedMovement.product_id.in_(product_ids)).subquery()
+
+        checkpoints = {
+            checkpoint.product_id: checkpoint
+            for checkpoint in db.query(MovementArchiveCheckpoint).filter(
+                MovementArchiveCheckpoint.product_id.in_(product_ids)
+            )
+        }
+        for row in db.query(ultimo).filter(ultimo.c.posicion == 1):
+            checkpoint = checkpoints.get(row.product_id)
+            if checkpoint is None:
+                checkpoint = MovementArchiveCheckpoint(product_id=row.product_id, movimientos_archivados=0)
+                db.add(checkpoint)
+            checkpoint.archivado_hasta = cutoff
+            checkpoint.cantidad = row.cantidad_nueva
+            checkpoint.fecha_ultimo_movimiento = row.fecha_movimiento
+            checkpoint.movimientos_archivados += archived_counts[row.product_id]
+
+    @staticmethod
+    def archive_movements(
+        db: Session,
+        horizon_days: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        dry_run: bool = False
+    ) -> dict:
+        """
+        Mover a movements_archive los movimientos anteriores a hoy - horizon_days.
+        Cada lote copia, elimina y actualiza checkpoints en una sola transacción.
+        """
+        horizon_days = horizon_days if horizon_days is not None else settings.ARCHIVE_HORIZON_DAYS
+        batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+
+        cutoff = datetime.combine(get_local_today() - timedelta(days=horizon_days), time.min)
+        # El horizonte nunca retrocede (los movimientos ya archivados no vuelven a movements)
+        current_cutoff = ArchiveService.get_archive_cutoff(db)
+        if current_cutoff is not None and current_cutoff > cutoff:
+            cutoff = current_cutoff
+
+        pending = db.query(func.count(Movement.id)).filter(Movement.fecha_movimiento < cutoff).scalar()
+        if dry_run or not pending:
+            return {"cutoff": cutoff, "pending": pending, "archived": 0}
+
+        archived = 0
+        while True:
+            batch = db.query(Movement.id, Movement.product_id).filter(
+                Movement.fecha_movimiento < cutoff
+            ).order_by(Movement.id).limit(batch_size).all()
+            if not batch:
+                break
+
+            ids = [row.id for row in batch]
+            archived_counts: Dict[int, int] = {}
+            for row in batch:
+                archived_counts[row.product_id] = archived_counts.get(row.product_id, 0) + 1
+
+            columns = [Movement.__table__.c[name] for name in _COLUMN_NAMES]
+            db.execute(
+                insert(ArchivedMovement.__table__).from_select(
+                    _COLUMN_NAMES, select(*columns).where(Movement.id.in_(ids))
+                )
+            )
+            db.execute(delete(Movement.__table__).where(Movement.id.in_(ids)))
+            ArchiveService._update_checkpoints(db, archived_counts, cutoff)
+            db.commit()
+
+            archived += len(ids)
+            print(f"[ARCHIVE] Movimientos archivados: {archived}/{pending}")
+
+        # Productos sin movimientos nuevos en esta corrida también quedan archivados hasta el corte
+        db.query(MovementArchiveCheckpoint).filter(
+            MovementArchiveCheckpoint.archivado_hasta < cutoff
+        ).update({MovementArchiveCheckpoint.archivado_hasta: cutoff}, synchronize_session=False)
+        db.commit()
+
+        return {"cutoff": cutoff, "pending": pending, "archived": archived}
+
+    @staticmethod
+    def run_scheduled_job() -> None:
+        """Tarea programada: archivar movimientos anteriores al horizonte"""
+        from app.config.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            result = ArchiveService.archive_movements(db)
+            print(f"[ARCHIVE] Archivo completado hasta {result['cutoff']}: {result['archived']} movimientos")
+        except Exception as e:
+            db.rollback()
+            print(f"[ARCHIVE] Error archivando movimientos: {str(e)}")
+        finally:
+            db.close()
@@ -0,0 +1,151 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, bindparam, func, insert, select, text
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import date, timedelta
+
+from app.config.settings import settings
+from app.core.reference_cache import get_reference_data
+from app.models.expiry_worklist import ExpiryWorklistItem
+from app.models.product import Product, refresh_expiry_buckets
+from app.utils.date_helpers import dias_entre, get_local_today
+
+# Lock de PostgreSQL del barrido: con varios workers se ejecuta uno a la vez
+_SWEEP_LOCK_KEY = 482_210_050
+
+class ExpiryService:
+    """
+    Barrido diario de vencimientos (medianoche local).
+    Actualiza los estados precalculados de products.expiry_bucket y genera la lista de
+    trabajo por país con lo que vence dentro de EXPIRY_WORKLIST_DAYS días.
+    """
+
+    @staticmethod
+    def write_worklist(db: Session, fecha_corte: date, dias: int) -> int:
+        """Reemplazar la lista de trabajo por la de fecha_corte (un solo INSERT ... SELECT)"""
+        db.query(ExpiryWorklistItem).delete(synchronize_session=False)
+
+        corte = bindparam("fecha_corte", fecha_corte, type_=Date)
+        seleccion = select(
+            corte,
+            Product.country_id,
+            Product.categoria_id,
+            Product.id,
+            Product.fecha_vencimiento,
+            dias_entre(Product.fecha_vencimiento, corte)
+        ).where(
+            # Rango sobre fecha_vencimiento para aprovechar ix_products_country_fecha_vencimiento
+            Product.fecha_vencimiento >= fecha_corte,
+            Product.fecha_vencimiento <= fecha_corte + timedelta(days=dias)
+        )
+        statement = insert(ExpiryWorklistItem.__table__).from_select(
+            ["fecha_corte", "country_id", "categoria_id", "product_id", "fecha_vencimiento", "dias_para_vencer"],
+            seleccion
+        )
+        return db.execute(statement).rowcount
+
+    @staticmethod
+    def run_sweep(db: Session, today: Optional[date] = None) -> Tuple[int, int]:
+        """
+        Aplicar el cambio de día: estados de vencimiento en bloque y lista de trabajo.
+        Devuelve (productos que cambiaron de estado, productos en la lista de trabajo).
+        """
+        today = today or get_local_today()
+        if db.get_bind().dialect.name == "postgresql":
+            # Se libera al confirmar; el siguiente worker reescribe la misma lista sin chocar
+            # con uq_expiry_worklist_fecha_producto
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _SWEEP_LOCK_KEY})
+        cambios = refresh_expiry_buckets(db, today)
+        pendientes = ExpiryService.write_worklist(db, today, settings.EXPIRY_WORKLIST_DAYS)
+        db.commit()
+        return cambios, pendientes
+
+    @staticmethod
+    def run_scheduled_job() -> None:
+        """Tarea programada: barrido de vencimientos con una sesión propia"""
+        from app.config.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            cambios, pendientes = ExpiryService.run_sweep(db)
+            print(f"[EXPIRY] Estados de vencimiento actualizados: {cambios} productos; "
+                  f"lista de trabajo: {pendientes} productos")
+            for country_id, total in db.query(
+                ExpiryWorklistItem.country_id, func.count(ExpiryWorklistItem.id)
+            ).group_by(ExpiryWorklistItem.country_id).order_by(ExpiryWorklistItem.country_id):
+                print(f"[EXPIRY]   País {country_id}: {total} productos por vencer")
+        except Exception as e:
+            db.rollback()
+            print(f"[EXPIRY] Error en el barrido de vencimientos: {str(e)}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_worklist(
+        db: Session,
+        country_ids: Optional[List[int]] = None,
+        category_id: Optional[int] = None,
+        limit_por_pais: int = 100
+    ) -> Dict[str, Any]:
+        """Lista de trabajo vigente agrupada por país, los más urgentes primero"""
+        fecha_corte = db.query(func.max(ExpiryWorklistItem.fecha_corte)).scalar()
+        if fecha_corte is None:
+            return {"fecha_corte": None, "dias": settings.EXPIRY_WORKLIST_DAYS, "countries": [], "total_count": 0}
+
+        filtros = [ExpiryWorklistItem.fecha_corte == fecha_corte]
+        if country_ids:
+            filtros.append(ExpiryWorklistItem.country_id.in_(country_ids))
+        if category_id:
+            filtros.append(ExpiryWorklistItem.categoria_id == category_id)
+
+        rows = db.query(
+            ExpiryWorklistItem.product_id,
+            ExpiryWorklistItem.country_id,
+            ExpiryWorklistItem.categoria_id,
+            ExpiryWorklistItem.fecha_vencimiento,
+            ExpiryWorklistItem.dias_para_vencer,
+            Product.codigo,
+            Product.nombre,
+            Product.lote,
+            Product.cantidad
+        ).join(
+            Product, Product.id == ExpiryWorklistItem.product_id
+        ).filter(
+            *filtros
+        ).order_by(
+            ExpiryWorklistItem.country_id, ExpiryWorklistItem.fecha_vencimiento, ExpiryWorklistItem.product_id
+        ).all()
+
+        # Si el barrido del día aún no corrió, los días se cuentan desde hoy
+        desfase = max((get_local_today() - fecha_corte).days, 0)
+        reference = get_reference_data(db)
+        countries: Dict[int, Dict[str, Any]] = {}
+        for row in rows:
+            grupo = countries.get(row.country_id)
+            if grupo is None:
+                grupo = countries[row.country_id] = {
+                    "pais_id": row.country_id,
+                    "pais_nombre": reference.country_name(row.country_id, ""),
+                    "total": 0,
+                    "products": []
+                }
+            grupo["total"] += 1
+            if len(grupo["products"]) < limit_por_pais:
+                grupo["products"].append({
+                    "product_id": row.product_id,
+                    "codigo": row.codigo,
+                    "nombre": row.nombre,
+                    "lote": row.lote,
+                    "cantidad": row.cantidad,
+                    "fecha_vencimiento": row.fecha_vencimiento,
+                    "dias_para_vencer": row.dias_para_vencer - desfase,
+                    "categoria_nombre": reference.category_name(row.categoria_id, ""),
+                    "pais_nombre": grupo["pais_nombre"],
+                    "pais_id": row.country_id
+                })
+
+        return {
+            "fecha_corte": fecha_corte,
+            "dias": settings.EXPIRY_WORKLIST_DAYS,
+            "countries": list(countries.values()),
+            "total_count": len(rows)
+        }
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy import and_, or_, func, desc, case, tuple_
 from typing import List, Optional, Tuple
 from datetime import datetime
 import pytz
@@ -8,11 +8,16 @@ from app.config.settings import settings
 from app.models.movement import Movement, MovementType
 from app.models.product import Product
 from app.models.user import User
+from app.models.movement_archive import ArchivedMovement, MovementArchiveCheckpoint
 from app.schemas.movement import (
     MovementCreate, MovementEntrada, MovementSalida, MovementAjuste,
     MovementResponse, MovementList, MovementFilters, MovementStats,
-    KardexEntry, KardexResponse
+    KardexEntry, KardexResponse, MovementTypeSchema
 )
+from app.utils.pagination import (
+    encode_cursor, decode_cursor, split_page, table_row_estimate, query_row_estimate
+)
+from app.services.archive_service import ArchiveService
 from fastapi import HTTPException, status
 
 class MovementService:
@@ -239,30 +244,14 @@ class MovementService:
             raise
     
     @staticmethod
-    def get_movements(
-        db: Session,
+    def _apply_filters(
+        query,
         filters: MovementFilters,
-        skip: int = 0,
-        limit: int = 100,
-        country_ids: Optional[List[int]] = None
-    ) -> List[Movement]:
-        """Obtener lista de movimientos con filtros"""
-        
-        query = db.query(Movement).options(
-            joinedload(Movement.product),
-            joinedload(Movement.user)
-        )
-        
-        # Determinar si necesitamos hacer JOIN con Product
-        need_product_join = (
-            country_ids is not None or 
-            filters.country_id or 
-            filters.search or 
-            filters.product_id
-        )
-        
-        if need_product_join:
-            query = query.join(Product)
+        country_ids: Optional[List[int]],
+        need_product_join: bool,
+        source=Movement
+    ):
+        """Aplicar filtros comunes a las consultas de movimientos (source: Movement o Movement + archivo)"""
         
         # Filtrar por pa�ses si se especifica (para usuarios no admin)
         print(f"[MOVEMENT_SERVICE] Applying country filter: {country_ids}")
@@ -280,13 +269,13 @@ class MovementService:
                 search_filter = or_(
                     Product.codigo.ilike(f"%{filters.search}%"),
                     Product.nombre.ilike(f"%{filters.search}%"),
-                    Movement.responsable.ilike(f"%{filters.search}%"),
-                    Movement.motivo.ilike(f"%{filters.search}%")
+                    source.responsable.ilike(f"%{filters.search}%"),
+                    source.motivo.ilike(f"%{filters.search}%")
                 )
             else:
                 search_filter = or_(
-                    Movement.responsable.ilike(f"%{filters.search}%"),
-                    Movement.motivo.ilike(f"%{filters.search}%")
+                    source.responsable.ilike(f"%{filters.search}%"),
+                    source.motivo.ilike(f"%{filters.search}%")
                 )
             query = query.filter(search_filter)
         
@@ -296,7 +285,7 @@ class MovementService:
                 # Convertir a mayúsculas para coincidir con la base de datos
                 tipo_upper = filters.tipo.upper()
                 tipo_enum = MovementType(tipo_upper)
-                query = query.filter(Movement.tipo == tipo_enum)
+                query = query.filter(source.tipo == tipo_enum)
                 print(f"[MOVEMENT_SERVICE] Applied tipo filter: {filters.tipo} -> {tipo_upper} -> {tipo_enum}")
             except ValueError:
                 # Si el string no es válido, no aplicar el filtro
@@ -304,16 +293,190 @@ class MovementService:
                 pass
         
         if filters.product_id:
-            query = query.filter(Movement.product_id == filters.product_id)
+            query = query.filter(source.product_id == filters.product_id)
         
         if filters.fecha_desde:
-            query = query.filter(Movement.fecha_movimiento >= filters.fecha_desde)
+            query = query.filter(source.fecha_movimiento >= filters.fecha_desde)
         
         if filters.fecha_hasta:
-            query = query.filter(Movement.fecha_movimiento <= filters.fecha_hasta)
+            query = query.filter(source.fecha_movimiento <= filters.fecha_hasta)
         
         if filters.responsable:
-            query = query.filter(Movement.responsable.ilike(f"%{filters.responsable}%"))
+            query = query.filter(source.responsable.ilike(f"%{filters.responsable}%"))
+        
+        return query
+    
+    @staticmethod
+    def get_movements_list(
+        db: Session,
+        filters: MovementFilters,
+        skip: int = 0,
+        limit: int = 100,
+        country_ids: Optional[List[int]] = None
+    ) -> List[MovementList]:
+        """
+        Obtener lista de movimientos como proyección de columnas (sin hidratar
+        Movement/Product/User); la diferencia se calcula en SQL
+        """
+        return MovementService.get_movements_page(db, filters, limit, skip=skip, country_ids=country_ids)["items"]
+    
+    @staticmethod
+    def get_movements_page(
+        db: Session,
+        filters: MovementFilters,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        country_ids: Optional[List[int]] = None
+    ) -> dict:
+        """
+        Obtener una página del listado en orden (fecha_movimiento DESC, id DESC).
+        Con cursor la página sigue por llave (sin OFFSET); skip se mantiene por compatibilidad.
+        """
+        def fetch(source):
+            query = MovementService._movements_list_query(db, filters, country_ids, source)
+            if cursor:
+                cursor_fecha, cursor_id = decode_cursor(cursor)
+                query = query.filter(
+                    tuple_(source.fecha_movimiento, source.id) < tuple_(cursor_fecha, cursor_id)
+                )
+            elif skip:
+                query = query.offset(skip)
+            return query.limit(limit + 1).all()
+        
+        rows = fetch(Movement)
+        
+        # Los movimientos archivados son más antiguos que todos los de movements:
+        # solo se consultan si la página no se completó y el rango llega al archivo
+        if len(rows) <= limit and ArchiveService.reaches_archive(
+            ArchiveService.get_archive_cutoff(db), filters.fecha_desde
+        ):
+            rows = fetch(ArchiveService.movement_source(db, filters.fecha_desde))
+        rows, has_more = split_page(rows, limit)
+        print(f"[MOVEMENT_SERVICE] Projection query returned {len(rows)} movements")
+        
+        items = []
+        for row in rows:
+            values = dict(row._mapping)
+            values["tipo"] = MovementTypeSchema(row.tipo.value)
+            items.append(MovementList.construct(**values))
+        
+        return {
+            "items": items,
+            "next_cursor": encode_cursor(rows[-1].fecha_movimiento, rows[-1].id) if has_more else None,
+            "has_more": has_more
+        }
+    
+    @staticmethod
+    def iter_movements_export(
+        db: Session,
+        filters: MovementFilters,
+        country_ids: Optional[List[int]] = None,
+        chunk_size: int = 1000
+    ):
+        """
+        Iterar el listado completo de movimientos (mismos filtros y orden que el listado)
+        con cursor del lado del servidor, para exportaciones sin límite de filas
+        """
+        source = ArchiveService.movement_source(db, filters.fecha_desde)
+        query = MovementService._movements_list_query(db, filters, country_ids, source).add_columns(
+            source.observaciones
+        )
+        return query.execution_options(stream_results=True).yield_per(chunk_size)
+    
+    @staticmethod
+    def count_movements(
+        db: Session,
+        filters: MovementFilters,
+        country_ids: Optional[List[int]] = None,
+        exact: bool = False
+    ) -> Tuple[int, bool]:
+        """
+        Total de movimientos que cumplen los filtros. Devuelve (total, es_estimado).
+        Sin exact se usan las estadísticas de PostgreSQL (reltuples sin filtros, EXPLAIN con filtros);
+        si no hay estimación disponible (p. ej. SQLite) se cuenta.
+        """
+        source = ArchiveService.movement_source(db, filters.fecha_desde)
+        need_product_join = bool(
+            country_ids is not None or filters.country_id or filters.search
+        )
+        query = db.query(source.id)
+        if need_product_join:
+            query = query.join(Product, source.product_id == Product.id)
+        query = MovementService._apply_filters(query, filters, country_ids, need_product_join, source)
+        
+        if not exact:
+            unfiltered = country_ids is None and not any(filters.dict().values())
+            if unfiltered:
+                estimate = table_row_estimate(db, Movement.__tablename__)
+                if estimate is not None and source is not Movement:
+                    archived = table_row_estimate(db, ArchivedMovement.__tablename__)
+                    estimate = estimate + archived if archived is not None else None
+            else:
+                estimate = query_row_estimate(db, query)
+            if estimate is not None:
+                return estimate, True
+        
+        return query.order_by(None).count(), False
+    
+    @staticmethod
+    def _movements_list_query(db: Session, filters: MovementFilters, country_ids: Optional[List[int]], source):
+        """Consulta de proyección del listado de movimientos sobre la fuente indicada"""
+        diferencia = case(
+            (source.tipo.in_([MovementType.ENTRADA, MovementType.INICIAL]), source.cantidad),
+            (source.tipo == MovementType.SALIDA, -source.cantidad),
+            else_=source.cantidad_nueva - source.cantidad_anterior
+        )
+        query = db.query(
+            source.id,
+            source.tipo,
+            source.cantidad,
+            source.cantidad_anterior,
+            source.cantidad_nueva,
+            source.responsable,
+            source.motivo,
+            source.fecha_movimiento,
+            Product.codigo.label("product_codigo"),
+            Product.nombre.label("product_nombre"),
+            func.coalesce(User.first_name + " " + User.last_name, "").label("user_full_name"),
+            diferencia.label("diferencia")
+        ).join(
+            Product, source.product_id == Product.id
+        ).outerjoin(
+            User, source.user_id == User.id
+        )
+        
+        query = MovementService._apply_filters(query, filters, country_ids, True, source)
+        # id como desempate para que la paginación sea estable
+        return query.order_by(desc(source.fecha_movimiento), desc(source.id))
+    
+    @staticmethod
+    def get_movements(
+        db: Session,
+        filters: MovementFilters,
+        skip: int = 0,
+        limit: int = 100,
+        country_ids: Optional[List[int]] = None
+    ) -> List[Movement]:
+        """Obtener lista de movimientos con filtros"""
+        
+        query = db.query(Movement).options(
+            joinedload(Movement.product),
+            joinedload(Movement.user)
+        )
+        
+        # Determinar si necesitamos hacer JOIN con Product
+        need_product_join = (
+            country_ids is not None or 
+            filters.country_id or 
+            filters.search or 
+            filters.product_id
+        )
+        
+        if need_product_join:
+            query = query.join(Product)
+        
+        query = MovementService._apply_filters(query, filters, country_ids, need_product_join)
         
         # Ordenar por fecha m�s reciente
         query = query.order_by(desc(Movement.fecha_movimiento))
@@ -368,28 +531,16 @@ class MovementService:
         if not product:
             return None
         
-        # Obtener todos los movimientos del producto
-        movements = db.query(Movement).options(
-            joinedload(Movement.user)
-        ).filter(
-            Movement.product_id == product_id
-        ).order_by(Movement.fecha_movimiento.asc()).all()
+        # Obtener todos los movimientos del producto (incluye archivados si los hay)
+        source = ArchiveService.movement_source(db, product_id=product_id)
+        movements = MovementService._kardex_query(db, product_id, source=source).all()
         
         # Formatear para el Kardex
         kardex_entries = []
         for movement in movements:
-            kardex_entries.append({
-                "id": movement.id,
-                "fecha": movement.fecha_movimiento,
-                "tipo": movement.tipo,
-                "motivo": movement.motivo,
-                "responsable": movement.responsable,
-                "cantidad_movimiento": movement.cantidad,
-                "cantidad_anterior": movement.cantidad_anterior,
-                "cantidad_nueva": movement.cantidad_nueva,
-                "saldo": movement.cantidad_nueva,
-                "observaciones": movement.observaciones
-            })
+            entry = dict(movement._mapping)
+            entry["tipo"] = movement.tipo.value
+            kardex_entries.append(entry)
         
         return {
             "product_id": product.id,
@@ -399,6 +550,253 @@ class MovementService:
             "movimientos": kardex_entries
         }
     
+    @staticmethod
+    def get_saldo_inicial(db: Session, product_id: int, fecha_desde: Optional[datetime]) -> int:
+        """Saldo del producto antes de fecha_desde (cantidad_nueva del último movimiento previo)"""
+        if fecha_desde is None:
+            return 0
+        
+        saldo = MovementService._ultimo_saldo(db, Movement, product_id, fecha_desde)
+        if saldo is not None:
+            return saldo
+        
+        # Sin movimientos previos en movements: el saldo está en el archivo
+        checkpoint = ArchiveService.get_checkpoint(db, product_id)
+        if checkpoint is None:
+            return 0
+        if fecha_desde >= checkpoint.archivado_hasta:
+            return checkpoint.cantidad
+        return MovementService._ultimo_saldo(db, ArchivedMovement, product_id, fecha_desde) or 0
+    
+    @staticmethod
+    def _ultimo_saldo(db: Session, source, product_id: int, fecha_desde: datetime) -> Optional[int]:
+        """cantidad_nueva del último movimiento anterior a fecha_desde en la tabla indicada"""
+        return db.query(source.cantidad_nueva).filter(
+            source.product_id == product_id,
+            source.fecha_movimiento < fecha_desde
+        ).order_by(
+            source.fecha_movimiento.desc(), source.id.desc()
+        ).limit(1).scalar()
+    
+    @staticmethod
+    def _kardex_columns(source=Movement) -> tuple:
+        """Columnas de una entrada del Kardex (mismos nombres que KardexEntry)"""
+        return (
+            source.id,
+            source.fecha_movimiento.label("fecha"),
+            source.tipo,
+            source.motivo,
+            source.responsable,
+            source.cantidad.label("cantidad_movimiento"),
+            source.cantidad_anterior,
+            source.cantidad_nueva,
+            source.cantidad_nueva.label("saldo"),
+            source.observaciones
+        )
+    
+    @staticmethod
+    def _kardex_query(
+        db: Session,
+        product_id: int,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        source=Movement
+    ):
+        """Consulta de proyección del Kardex en orden (fecha_movimiento, id)"""
+        query = db.query(*MovementService._kardex_columns(source)).filter(source.product_id == product_id)
+        
+        if fecha_desde:
+            query = query.filter(source.fecha_movimiento >= fecha_desde)
+        if fecha_hasta:
+            query = query.filter(source.fecha_movimiento <= fecha_hasta)
+        
+        return query.order_by(source.fecha_movimiento.asc(), source.id.asc())
+    
+    @staticmethod
+    def get_kardex_page(
+        db: Session,
+        product_id: int,
+        country_ids: Optional[List[int]] = None,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Optional[dict]:
+        """
+        Obtener una página del Kardex de un producto en un rango de fechas.
+        El saldo inicial se calcula en la BD y las páginas siguen por llave (fecha, id).
+        """
+        product_query = db.query(Product.id, Product.codigo, Product.nombre, Product.cantidad).filter(
+            Product.id == product_id
+        )
+        if country_ids is not None:
+            product_query = product_query.filter(Product.country_id.in_(country_ids))
+        
+        product = product_query.first()
+        if not product:
+            return None
+        
+        source = ArchiveService.movement_source(db, fecha_desde, product_id)
+        query = MovementService._kardex_query(db, product_id, fecha_desde, fecha_hasta, source)
+        if cursor:
+            cursor_fecha, cursor_id = decode_cursor(cursor)
+            query = query.filter(
+                tuple_(source.fecha_movimiento, source.id) > tuple_(cursor_fecha, cursor_id)
+            )
+        
+        rows, has_more = split_page(query.limit(limit + 1).all(), limit)
+        
+        movimientos = []
+        for row in rows:
+            values = dict(row._mapping)
+            values["tipo"] = MovementTypeSchema(row.tipo.value)
+            movimientos.append(KardexEntry.construct(**values))
+        
+        return {
+            "product_id": product.id,
+            "product_codigo": product.codigo,
+            "product_nombre": product.nombre,
+            "saldo_actual": product.cantidad,
+            "fecha_desde": fecha_desde,
+            "fecha_hasta": fecha_hasta,
+            "saldo_inicial": MovementService.get_saldo_inicial(db, product_id, fecha_desde),
+            "movimientos": movimientos,
+            "next_cursor": encode_cursor(rows[-1].fecha, rows[-1].id) if has_more else None,
+            "has_more": has_more
+        }
+    
+    @staticmethod
+    def iter_kardex_rows(
+        db: Session,
+        product_id: int,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        chunk_size: int = 1000
+    ):
+        """Iterar filas del Kardex con cursor del lado del servidor (para exportaciones)"""
+        source = ArchiveService.movement_source(db, fecha_desde, product_id)
+        query = MovementService._kardex_query(db, product_id, fecha_desde, fecha_hasta, source)
+        return query.execution_options(stream_results=True).yield_per(chunk_size)
+    
+    @staticmethod
+    def get_kardex_batch_products(
+        db: Session,
+        product_ids: Optional[List[int]] = None,
+        categoria_id: Optional[int] = None,
+        country_id: Optional[int] = None,
+        country_ids: Optional[List[int]] = None,
+        max_products: int = 1000
+    ) -> list:
+        """Productos incluidos en un Kardex en lote (ordenados por id)"""
+        if not product_ids and categoria_id is None and country_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Debe indicar product_ids, categoria_id o country_id"
+            )
+        
+        query = db.query(Product.id, Product.codigo, Product.nombre, Product.cantidad)
+        if product_ids:
+            query = query.filter(Product.id.in_(set(product_ids)))
+        if categoria_id is not None:
+            query = query.filter(Product.categoria_id == categoria_id)
+        if country_id is not None:
+            query = query.filter(Product.country_id == country_id)
+        if country_ids is not None:
+            query = query.filter(Product.country_id.in_(country_ids))
+        
+        products = query.order_by(Product.id).limit(max_products + 1).all()
+        if len(products) > max_products:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"La solicitud supera el máximo de {max_products} productos por Kardex en lote"
+            )
+        return products
+    
+    @staticmethod
+    def get_saldos_iniciales(db: Session, product_ids: List[int], fecha_desde: Optional[datetime]) -> dict:
+        """Saldo antes de fecha_desde para varios productos en una sola consulta"""
+        if fecha_desde is None or not product_ids:
+            return {}
+        
+        saldos = MovementService._ultimos_saldos(db, Movement, product_ids, fecha_desde)
+        
+        # Productos sin movimientos previos en movements: checkpoint o archivo
+        faltantes = [product_id for product_id in product_ids if product_id not in saldos]
+        if faltantes:
+            archivo = []
+            for checkpoint in db.query(MovementArchiveCheckpoint).filter(
+                MovementArchiveCheckpoint.product_id.in_(faltantes)
+            ):
+                if fecha_desde >= checkpoint.archivado_hasta:
+                    saldos[checkpoint.product_id] = checkpoint.cantidad
+                else:
+                    archivo.append(checkpoint.product_id)
+            if archivo:
+                saldos.update(MovementService._ultimos_saldos(db, ArchivedMovement, archivo, fecha_desde))
+        return saldos
+    
+    @staticmethod
+    def _ultimos_saldos(db: Session, source, product_ids: List[int], fecha_desde: datetime) -> dict:
+        """cantidad_nueva del último movimiento anterior a fecha_desde por producto"""
+        ultimo = db.query(
+            source.product_id,
+            source.cantidad_nueva,
+            func.row_number().over(
+                partition_by=source.product_id,
+                order_by=(source.fecha_movimiento.desc(), source.id.desc())
+            ).label("posicion")
+        ).filter(
+            source.product_id.in_(product_ids),
+            source.fecha_movimiento < fecha_desde
+        ).subquery()
+        
+        rows = db.query(ultimo.c.product_id, ultimo.c.cantidad_nueva).filter(ultimo.c.posicion == 1)
+        return {row.product_id: row.cantidad_nueva for row in rows}
+    
+    @staticmethod
+    def iter_kardex_batch(
+        db: Session,
+        products: list,
+        fecha_desde: Optional[datetime] = None,
+        fecha_hasta: Optional[datetime] = None,
+        chunk_size: int = 1000
+    ):
+        """
+        Iterar el Kardex de varios productos, uno por producto.
+        Los movimientos se leen en una sola consulta ordenada por (product_id, fecha, id).
+        """
+        product_ids = [product.id for product in products]
+        saldos_iniciales = MovementService.get_saldos_iniciales(db, product_ids, fecha_desde)
+        
+        source = ArchiveService.movement_source(db, fecha_desde)
+        query = db.query(source.product_id, *MovementService._kardex_columns(source)).filter(
+            source.product_id.in_(product_ids)
+        )
+        if fecha_desde:
+            query = query.filter(source.fecha_movimiento >= fecha_desde)
+        if fecha_hasta:
+            query = query.filter(source.fecha_movimiento <= fecha_hasta)
+        query = query.order_by(
+            source.product_id.asc(), source.fecha_movimiento.asc(), source.id.asc()
+        ).execution_options(stream_results=True).yield_per(chunk_size)
+        
+        rows = iter(query)
+        row = next(rows, None)
+        for product in products:
+            movimientos = []
+            # Ambos lados están ordenados por product_id
+            while row is not None and row.product_id == product.id:
+                movimientos.append(row)
+                row = next(rows, None)
+            yield {
+                "product_id": product.id,
+                "product_codigo": product.codigo,
+                "product_nombre": product.nombre,
+                "saldo_actual": product.cantidad,
+                "saldo_inicial": saldos_iniciales.get(product.id, 0),
+                "movimientos": movimientos
+            }
+    
     @staticmethod
     def get_movement_stats(
         db: Session,
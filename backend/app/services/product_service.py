@@ -1,55 +1,58 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, extract, func
+from sqlalchemy import and_, or_, extract, func, case
 from datetime import datetime, date, timedelta
 from typing import List, Optional, Tuple
 
-from app.models.product import Product
-from app.models.country import Country
-from app.models.category import Category
+from app.models.product import Product, ExpiryBucket
 from app.models.user import User
 from app.schemas.product import ProductCreate, ProductUpdate, ProductFilters, ProductStats, ProductList
+from app.utils.date_helpers import get_local_today
+from app.core.reference_cache import get_reference_data
 from fastapi import HTTPException, status
 
 class ProductService:
     
     @staticmethod
-    def _convert_product_to_product_list(product: Product) -> ProductList:
-        """Convert Product model to ProductList schema"""
-        # Cargar relaciones si no están cargadas
-        categoria_nombre = "Sin categoría"
-        country_nombre = "Sin país"
-        
-        try:
-            if hasattr(product, 'categoria') and product.categoria:
-                categoria_nombre = product.categoria.name
-        except:
-            categoria_nombre = "Sin categoría"
-            
-        try:
-            if hasattr(product, 'country') and product.country:
-                country_nombre = product.country.name
-        except:
-            country_nombre = "Sin país"
-        
-        return ProductList(
-            id=product.id,
-            codigo=product.codigo,
-            nombre=product.nombre,
-            lote=product.lote,
-            cantidad=product.cantidad,
-            peso_unitario=product.peso_unitario,
-            peso_total=product.peso_total,
-            fecha_registro=product.fecha_registro,
-            fecha_vencimiento=product.fecha_vencimiento,
-            proveedor=product.proveedor,
-            responsable=product.responsable,
-            comentarios=product.comentarios,
-            categoria_nombre=categoria_nombre,
-            country_nombre=country_nombre,
-            estado_vencimiento=product.estado_vencimiento,
-            dias_para_vencer=product.dias_para_vencer
+    def _product_list_query(db: Session):
+        """
+        Consulta de proyección para listados: solo las columnas que usa ProductList
+        y estado de vencimiento calculado en SQL (los nombres de categoría/país se
+        resuelven con la caché de referencia, sin joins)
+        """
+        return db.query(
+            Product.id,
+            Product.codigo,
+            Product.nombre,
+            Product.lote,
+            Product.cantidad,
+            Product.peso_unitario,
+            Product.peso_total,
+            Product.fecha_registro,
+            Product.fecha_vencimiento,
+            Product.proveedor,
+            Product.responsable,
+            Product.comentarios,
+            Product.categoria_id,
+            Product.country_id,
+            # Estado precalculado (barrido diario); el cálculo solo para filas aún sin estado
+            func.coalesce(Product.expiry_bucket, Product.estado_vencimiento).label("estado_vencimiento"),
+            Product.dias_para_vencer.label("dias_para_vencer")
         )
     
+    @staticmethod
+    def _rows_to_product_list(db: Session, rows) -> List[ProductList]:
+        """Construir ProductList sin validación (los datos ya vienen tipados de la BD)"""
+        reference = get_reference_data(db)
+        products = []
+        for row in rows:
+            values = dict(row._mapping)
+            categoria_id = values.pop("categoria_id")
+            country_id = values.pop("country_id")
+            values["categoria_nombre"] = reference.category_name(categoria_id, "Sin categoría")
+            values["country_nombre"] = reference.country_name(country_id, "Sin país")
+            products.append(ProductList.construct(**values))
+        return products
+    
     @staticmethod
     def generate_product_code(db: Session, country_id: int) -> str:
         """
@@ -58,7 +61,7 @@ class ProductService:
         Ejemplo: SV100825001
         """
         # Obtener prefijo del país
-        country = db.query(Country).filter(Country.id == country_id).first()
+        country = get_reference_data(db).countries.get(country_id)
         if not country:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -110,7 +113,7 @@ class ProductService:
             
             # Validar que la categoría existe
             print(f"[PRODUCT_SERVICE] Validating category {product_data.categoria_id}")
-            category = db.query(Category).filter(Category.id == product_data.categoria_id).first()
+            category = get_reference_data(db).categories.get(product_data.categoria_id)
             if not category:
                 print(f"[PRODUCT_SERVICE] Category not found: {product_data.categoria_id}")
                 raise HTTPException(
@@ -140,7 +143,9 @@ class ProductService:
                 comentarios=product_data.comentarios,
                 categoria_id=product_data.categoria_id,
                 country_id=country_id,
-                created_by=user_id
+                created_by=user_id,
+                stock_minimo=product_data.stock_minimo,
+                stock_critico=product_data.stock_critico
             )
             print(f"[PRODUCT_SERVICE] Product instance created")
             
@@ -191,11 +196,11 @@ class ProductService:
     ) -> List[ProductList]:
         """Obtener productos filtrados por país del usuario"""
         
-        query = db.query(Product).options(joinedload(Product.categoria), joinedload(Product.country)).filter(Product.country_id == country_id)
+        query = ProductService._product_list_query(db).filter(Product.country_id == country_id)
         query = ProductService._apply_filters(query, filters)
+        query = ProductService._apply_ordering(query, filters)
         
-        products = query.offset(skip).limit(limit).all()
-        return [ProductService._convert_product_to_product_list(p) for p in products]
+        return ProductService._rows_to_product_list(db, query.offset(skip).limit(limit).all())
     
     @staticmethod
     def get_products_for_admin(
@@ -206,11 +211,11 @@ class ProductService:
     ) -> List[ProductList]:
         """Obtener todos los productos para administradores"""
         
-        query = db.query(Product).options(joinedload(Product.categoria), joinedload(Product.country))
+        query = ProductService._product_list_query(db)
         query = ProductService._apply_filters(query, filters)
+        query = ProductService._apply_ordering(query, filters)
         
-        products = query.offset(skip).limit(limit).all()
-        return [ProductService._convert_product_to_product_list(p) for p in products]
+        return ProductService._rows_to_product_list(db, query.offset(skip).limit(limit).all())
     
     @staticmethod
     def _apply_filters(query, filters: Optional[ProductFilters]):
@@ -237,21 +242,20 @@ class ProductService:
                 query = query.filter(Product.fecha_vencimiento <= filters.fecha_vencimiento_hasta)
             
             if filters.estado_vencimiento:
-                today = date.today()
-                if filters.estado_vencimiento == "vigente":
-                    query = query.filter(Product.fecha_vencimiento > today + timedelta(days=30))
-                elif filters.estado_vencimiento == "por_vencer":
-                    query = query.filter(
-                        and_(
-                            Product.fecha_vencimiento > today,
-                            Product.fecha_vencimiento <= today + timedelta(days=30)
-                        )
-                    )
-                elif filters.estado_vencimiento == "vencido":
-                    query = query.filter(Product.fecha_vencimiento < today)
+                estado = getattr(filters.estado_vencimiento, "value", filters.estado_vencimiento)
+                query = query.filter(Product.expiry_bucket == estado)
         
         return query
     
+    @staticmethod
+    def _apply_ordering(query, filters: Optional[ProductFilters]):
+        """Ordenar por días para vencer (equivale a ordenar por fecha_vencimiento)"""
+        if filters and filters.orden_vencimiento:
+            if filters.orden_vencimiento == "desc":
+                return query.order_by(Product.fecha_vencimiento.desc(), Product.id.desc())
+            return query.order_by(Product.fecha_vencimiento.asc(), Product.id.asc())
+        return query
+    
     @staticmethod
     def get_product_by_id(db: Session, product_id: int, country_id: int) -> Optional[Product]:
         """Obtener producto por ID, validando que pertenece al país del usuario"""
@@ -347,48 +351,38 @@ class ProductService:
         
         return True
     
+    @staticmethod
+    def _compute_stats(base_query) -> ProductStats:
+        """Calcular todas las estadísticas en una sola consulta agregada"""
+        today = get_local_today()
+        inicio_mes = today.replace(day=1)
+        inicio_mes_siguiente = (inicio_mes + timedelta(days=32)).replace(day=1)
+        
+        def contar(condicion):
+            return func.coalesce(func.sum(case((condicion, 1), else_=0)), 0)
+        
+        # Estados precalculados por el barrido diario (ix_products_country_expiry_bucket)
+        row = base_query.with_entities(
+            func.count(Product.id).label("total_productos"),
+            contar(Product.expiry_bucket == ExpiryBucket.VIGENTE).label("productos_vigentes"),
+            contar(Product.expiry_bucket == ExpiryBucket.POR_VENCER).label("productos_por_vencer"),
+            contar(Product.expiry_bucket == ExpiryBucket.VENCIDO).label("productos_vencidos"),
+            contar(and_(
+                Product.fecha_registro >= inicio_mes,
+                Product.fecha_registro < inicio_mes_siguiente
+            )).label("productos_este_mes")
+        ).one()
+        
+        return ProductStats(**row._mapping)
+    
     @staticmethod
     def get_product_stats(db: Session, country_id: int) -> ProductStats:
         """Obtener estadísticas de productos del país (usuario normal)"""
         
-        today = date.today()
-        current_month = today.month
-        current_year = today.year
-        
         # Consultas para estadísticas
         base_query = db.query(Product).filter(Product.country_id == country_id)
         
-        total_productos = base_query.count()
-        
-        productos_vigentes = base_query.filter(
-            Product.fecha_vencimiento > today + timedelta(days=30)
-        ).count()
-        
-        productos_por_vencer = base_query.filter(
-            and_(
-                Product.fecha_vencimiento > today,
-                Product.fecha_vencimiento <= today + timedelta(days=30)
-            )
-        ).count()
-        
-        productos_vencidos = base_query.filter(
-            Product.fecha_vencimiento < today
-        ).count()
-        
-        productos_este_mes = base_query.filter(
-            and_(
-                extract('month', Product.fecha_registro) == current_month,
-                extract('year', Product.fecha_registro) == current_year
-            )
-        ).count()
-        
-        return ProductStats(
-            total_productos=total_productos,
-            productos_vigentes=productos_vigentes,
-            productos_por_vencer=productos_por_vencer,
-            productos_vencidos=productos_vencidos,
-            productos_este_mes=productos_este_mes
-        )
+        return ProductService._compute_stats(base_query)
     
     @staticmethod
     def get_products_by_countries(
@@ -400,11 +394,11 @@ class ProductService:
     ) -> List[ProductList]:
         """Obtener productos filtrados por múltiples países del usuario"""
         
-        query = db.query(Product).options(joinedload(Product.categoria), joinedload(Product.country)).filter(Product.country_id.in_(country_ids))
+        query = ProductService._product_list_query(db).filter(Product.country_id.in_(country_ids))
         query = ProductService._apply_filters(query, filters)
+        query = ProductService._apply_ordering(query, filters)
         
-        products = query.offset(skip).limit(limit).all()
-        return [ProductService._convert_product_to_product_list(p) for p in products]
+        return ProductService._rows_to_product_list(db, query.offset(skip).limit(limit).all())
     
     @staticmethod
     def get_products_by_countries_paginated(
@@ -422,11 +416,12 @@ class ProductService:
         # Get total count
         total = base_query.count()
         
-        # Get paginated results with relations loaded
-        query = base_query.options(joinedload(Product.categoria), joinedload(Product.country))
-        products = query.offset(skip).limit(limit).all()
+        # Get paginated results as column projection
+        query = ProductService._product_list_query(db).filter(Product.country_id.in_(country_ids))
+        query = ProductService._apply_filters(query, filters)
+        query = ProductService._apply_ordering(query, filters)
         
-        return [ProductService._convert_product_to_product_list(p) for p in products], total
+        return ProductService._rows_to_product_list(db, query.offset(skip).limit(limit).all()), total
     
     @staticmethod
     def get_products_for_admin_paginated(
@@ -443,11 +438,12 @@ class ProductService:
         # Get total count
         total = base_query.count()
         
-        # Get paginated results with relations loaded
-        query = base_query.options(joinedload(Product.categoria), joinedload(Product.country))
-        products = query.offset(skip).limit(limit).all()
+        # Get paginated results as column projection
+        query = ProductService._product_list_query(db)
+        query = ProductService._apply_filters(query, filters)
+        query = ProductService._apply_ordering(query, filters)
         
-        return [ProductService._convert_product_to_product_list(p) for p in products], total
+        return ProductService._rows_to_product_list(db, query.offset(skip).limit(limit).all()), total
     
     @staticmethod
     def get_product_by_id_for_countries(db: Session, product_id: int, country_ids: List[int]) -> Optional[Product]:
@@ -506,86 +502,18 @@ class ProductService:
     def get_product_stats_for_countries(db: Session, country_ids: List[int]) -> ProductStats:
         """Obtener estadísticas de productos de múltiples países (usuario normal)"""
         
-        today = date.today()
-        current_month = today.month
-        current_year = today.year
-        
         # Consultas para estadísticas
         base_query = db.query(Product).filter(Product.country_id.in_(country_ids))
         
-        total_productos = base_query.count()
-        
-        productos_vigentes = base_query.filter(
-            Product.fecha_vencimiento > today + timedelta(days=30)
-        ).count()
-        
-        productos_por_vencer = base_query.filter(
-            and_(
-                Product.fecha_vencimiento > today,
-                Product.fecha_vencimiento <= today + timedelta(days=30)
-            )
-        ).count()
-        
-        productos_vencidos = base_query.filter(
-            Product.fecha_vencimiento < today
-        ).count()
-        
-        productos_este_mes = base_query.filter(
-            and_(
-                extract('month', Product.fecha_registro) == current_month,
-                extract('year', Product.fecha_registro) == current_year
-            )
-        ).count()
-        
-        return ProductStats(
-            total_productos=total_productos,
-            productos_vigentes=productos_vigentes,
-            productos_por_vencer=productos_por_vencer,
-            productos_vencidos=productos_vencidos,
-            productos_este_mes=productos_este_mes
-        )
+        return ProductService._compute_stats(base_query)
     
     @staticmethod
     def get_product_stats_admin(db: Session, country_id: Optional[int] = None) -> ProductStats:
         """Obtener estadísticas de productos para admin (todos los países o uno específico)"""
         
-        today = date.today()
-        current_month = today.month
-        current_year = today.year
-        
         # Base query - todos los productos o filtrados por país
         base_query = db.query(Product)
         if country_id:
             base_query = base_query.filter(Product.country_id == country_id)
         
-        total_productos = base_query.count()
-        
-        productos_vigentes = base_query.filter(
-            Product.fecha_vencimiento > today + timedelta(days=30)
-        ).count()
-        
-        productos_por_vencer = base_query.filter(
-            and_(
-                Product.fecha_vencimiento > today,
-                Product.fecha_vencimiento <= today + timedelta(days=30)
-            )
-        ).count()
-        
-        productos_vencidos = base_query.filter(
-            Product.fecha_vencimiento < today
-        ).count()
-        
-        productos_este_mes = base_query.filter(
-            and_(
-                extract('month', Product.fecha_registro) == current_month,
-                extract('year', Product.fecha_registro) == current_year
-            )
-        ).count()
-        
-        return ProductStats(
-            total_productos=total_productos,
-            productos_vigentes=productos_vigentes,
-            productos_por_vencer=productos_por_vencer,
-            productos_vencidos=productos_vencidos,
-            productos_este_mes=productos_este_mes
-        )
+        return ProductService._compute_stats(base_query)
@@ -4,11 +4,13 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from collections import defaultdict
 
-from app.models.product import Product
+from app.models.product import Product, StockAlertLevel
 from app.models.category import Category
 from app.models.country import Country
 from app.models.movement import Movement, MovementType
 from app.models.user import User
+from app.utils.date_helpers import get_local_today
+from app.core.reference_cache import get_reference_data
 
 class ReportService:
     
@@ -235,35 +237,47 @@ class ReportService:
     def get_commercial_low_stock_alerts(
         db: Session,
         country_ids: Optional[List[int]] = None,
-        min_stock_threshold: int = 10
+        min_stock_threshold: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Obtener productos con stock bajo para alertas"""
-        
-        query = db.query(Product).options(
-            joinedload(Product.categoria),
-            joinedload(Product.country)
-        ).filter(
-            Product.cantidad <= min_stock_threshold
+        """
+        Obtener productos con stock bajo para alertas.
+        Sin min_stock_threshold se usan los umbrales de cada producto/categoría: solo se
+        leen las filas del índice parcial de productos en alerta. Con un umbral global se
+        listan los productos con cantidad <= umbral (recorre el catálogo).
+        """
+        query = db.query(
+            Product.id,
+            Product.codigo,
+            Product.nombre,
+            Product.cantidad,
+            Product.categoria_id,
+            Product.country_id,
+            Product.alert_level
         )
         
+        if min_stock_threshold is None:
+            query = query.filter(Product.alert_level.isnot(None))
+        else:
+            query = query.filter(Product.cantidad <= min_stock_threshold)
+        
         # Filtrar por paises solo si se especifican
         if country_ids:
             query = query.filter(Product.country_id.in_(country_ids))
         
-        query = query.order_by(Product.cantidad.asc())
-        
-        products = query.all()
+        rows = query.order_by(Product.cantidad.asc()).all()
+        reference = get_reference_data(db)
         
         alerts = []
-        for product in products:
+        for row in rows:
             alerts.append({
-                "product_id": product.id,
-                "product_codigo": product.codigo,
-                "product_nombre": product.nombre,
-                "current_stock": product.cantidad,
-                "category_name": product.categoria.name if product.categoria else "",
-                "country_name": product.country.name if product.country else "",
-                "alert_level": "critical" if product.cantidad <= 5 else "warning"
+                "product_id": row.id,
+                "product_codigo": row.codigo,
+                "product_nombre": row.nombre,
+                "current_stock": row.cantidad,
+                "category_name": reference.category_name(row.categoria_id, ""),
+                "country_name": reference.country_name(row.country_id, ""),
+                # Con umbral global, lo que no es crítico para su producto es advertencia
+                "alert_level": row.alert_level if row.alert_level == StockAlertLevel.CRITICAL else StockAlertLevel.WARNING
             })
         
         return alerts
@@ -278,10 +292,7 @@ class ReportService:
     ) -> Dict[str, Any]:
         """Obtener tabla completa de inventario con filtros"""
         
-        query = db.query(Product).options(
-            joinedload(Product.categoria),
-            joinedload(Product.country)
-        )
+        query = db.query(Product)
         
         # Filtrar por paises solo si se especifican
         if country_ids:
@@ -296,6 +307,7 @@ class ReportService:
         
         # Aplicar paginacion
         products = query.order_by(Product.nombre.asc()).offset(offset).limit(limit).all()
+        reference = get_reference_data(db)
         
         inventory_data = []
         for product in products:
@@ -311,12 +323,12 @@ class ReportService:
                 "fecha_vencimiento": product.fecha_vencimiento,
                 "proveedor": product.proveedor,
                 "responsable": product.responsable,
-                "categoria_nombre": product.categoria.name if product.categoria else "",
+                "categoria_nombre": reference.category_name(product.categoria_id, ""),
                 "categoria_id": product.categoria_id,
-                "pais_nombre": product.country.name if product.country else "",
+                "pais_nombre": reference.country_name(product.country_id, ""),
                 "pais_id": product.country_id,
                 "comentarios": product.comentarios,
-                "stock_status": "critical" if product.cantidad <= 5 else "warning" if product.cantidad <= 10 else "normal"
+                "stock_status": product.alert_level or "normal"
             })
         
         return {
@@ -330,6 +342,71 @@ class ReportService:
             }
         }
     
+    @staticmethod
+    def get_expiring_soon_products(
+        db: Session,
+        country_ids: Optional[List[int]] = None,
+        dias: int = 30,
+        category_id: Optional[int] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """Productos que vencen en los proximos `dias`, ordenados por fecha de vencimiento"""
+        
+        today = get_local_today()
+        
+        # Rango sobre fecha_vencimiento para aprovechar ix_products_country_fecha_vencimiento
+        base_filters = [
+            Product.fecha_vencimiento >= today,
+            Product.fecha_vencimiento <= today + timedelta(days=dias)
+        ]
+        if country_ids:
+            base_filters.append(Product.country_id.in_(country_ids))
+        if category_id:
+            base_filters.append(Product.categoria_id == category_id)
+        
+        total_count = db.query(func.count(Product.id)).filter(*base_filters).scalar()
+        
+        rows = db.query(
+            Product.id.label('product_id'),
+            Product.codigo,
+            Product.nombre,
+            Product.lote,
+            Product.cantidad,
+            Product.fecha_vencimiento,
+            Product.dias_para_vencer.label('dias_para_vencer'),
+            Product.categoria_id,
+            Product.country_id.label('pais_id')
+        ).filter(
+            *base_filters
+        ).order_by(
+            Product.fecha_vencimiento.asc(), Product.id.asc()
+        ).offset(offset).limit(limit).all()
+        
+        # Nombres de categoría y país desde la caché de referencia (sin joins)
+        reference = get_reference_data(db)
+        products = []
+        for row in rows:
+            values = dict(row._mapping)
+            categoria_id = values.pop("categoria_id")
+            pais_id = values.pop("pais_id")
+            values["categoria_nombre"] = reference.category_name(categoria_id, "")
+            values["pais_nombre"] = reference.country_name(pais_id, "")
+            values["pais_id"] = pais_id
+            products.append(values)
+        
+        return {
+            "products": products,
+            "total_count": total_count,
+            "dias": dias,
+            "page_info": {
+                "limit": limit,
+                "offset": offset,
+                "has_next": (offset + limit) < total_count,
+                "has_prev": offset > 0
+            }
+        }
+    
     @staticmethod
     def get_inventory_rotation_metrics(
         db: Session,
@@ -344,8 +421,6 @@ class ReportService:
         
         # Query para obtener productos con sus movimientos
         products_query = db.query(Product).options(
-            joinedload(Product.categoria),
-            joinedload(Product.country),
             joinedload(Product.movements)
         )
         
@@ -356,6 +431,7 @@ class ReportService:
             products_query = products_query.filter(Product.categoria_id == category_id)
         
         products = products_query.all()
+        reference = get_reference_data(db)
         
         rotation_data = []
         category_stats = defaultdict(lambda: {
@@ -429,7 +505,7 @@ class ReportService:
                 'product_id': product.id,
                 'product_code': product.codigo,
                 'product_name': product.nombre,
-                'category_name': product.categoria.name if product.categoria else 'Sin Categoría',
+                'category_name': reference.category_name(product.categoria_id, 'Sin Categoría'),
                 'current_stock': current_stock,
                 'total_entries': total_entries,
                 'total_exits': total_exits,
@@ -448,7 +524,7 @@ class ReportService:
             rotation_data.append(product_data)
             
             # Actualizar estadísticas por categoría
-            cat_name = product.categoria.name if product.categoria else 'Sin Categoría'
+            cat_name = reference.category_name(product.categoria_id, 'Sin Categoría')
             cat_stats = category_stats[cat_name]
             cat_stats['total_products'] += 1
             cat_stats['total_days'] += days_since_entry
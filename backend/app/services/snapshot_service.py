@@ -0,0 +1,251 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, text
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import date, datetime, time, timedelta
+
+from app.config.settings import settings
+from app.models.product import Product
+from app.models.category import Category
+from app.models.country import Country
+from app.models.stock_snapshot import StockSnapshot, SnapshotPeriod
+from app.services.archive_service import ArchiveService
+from app.utils.date_helpers import get_local_today
+
+# Lock de PostgreSQL de los cortes: con varios workers cada corte se escribe uno a la vez
+_SNAPSHOT_LOCK_KEY = 482_210_033
+
+class SnapshotService:
+    """
+    Saldos históricos de inventario.
+    El saldo a una fecha = último corte guardado + movimientos posteriores hasta esa fecha.
+    """
+
+    @staticmethod
+    def _inicio_del_dia(fecha: date) -> datetime:
+        return datetime.combine(fecha, time.min)
+
+    @staticmethod
+    def _es_fin_de_mes(fecha: date) -> bool:
+        return (fecha + timedelta(days=1)).day == 1
+
+    @staticmethod
+    def get_base_snapshot_date(db: Session, fecha_corte: date) -> Optional[date]:
+        """Fecha del corte guardado más cercano (anterior o igual) a fecha_corte"""
+        return db.query(func.max(StockSnapshot.fecha_corte)).filter(
+            StockSnapshot.fecha_corte <= fecha_corte
+        ).scalar()
+
+    @staticmethod
+    def _saldos_subquery(db: Session, fecha_corte: date, base: Optional[date]):
+        """
+        Subconsulta (product_id, cantidad) con el saldo al cierre de fecha_corte:
+        el saldo del corte `base` reemplazado por el último movimiento posterior, si lo hay.
+        """
+        limite = SnapshotService._inicio_del_dia(fecha_corte + timedelta(days=1))
+        inicio = SnapshotService._inicio_del_dia(base + timedelta(days=1)) if base is not None else None
+        source = ArchiveService.movement_source(db, inicio)
+
+        delta_query = db.query(
+            source.product_id,
+            source.cantidad_nueva,
+            func.row_number().over(
+                partition_by=source.product_id,
+                order_by=(source.fecha_movimiento.desc(), source.id.desc())
+            ).label("posicion")
+        ).filter(source.fecha_movimiento < limite)
+        if inicio is not None:
+            delta_query = delta_query.filter(source.fecha_movimiento >= inicio)
+        ultimo = delta_query.subquery()
+        delta = db.query(ultimo.c.product_id, ultimo.c.cantidad_nueva).filter(
+            ultimo.c.posicion == 1
+        ).subquery()
+
+        if base is None:
+            return db.query(
+                delta.c.product_id.label("product_id"),
+                delta.c.cantidad_nueva.label("cantidad")
+            ).subquery()
+
+        corte = db.query(StockSnapshot.product_id, StockSnapshot.cantidad).filter(
+            StockSnapshot.fecha_corte == base
+        ).subquery()
+
+        # Productos del corte y productos con movimientos nuevos (FULL JOIN portable)
+        product_ids = db.query(corte.c.product_id.label("product_id")).union(
+            db.query(delta.c.product_id)
+        ).subquery()
+
+        return db.query(
+            product_ids.c.product_id.label("product_id"),
+            func.coalesce(delta.c.cantidad_nueva, corte.c.cantidad, 0).label("cantidad")
+        ).outerjoin(
+            corte, corte.c.product_id == product_ids.c.product_id
+        ).outerjoin(
+            delta, delta.c.product_id == product_ids.c.product_id
+        ).subquery()
+
+    @staticmethod
+    def write_snapshot(
+        db: Session,
+        fecha_corte: date,
+        periodo: Optional[str] = None,
+        only_missing: bool = False
+    ) -> int:
+        """
+        Guardar (o reemplazar) el corte de saldos al cierre de fecha_corte.
+        Con only_missing no se reescribe un corte que ya existe (p. ej. escrito por otro worker).
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            # Se libera al confirmar; sin el lock dos workers chocan en uq_stock_snapshots_fecha_producto
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _SNAPSHOT_LOCK_KEY})
+        if only_missing and db.query(StockSnapshot.id).filter(StockSnapshot.fecha_corte == fecha_corte).first():
+            db.rollback()
+            return 0
+
+        if periodo is None:
+            periodo = SnapshotPeriod.MENSUAL if SnapshotService._es_fin_de_mes(fecha_corte) else SnapshotPeriod.DIARIO
+
+        # La base debe ser anterior para poder recalcular un corte existente
+        base = SnapshotService.get_base_snapshot_date(db, fecha_corte - timedelta(days=1))
+        saldos = SnapshotService._saldos_subquery(db, fecha_corte, base)
+        rows = [
+            {"fecha_corte": fecha_corte, "product_id": row.product_id, "cantidad": row.cantidad, "periodo": periodo}
+            for row in db.query(saldos.c.product_id, saldos.c.cantidad)
+        ]
+
+        db.query(StockSnapshot).filter(StockSnapshot.fecha_corte == fecha_corte).delete(synchronize_session=False)
+        if rows:
+            db.bulk_insert_mappings(StockSnapshot, rows)
+        db.commit()
+        return len(rows)
+
+    @staticmethod
+    def prune_daily_snapshots(db: Session, antes_de: date) -> int:
+        """Eliminar cortes diarios anteriores a una fecha (los de fin de mes se conservan)"""
+        deleted = db.query(StockSnapshot).filter(
+            StockSnapshot.periodo == SnapshotPeriod.DIARIO,
+            StockSnapshot.fecha_corte < antes_de
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+    @staticmethod
+    def ensure_snapshots(
+        db: Session,
+        hasta: Optional[date] = None,
+        desde: Optional[date] = None,
+        retention_days: Optional[int] = None,
+        prune: bool = True
+    ) -> Tuple[int, int]:
+        """
+        Completar los cortes faltantes hasta `hasta` (por defecto ayer).
+        Dentro de la ventana de retención se guarda un corte diario; antes, solo los de fin de mes.
+        Devuelve (cortes escritos, filas escritas).
+        """
+        hasta = hasta or get_local_today() - timedelta(days=1)
+        if retention_days is None:
+            retention_days = settings.SNAPSHOT_DAILY_RETENTION_DAYS
+        inicio_diarios = hasta - timedelta(days=retention_days)
+
+        only_missing = desde is None
+        if desde is None:
+            ultimo = db.query(func.max(StockSnapshot.fecha_corte)).scalar()
+            if ultimo is not None:
+                desde = ultimo + timedelta(days=1)
+            else:
+                source = ArchiveService.movement_source(db)
+                primer_movimiento = db.query(func.min(source.fecha_movimiento)).scalar()
+                if primer_movimiento is None:
+                    return 0, 0
+                desde = primer_movimiento.date()
+
+        cortes = filas = 0
+        fecha = desde
+        while fecha <= hasta:
+            if fecha > inicio_diarios or SnapshotService._es_fin_de_mes(fecha):
+                filas += SnapshotService.write_snapshot(db, fecha, only_missing=only_missing)
+                cortes += 1
+            fecha += timedelta(days=1)
+
+        if prune:
+            SnapshotService.prune_daily_snapshots(db, inicio_diarios)
+        return cortes, filas
+
+    @staticmethod
+    def run_scheduled_job() -> None:
+        """Tarea programada: completar cortes hasta ayer con una sesión propia"""
+        from app.config.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            cortes, filas = SnapshotService.ensure_snapshots(db)
+            print(f"[SNAPSHOTS] Cortes escritos: {cortes} ({filas} saldos)")
+        except Exception as e:
+            db.rollback()
+            print(f"[SNAPSHOTS] Error generando cortes de stock: {str(e)}")
+        finally:
+            db.close()
+
+    @staticmethod
+    def get_stock_at_date(
+        db: Session,
+        fecha_corte: date,
+        country_ids: Optional[List[int]] = None,
+        category_id: Optional[int] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """Saldo de cada producto al cierre de fecha_corte, con totales de cantidad y peso"""
+        base = SnapshotService.get_base_snapshot_date(db, fecha_corte)
+        saldos = SnapshotService._saldos_subquery(db, fecha_corte, base)
+
+        base_filters = []
+        if country_ids:
+            base_filters.append(Product.country_id.in_(country_ids))
+        if category_id:
+            base_filters.append(Product.categoria_id == category_id)
+
+        totals = db.query(
+            func.count(Product.id).label("total_count"),
+            func.coalesce(func.sum(saldos.c.cantidad), 0).label("total_cantidad"),
+            func.coalesce(func.sum(saldos.c.cantidad * Product.peso_unitario), 0).label("total_peso")
+        ).join(
+            saldos, saldos.c.product_id == Product.id
+        ).filter(*base_filters).one()
+
+        rows = db.query(
+            Product.id.label("product_id"),
+            Product.codigo,
+            Product.nombre,
+            Product.lote,
+            func.coalesce(Category.name, "").label("categoria_nombre"),
+            func.coalesce(Country.name, "").label("pais_nombre"),
+            Product.peso_unitario,
+            saldos.c.cantidad,
+            (saldos.c.cantidad * Product.peso_unitario).label("peso_total")
+        ).join(
+            saldos, saldos.c.product_id == Product.id
+        ).outerjoin(
+            Category, Product.categoria_id == Category.id
+        ).outerjoin(
+            Country, Product.country_id == Country.id
+        ).filter(
+            *base_filters
+        ).order_by(
+            Product.id.asc()
+        ).offset(offset).limit(limit).all()
+
+        return {
+            "fecha_corte": fecha_corte,
+            "snapshot_base": base,
+            "products": [dict(row._mapping) for row in rows],
+            "total_count": totals.total_count,
+            "total_cantidad": int(totals.total_cantidad),
+            "total_peso": round(float(totals.total_peso), 2),
+            "page_info": {
+                "limit": limit,
+                "offset": offset,
+                "has_next": (offset + limit) < totals.total_count,
+                "has_prev": offset > 0
+            }
+        }
@@ -1,5 +1,4 @@
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from typing import List, Optional, Dict, Any
 from fastapi import HTTPException, status
 
@@ -8,8 +7,7 @@ from app.models.role import Role
 from app.models.category import Category
 from app.repositories.user_repository import UserRepository
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.config.security import get_password_hash, verify_password
 
 class UserService:
     def __init__(self, db: Session):
@@ -18,11 +16,11 @@ class UserService:
     
     def get_password_hash(self, password: str) -> str:
         """Generar hash de contrase�a"""
-        return pwd_context.hash(password)
+        return get_password_hash(password)
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verificar contrase�a"""
-        return pwd_context.verify(plain_password, hashed_password)
+        return verify_password(plain_password, hashed_password)
     
     def create_user(self, user_data: UserCreate, created_by: Optional[int] = None) -> UserResponse:
         """Crear nuevo usuario con validaciones de negocio"""
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Utilidades de fechas en la zona horaria configurada y expresiones SQL de fechas.
+"""
+from datetime import date, datetime
+
+import pytz
+from sqlalchemy import Date, Integer, bindparam
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.config.settings import settings
+
+
+def get_local_now() -> datetime:
+    """Fecha y hora actual en settings.TIMEZONE, sin tzinfo (como se guarda en la BD)"""
+    try:
+        local_tz = pytz.timezone(settings.TIMEZONE)
+        return pytz.UTC.localize(datetime.utcnow()).astimezone(local_tz).replace(tzinfo=None)
+    except Exception as e:
+        print(f"Error getting timezone: {e}")
+        return datetime.now()
+
+
+def get_local_today() -> date:
+    """Fecha actual en settings.TIMEZONE"""
+    return get_local_now().date()
+
+
+def local_today_param():
+    """Parametro SQL con la fecha local, evaluado en cada ejecucion (compatible con cache de consultas)"""
+    return bindparam("hoy", callable_=get_local_today, type_=Date, unique=True)
+
+
+class dias_entre(FunctionElement):
+    """Dias enteros entre dos fechas (fecha_fin - fecha_inicio) en SQL"""
+    type = Integer()
+    name = "dias_entre"
+    inherit_cache = True
+
+
+@compiles(dias_entre)
+def _compile_dias_entre(element, compiler, **kw):
+    # PostgreSQL: date - date devuelve un entero de dias
+    fin, inicio = list(element.clauses)
+    return f"({compiler.process(fin, **kw)} - {compiler.process(inicio, **kw)})"
+
+
+@compiles(dias_entre, "sqlite")
+def _compile_dias_entre_sqlite(element, compiler, **kw):
+    fin, inicio = list(element.clauses)
+    return f"CAST(julianday({compiler.process(fin, **kw)}) - julianday({compiler.process(inicio, **kw)}) AS INTEGER)"
+
+
+def dias_hasta(fecha_columna):
+    """Expresion SQL: dias desde hoy (zona local) hasta la fecha indicada"""
+    return dias_entre(fecha_columna, local_today_param())
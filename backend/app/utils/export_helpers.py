@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Generadores para exportaciones en streaming (CSV y XLSX).
+
+Reciben un iterable de filas (listas/tuplas) para no materializar el
+resultado completo en memoria.
+"""
+import csv
+import io
+import tempfile
+from typing import Iterable, Iterator, Sequence
+
+from fastapi import HTTPException, status
+
+# Starlette agrega "; charset=utf-8" a los tipos text/*
+CSV_MEDIA_TYPE = "text/csv"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+_CHUNK_SIZE = 64 * 1024
+
+
+def iter_csv(header: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    """Generar CSV por bloques (con BOM para que Excel detecte UTF-8)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= _CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def require_xlsx_support() -> None:
+    """Validar que openpyxl este disponible antes de iniciar la respuesta"""
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La exportación XLSX requiere openpyxl instalado en el servidor"
+        )
+
+
+def iter_xlsx(header: Sequence[str], rows: Iterable[Sequence], sheet_title: str = "Datos") -> Iterator[bytes]:
+    """
+    Generar XLSX con openpyxl en modo write-only (memoria constante por fila).
+    El formato zip solo puede emitirse al final, por eso se escribe a un archivo temporal.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title[:31])
+    sheet.append(list(header))
+    for row in rows:
+        sheet.append(list(row))
+
+    with tempfile.TemporaryFile() as tmp:
+        workbook.save(tmp)
+        tmp.seek(0)
+        while True:
+            chunk = tmp.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def content_disposition(filename: str) -> dict:
+    """Header para descargar el archivo con el nombre indicado"""
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Cursores opacos para paginacion por llave (keyset) y totales estimados.
+
+El cursor codifica los valores de las columnas de orden de la ultima fila
+entregada, p. ej. (fecha_movimiento, id).
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+def encode_cursor(fecha: datetime, row_id: int) -> str:
+    """Codificar (fecha, id) como cursor opaco"""
+    payload = json.dumps([fecha.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decodificar un cursor generado por encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        fecha, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(fecha), int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
+
+
+def split_page(rows: list, limit: int) -> Tuple[list, bool]:
+    """Separar la fila extra pedida (limit + 1) para saber si hay mas paginas"""
+    has_more = len(rows) > limit
+    return rows[:limit], has_more
+
+
+def table_row_estimate(db: Session, table_name: str) -> Optional[int]:
+    """
+    Filas estimadas de una tabla segun las estadisticas de PostgreSQL (pg_class.reltuples).
+    En tablas particionadas se suman las particiones analizadas.
+    None si no hay estadisticas o el motor no es PostgreSQL.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return None
+    # reltuples = -1: tabla nunca analizada
+    estimate = db.execute(text(
+        "SELECT sum(c.reltuples) FILTER (WHERE c.reltuples >= 0) FROM pg_class c "
+        "WHERE (c.oid = to_regclass(:name) AND c.relkind <> 'p') "
+        "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(:name))"
+    ), {"name": table_name}).scalar()
+    return int(estimate) if estimate is not None else None
+
+
+class _ExplainJson(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) de una consulta; los parametros pasan por el procesamiento de SQLAlchemy"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_ExplainJson, "postgresql")
+def _compile_explain_json(element, compiler, **kw):
+    # Los parametros se compilan con la consulta: conservan su tipo (p. ej. Enum -> nombre)
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def query_row_estimate(db: Session, query) -> Optional[int]:
+    """Filas estimadas por el planificador para una consulta (EXPLAIN, sin ejecutarla)"""
+    if db.bind.dialect.name != "postgresql":
+        return None
+    try:
+        # En un savepoint: si EXPLAIN falla, la transacción de la petición sigue usable y se cuenta
+        with db.begin_nested():
+            plan = db.execute(_ExplainJson(query.statement)).scalar()
+    except SQLAlchemyError as e:
+        print(f"[PAGINATION] No se pudo estimar el total: {str(e)}")
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
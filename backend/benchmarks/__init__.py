@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks de servicios de inventario con datos sinteticos.
+
+Uso (desde backend/):
+    python -m benchmarks.run_benchmarks --database-url sqlite:///benchmarks.sqlite3
+    python -m benchmarks.run_benchmarks --compare benchmarks/baseline.json
+"""
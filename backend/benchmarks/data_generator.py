@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Generador de datos sinteticos usando los modelos reales.
+
+Crea N paises, M categorias, P productos y K movimientos por producto, con
+saldos encadenados (cantidad_anterior -> cantidad_nueva) igual que
+MovementService, para que los reportes trabajen sobre datos coherentes.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import List
+
+from sqlalchemy.orm import Session
+
+from app.models import Role, Country, Category, User, Product, Movement
+from app.models.movement import MovementType
+from app.models.product import refresh_alert_levels, refresh_expiry_buckets
+
+# Contrasena de los usuarios sinteticos (tambien la usan las pruebas de carga)
+DEFAULT_PASSWORD = "Benchmark123!"
+
+
+@dataclass
+class DatasetSpec:
+    """Tamano del conjunto de datos sintetico"""
+    countries: int = 5
+    categories: int = 8
+    products: int = 2000
+    movements_per_product: int = 20
+    history_days: int = 365
+    seed: int = 42
+
+
+@dataclass
+class DatasetInfo:
+    """Ids generados, utiles para parametrizar los benchmarks"""
+    country_ids: List[int] = field(default_factory=list)
+    category_ids: List[int] = field(default_factory=list)
+    product_ids: List[int] = field(default_factory=list)
+    admin_user_id: int = 0
+    user_ids: List[int] = field(default_factory=list)
+    total_movements: int = 0
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def generate_dataset(db: Session, spec: DatasetSpec, password_hash: str = "") -> DatasetInfo:
+    """Poblar la base de datos con datos sinteticos reproducibles"""
+    rng = random.Random(spec.seed)
+    info = DatasetInfo()
+    today = date.today()
+    now = datetime.now().replace(microsecond=0)
+
+    # Roles
+    roles = {}
+    for name in ("administrador", "user", "comercial"):
+        role = Role(name=name, description=f"Rol {name}", permissions=[])
+        db.add(role)
+        roles[name] = role
+    db.flush()
+
+    # Paises y categorias
+    countries = [Country(name=f"Pais {i + 1}", code=f"P{i + 1:02d}", is_active=True) for i in range(spec.countries)]
+    categories = [Category(name=f"Categoria {i + 1}", description="Sintetica", is_active=True) for i in range(spec.categories)]
+    db.add_all(countries + categories)
+    db.flush()
+    info.country_ids = [c.id for c in countries]
+    info.category_ids = [c.id for c in categories]
+
+    # Usuarios: un administrador y un usuario/comercial por pais
+    admin = User(
+        email="admin@benchmark-muestras.com", password_hash=password_hash, first_name="Admin",
+        last_name="Benchmark", is_active=True, role_id=roles["administrador"].id
+    )
+    db.add(admin)
+    db.flush()
+    info.admin_user_id = admin.id
+
+    for country in countries:
+        operador = User(
+            email=f"user.{country.code.lower()}@benchmark-muestras.com", password_hash=password_hash,
+            first_name="Usuario", last_name=country.code, is_active=True,
+            role_id=roles["user"].id, country_id=country.id, created_by=admin.id
+        )
+        operador.assigned_countries = [country]
+        db.add(operador)
+    comercial = User(
+        email="comercial@benchmark-muestras.com", password_hash=password_hash, first_name="Comercial",
+        last_name="Benchmark", is_active=True, role_id=roles["comercial"].id,
+        country_id=countries[0].id, created_by=admin.id
+    )
+    comercial.assigned_countries = list(countries)
+    db.add(comercial)
+    db.flush()
+    info.user_ids = [admin.id, comercial.id]
+
+    # Productos
+    product_rows = []
+    for i in range(spec.products):
+        country = countries[i % len(countries)]
+        cantidad_inicial = rng.randint(1, 200)
+        peso_unitario = round(rng.uniform(0.1, 25.0), 2)
+        product_rows.append({
+            "codigo": f"{country.code}{i + 1:09d}",
+            "nombre": f"Muestra {rng.choice(['Resina', 'Solvente', 'Pigmento', 'Aditivo', 'Polimero'])} {i + 1}",
+            "lote": f"L{rng.randint(1000, 9999)}",
+            "cantidad": cantidad_inicial,
+            "peso_unitario": peso_unitario,
+            "peso_total": round(peso_unitario * cantidad_inicial, 2),
+            "fecha_registro": today - timedelta(days=rng.randint(0, spec.history_days)),
+            "fecha_vencimiento": today + timedelta(days=rng.randint(-120, 540)),
+            "proveedor": f"Proveedor {rng.randint(1, 50)}",
+            "responsable": f"Responsable {rng.randint(1, 20)}",
+            "comentarios": None,
+            "categoria_id": rng.choice(info.category_ids),
+            "country_id": country.id,
+            "created_by": admin.id,
+        })
+    for chunk in _chunks(product_rows, 1000):
+        db.bulk_insert_mappings(Product, chunk)
+    db.flush()
+
+    products = db.query(Product.id, Product.cantidad).order_by(Product.id).all()
+    info.product_ids = [p.id for p in products]
+
+    # Movimientos encadenados por producto; el saldo final se guarda en el producto
+    movement_rows = []
+    final_stock = []
+    for product_id, cantidad_inicial in products:
+        saldo = cantidad_inicial
+        fecha = now - timedelta(days=spec.history_days)
+        step = timedelta(seconds=max(1, spec.history_days * 86400 // max(1, spec.movements_per_product)))
+        movement_rows.append({
+            "tipo": MovementType.INICIAL, "cantidad": saldo, "cantidad_anterior": 0,
+            "cantidad_nueva": saldo, "responsable": "Sistema", "motivo": "Stock inicial",
+            "fecha_movimiento": fecha, "product_id": product_id, "user_id": admin.id,
+        })
+        for _ in range(max(0, spec.movements_per_product - 1)):
+            fecha = fecha + step - timedelta(seconds=rng.randint(0, 60))
+            roll = rng.random()
+            if roll < 0.45 or saldo == 0:
+                tipo, cantidad = MovementType.ENTRADA, rng.randint(1, 50)
+                nuevo = saldo + cantidad
+            elif roll < 0.9:
+                tipo, cantidad = MovementType.SALIDA, rng.randint(1, saldo)
+                nuevo = saldo - cantidad
+            else:
+                tipo, nuevo = MovementType.AJUSTE, max(0, saldo + rng.randint(-5, 5))
+                cantidad = abs(nuevo - saldo)
+            movement_rows.append({
+                "tipo": tipo, "cantidad": cantidad, "cantidad_anterior": saldo,
+                "cantidad_nueva": nuevo, "responsable": f"Responsable {rng.randint(1, 20)}",
+                "motivo": f"Movimiento {tipo.value.lower()}", "fecha_movimiento": fecha,
+                "product_id": product_id, "user_id": admin.id,
+            })
+            saldo = nuevo
+        final_stock.append({"id": product_id, "cantidad": saldo})
+
+    for chunk in _chunks(movement_rows, 5000):
+        db.bulk_insert_mappings(Movement, chunk)
+    for chunk in _chunks(final_stock, 1000):
+        db.bulk_update_mappings(Product, chunk)
+    # Las operaciones bulk no pasan por before_flush: niveles de alerta y estados de
+    # vencimiento en bloque, como el bootstrap
+    refresh_alert_levels(db)
+    refresh_expiry_buckets(db)
+    db.commit()
+
+    info.total_movements = len(movement_rows)
+    return info
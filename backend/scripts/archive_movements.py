@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para archivar movimientos antiguos en movements_archive
+
+Ejemplos (desde backend/):
+    python scripts/archive_movements.py --dry-run
+    python scripts/archive_movements.py --dias 365
+"""
+
+import argparse
+import sys
+import os
+import time
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.database import engine, SessionLocal
+from app.config.settings import settings
+from app.models import base
+from app.core.session_listeners import register_session_listeners
+from app.services.archive_service import ArchiveService
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Archivar movimientos antiguos")
+    parser.add_argument("--dias", type=int, default=settings.ARCHIVE_HORIZON_DAYS, help="Archivar movimientos con mas de N dias")
+    parser.add_argument("--lote", type=int, default=settings.ARCHIVE_BATCH_SIZE, help="Movimientos por transaccion")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar los movimientos a archivar")
+    return parser.parse_args()
+
+def archive_movements():
+    """Archivar movimientos anteriores al horizonte"""
+    args = parse_args()
+
+    # Crear las tablas de archivo si no existen
+    base.BaseModel.metadata.create_all(bind=engine)
+    # Los procesos de la API ven los movimientos borrados (versiones para ETag)
+    register_session_listeners()
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        result = ArchiveService.archive_movements(db, args.dias, args.lote, args.dry_run)
+        print(f"Horizonte: {result['cutoff']}")
+        print(f"Movimientos anteriores al horizonte: {result['pending']}")
+        if not args.dry_run:
+            print(f"Movimientos archivados: {result['archived']} en {time.perf_counter() - start:.1f}s")
+
+    except Exception as e:
+        db.rollback()
+        print(f"Error archivando movimientos: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    archive_movements()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para generar cortes de stock historicos a partir de los movimientos
+
+Ejemplos (desde backend/):
+    python scripts/backfill_snapshots.py
+    python scripts/backfill_snapshots.py --desde 2025-01-01 --hasta 2025-06-30
+    python scripts/backfill_snapshots.py --solo-mensual --reconstruir
+"""
+
+import argparse
+import sys
+import os
+import time
+from datetime import date
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.database import engine, SessionLocal
+from app.config.settings import settings
+from app.models import base
+from app.models.stock_snapshot import StockSnapshot
+from app.services.snapshot_service import SnapshotService
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generar cortes de stock historicos")
+    parser.add_argument("--desde", type=date.fromisoformat, help="Primera fecha (por defecto: primer movimiento o ultimo corte)")
+    parser.add_argument("--hasta", type=date.fromisoformat, help="Ultima fecha (por defecto: ayer)")
+    parser.add_argument("--solo-mensual", action="store_true", help="Generar solo cortes de fin de mes")
+    parser.add_argument("--reconstruir", action="store_true", help="Eliminar los cortes existentes del rango antes de generar")
+    parser.add_argument(
+        "--retencion-dias", type=int, default=settings.SNAPSHOT_DAILY_RETENTION_DAYS,
+        help="Dias con corte diario antes de --hasta (los anteriores solo de fin de mes)"
+    )
+    return parser.parse_args()
+
+def backfill_snapshots():
+    """Generar cortes de stock para el rango indicado"""
+    args = parse_args()
+
+    # Crear la tabla si no existe
+    base.BaseModel.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        if args.reconstruir:
+            query = db.query(StockSnapshot)
+            if args.desde:
+                query = query.filter(StockSnapshot.fecha_corte >= args.desde)
+            if args.hasta:
+                query = query.filter(StockSnapshot.fecha_corte <= args.hasta)
+            eliminados = query.delete(synchronize_session=False)
+            db.commit()
+            print(f"Cortes eliminados: {eliminados}")
+
+        hasta = args.hasta
+        retencion = 0 if args.solo_mensual else args.retencion_dias
+
+        start = time.perf_counter()
+        cortes, filas = SnapshotService.ensure_snapshots(
+            db, hasta=hasta, desde=args.desde, retention_days=retencion,
+            prune=not args.solo_mensual
+        )
+        print(f"Cortes generados: {cortes} ({filas} saldos) en {time.perf_counter() - start:.1f}s")
+
+    except Exception as e:
+        db.rollback()
+        print(f"Error generando cortes: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    backfill_snapshots()
@@ -10,9 +10,8 @@ import os
 # Agregar el directorio padre al path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.config.database import engine, SessionLocal
-from app.models import base
-from app.db.seeds.countries import seed_countries
+from app.config.database import engine
+from app.db.bootstrap import StepTimer, initialize_database
 
 def init_database():
     """Inicializar la base de datos con datos semilla"""
@@ -20,22 +19,16 @@ def init_database():
     print("Iniciando inicializacion de la base de datos...")
     
     try:
-        # Crear todas las tablas
-        print("Creando tablas de la base de datos...")
-        base.BaseModel.metadata.create_all(bind=engine)
-        print("Tablas creadas exitosamente")
-        
-        # Ejecutar seeds
-        print("\nEjecutando seeds de datos...")
-        
-        # 1. Paises
-        print("1. Seeding paises...")
-        seed_countries()
+        # Crear tablas, columnas e indices y ejecutar seeds (siempre, aunque la huella coincida)
+        print("Sincronizando esquema y seeds...")
+        timer = StepTimer()
+        initialize_database(engine, timer, force=True)
+        print(f"Tiempos: {timer.summary()}")
         
         print("\nBase de datos inicializada exitosamente!")
         print("\nResumen:")
         print("   Tablas creadas")
-        print("   Paises cargados (incluyendo Republica Dominicana y Panama)")
+        print("   Paises, roles y usuario administrador cargados")
         
         # Mostrar informacion de conexion
         print("\nInformacion de conexion:")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script para administrar el particionado mensual de movements (PostgreSQL)
+
+Ejemplos (desde backend/):
+    python scripts/partition_movements.py convert
+    python scripts/partition_movements.py convert --drop-legacy
+    python scripts/partition_movements.py ensure --meses 6
+    python scripts/partition_movements.py list
+    python scripts/partition_movements.py detach 2024-01
+"""
+
+import argparse
+import sys
+import os
+from datetime import date, datetime
+
+# Agregar el directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.database import engine
+from app.config.settings import settings
+from app.db import partitioning
+
+def parse_month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Particionado mensual de la tabla movements")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="Convertir movements en tabla particionada por mes")
+    convert.add_argument("--meses", type=int, default=settings.MOVEMENT_PARTITION_MONTHS_AHEAD, help="Meses futuros a crear")
+    convert.add_argument("--drop-legacy", action="store_true", help="Eliminar la tabla original despues de copiar")
+
+    ensure = subparsers.add_parser("ensure", help="Crear las particiones de los meses siguientes")
+    ensure.add_argument("--meses", type=int, default=settings.MOVEMENT_PARTITION_MONTHS_AHEAD)
+
+    subparsers.add_parser("list", help="Listar particiones")
+
+    detach = subparsers.add_parser("detach", help="Separar la particion de un mes (YYYY-MM)")
+    detach.add_argument("mes", type=parse_month)
+    detach.add_argument("--drop", action="store_true", help="Eliminar la tabla separada")
+
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    if not partitioning.is_postgresql(engine):
+        print("El particionado solo esta disponible en PostgreSQL")
+        sys.exit(1)
+
+    try:
+        if args.command == "convert":
+            print("Convirtiendo movements en tabla particionada...")
+            result = partitioning.convert_movements_to_partitioned(engine, args.meses, args.drop_legacy)
+            print(f"Movimientos copiados: {result['movements']}")
+            print(f"Particiones mensuales: {result['partitions']}")
+            if result["legacy_table"]:
+                print(f"Tabla original conservada como {result['legacy_table']} (eliminar cuando se verifique)")
+
+        elif args.command == "ensure":
+            created = partitioning.ensure_future_partitions(engine, args.meses)
+            print(f"Particiones creadas: {len(created)}")
+
+        elif args.command == "list":
+            if not partitioning.is_partitioned(engine):
+                print("La tabla movements no esta particionada")
+                return
+            for name, bounds in partitioning.list_partitions(engine):
+                print(f"   {name:<30} {bounds}")
+
+        elif args.command == "detach":
+            name = partitioning.detach_partition(engine, args.mes, args.drop)
+            if name is None:
+                print("No existe particion para ese mes")
+            else:
+                print(f"Particion {name} {'eliminada' if args.drop else 'separada'}")
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
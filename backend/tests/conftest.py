@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Fixtures de las pruebas: base SQLite en memoria con el esquema de los modelos,
+un catálogo mínimo (roles, países, categoría, usuarios) y un cliente HTTP de la
+API que usa esa base en lugar de la configurada.
+
+Con TEST_DATABASE_URL=postgresql://... las pruebas corren sobre PostgreSQL, cada
+una en un esquema temporal; las que dependen de PostgreSQL (EXPLAIN, particiones,
+advisory locks) se omiten sobre SQLite.
+"""
+import os
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config.security import create_access_token
+from app.core import reference_cache, token_cache
+from app.core.session_listeners import register_session_listeners
+from app.db.seeds.data_versions import seed_data_versions
+from app.models import BaseModel, Role, Country, Category, User, Product, Movement
+from app.models.movement import MovementType
+from app.utils.date_helpers import get_local_today
+
+register_session_listeners()
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+def engine():
+    if TEST_DATABASE_URL:
+        schema = f"pruebas_{uuid.uuid4().hex[:12]}"
+        admin_engine = create_engine(TEST_DATABASE_URL)
+        with admin_engine.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA {schema}"))
+        engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-csearch_path={schema}"})
+    else:
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+    BaseModel.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        seed_data_versions(conn)
+    yield engine
+    engine.dispose()
+    if TEST_DATABASE_URL:
+        with admin_engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        admin_engine.dispose()
+
+
+@pytest.fixture
+def postgresql(engine):
+    """Omitir la prueba si la base de pruebas no es PostgreSQL"""
+    if engine.dialect.name != "postgresql":
+        pytest.skip("requiere TEST_DATABASE_URL con PostgreSQL")
+    return engine
+
+
+@pytest.fixture
+def session_factory(engine):
+    # Las cachés del proceso no deben arrastrar datos de otra prueba
+    reference_cache.invalidate()
+    with token_cache._lock:
+        token_cache._tokens.clear()
+        token_cache._token_states.clear()
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def catalog(db):
+    """Roles, dos países, una categoría con umbrales, un administrador y un usuario del país 1"""
+    roles = {name: Role(name=name, description=name, permissions=[]) for name in ("administrador", "user", "comercial")}
+    countries = [Country(name="Pais 1", code="P01", is_active=True), Country(name="Pais 2", code="P02", is_active=True)]
+    category = Category(name="Resinas", description="Pruebas", is_active=True, stock_minimo=10, stock_critico=5)
+    db.add_all([*roles.values(), *countries, category])
+    db.flush()
+
+    admin = User(
+        email="admin@pruebas.com", password_hash="x", first_name="Admin", last_name="Pruebas",
+        is_active=True, role_id=roles["administrador"].id
+    )
+    operador = User(
+        email="user@pruebas.com", password_hash="x", first_name="Usuario", last_name="Pruebas",
+        is_active=True, role_id=roles["user"].id, country_id=countries[0].id
+    )
+    operador.assigned_countries = [countries[0]]
+    db.add_all([admin, operador])
+    db.commit()
+    return SimpleNamespace(roles=roles, countries=countries, category=category, admin=admin, user=operador)
+
+
+@pytest.fixture
+def make_product(db, catalog):
+    """Crear un producto del país 1 por el ORM (pasa por los listeners de la sesión)"""
+    counter = iter(range(1, 10_000))
+
+    def factory(cantidad: int = 50, dias_para_vencer: int = 200, **values) -> Product:
+        numero = next(counter)
+        fields = dict(
+            codigo=f"P01{numero:09d}", nombre=f"Muestra {numero}", lote="L1", cantidad=cantidad,
+            peso_unitario=1.0, peso_total=float(cantidad), fecha_registro=get_local_today(),
+            fecha_vencimiento=get_local_today() + timedelta(days=dias_para_vencer),
+            proveedor="Proveedor", responsable="Responsable",
+            categoria_id=catalog.category.id, country_id=catalog.countries[0].id, created_by=catalog.admin.id
+        )
+        fields.update(values)
+        product = Product(**fields)
+        db.add(product)
+        db.commit()
+        return product
+
+    return factory
+
+
+@pytest.fixture
+def make_movements(db, catalog):
+    """
+    Historial de un producto por el ORM: [(días atrás, tipo, cantidad)] en orden
+    cronológico, con saldos encadenados; deja en el producto el saldo final
+    """
+    def factory(product: Product, history, user: Optional[User] = None) -> List[Movement]:
+        ahora = datetime.now().replace(microsecond=0)
+        saldo = 0
+        movements = []
+        for dias, tipo, cantidad in history:
+            nuevo = cantidad if tipo == MovementType.AJUSTE else saldo + (-cantidad if tipo == MovementType.SALIDA else cantidad)
+            movements.append(Movement(
+                tipo=tipo, cantidad=cantidad, cantidad_anterior=saldo, cantidad_nueva=nuevo,
+                responsable="Responsable", motivo=f"{tipo.value} {len(movements) + 1}",
+                fecha_movimiento=ahora - timedelta(days=dias),
+                product_id=product.id, user_id=(user or catalog.admin).id
+            ))
+            saldo = nuevo
+        db.add_all(movements)
+        product.cantidad = saldo
+        db.commit()
+        return movements
+
+    return factory
+
+
+@pytest.fixture
+def client(session_factory):
+    """Cliente de la API sobre la base de pruebas (sin el startup: no toca la base configurada)"""
+    from fastapi.testclient import TestClient
+    from app.config.database import get_db
+    from app.main import app
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def auth_headers():
+    """Cabecera Authorization con un token emitido con los datos actuales del usuario"""
+    def factory(user: User) -> dict:
+        token = create_access_token({
+            "sub": user.email,
+            "user_id": user.id,
+            "role": user.role.name,
+            "country_id": user.country_id,
+            "category_id": user.category_id,
+            "country_ids": user.country_ids,
+            "ver": user.token_version or 0,
+        })
+        return {"Authorization": f"Bearer {token}"}
+
+    return factory
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""GET condicional: ETag por versión de datos, 304 con If-None-Match y cambio al escribir"""
+from app.config.settings import settings
+from app.models import Country
+
+COUNTRIES_URL = f"{settings.API_V1_PREFIX}/countries/"
+REPORT_URL = f"{settings.API_V1_PREFIX}/reports/commercial/stock-by-category"
+
+
+def test_matching_etag_returns_304(client, catalog):
+    response = client.get(COUNTRIES_URL)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    not_modified = client.get(COUNTRIES_URL, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    assert not_modified.content == b""
+
+    # Los compresores y proxies pueden devolver el ETag como débil
+    assert client.get(COUNTRIES_URL, headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+
+def test_etag_depends_on_query_parameters(client, catalog):
+    etag = client.get(COUNTRIES_URL).headers["ETag"]
+    response = client.get(COUNTRIES_URL, params={"active_only": True}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_write_changes_etag(client, session_factory, catalog):
+    etag = client.get(COUNTRIES_URL).headers["ETag"]
+
+    session = session_factory()
+    session.add(Country(name="Pais 3", code="P03", is_active=True))
+    session.commit()
+    session.close()
+
+    response = client.get(COUNTRIES_URL, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 3
+
+
+def test_report_etag_depends_on_user_scope(client, catalog, auth_headers, make_product):
+    make_product()
+    admin = client.get(REPORT_URL, headers=auth_headers(catalog.admin))
+    user = client.get(REPORT_URL, headers=auth_headers(catalog.user))
+    assert admin.status_code == user.status_code == 200
+    assert admin.headers["ETag"] != user.headers["ETag"]
+
+    # El ETag de otro alcance no sirve para obtener un 304
+    headers = {**auth_headers(catalog.user), "If-None-Match": admin.headers["ETag"]}
+    assert client.get(REPORT_URL, headers=headers).status_code == 200
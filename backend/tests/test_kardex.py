@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""Kardex paginado: saldo inicial del rango, cursor cronológico y exportación en streaming"""
+import csv
+import io
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.config.settings import settings
+from app.models.movement import MovementType
+from app.services.movement_service import MovementService
+from app.utils.pagination import decode_cursor, encode_cursor
+
+KARDEX_URL = f"{settings.API_V1_PREFIX}/movements/kardex"
+
+# 10 movimientos, uno cada 10 días; saldo final 53
+HISTORY = [(100, MovementType.INICIAL, 50)] + [
+    (dias, MovementType.SALIDA if dias % 20 else MovementType.ENTRADA, 3) for dias in range(90, 10, -10)
+] + [(5, MovementType.AJUSTE, 53)]
+
+
+@pytest.fixture
+def product(make_product, make_movements):
+    product = make_product(cantidad=0)
+    make_movements(product, HISTORY)
+    return product
+
+
+def test_cursor_round_trip():
+    fecha = datetime(2026, 3, 14, 15, 9, 26, 535000)
+    assert decode_cursor(encode_cursor(fecha, 42)) == (fecha, 42)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("no-es-un-cursor")
+    assert error.value.status_code == 400
+
+
+def test_page_starts_with_range_opening_balance(db, product):
+    fecha_desde = datetime.now() - timedelta(days=55)
+    page = MovementService.get_kardex_page(db, product.id, fecha_desde=fecha_desde)
+
+    # Antes del rango: inicial 50, salidas a 90/70 días y entradas a 80/60 días
+    assert page["saldo_inicial"] == 50
+    assert page["saldo_actual"] == 53
+    assert [m.cantidad_anterior for m in page["movimientos"]][0] == page["saldo_inicial"]
+    assert page["movimientos"][-1].saldo == 53
+    assert not page["has_more"] and page["next_cursor"] is None
+
+
+def test_cursor_pages_follow_chronological_order(db, product):
+    ids, cursor = [], None
+    while True:
+        page = MovementService.get_kardex_page(db, product.id, cursor=cursor, limit=3)
+        ids.extend(m.id for m in page["movimientos"])
+        if not page["has_more"]:
+            break
+        cursor = page["next_cursor"]
+
+    full = MovementService.get_kardex_page(db, product.id, limit=100)
+    assert ids == [m.id for m in full["movimientos"]]
+    assert len(ids) == len(HISTORY)
+    assert [m.fecha for m in full["movimientos"]] == sorted(m.fecha for m in full["movimientos"])
+
+
+def test_page_is_scoped_to_user_countries(client, catalog, auth_headers, make_product, make_movements):
+    ajeno = make_product(country_id=catalog.countries[1].id)
+    make_movements(ajeno, HISTORY[:2])
+
+    response = client.get(f"{KARDEX_URL}/{ajeno.id}/page", headers=auth_headers(catalog.user))
+    assert response.status_code == 404
+    assert client.get(f"{KARDEX_URL}/{ajeno.id}/page", headers=auth_headers(catalog.admin)).status_code == 200
+
+
+def test_csv_export_streams_opening_balance_and_rows(client, catalog, auth_headers, product):
+    fecha_desde = (datetime.now() - timedelta(days=55)).replace(microsecond=0)
+    response = client.get(
+        f"{KARDEX_URL}/{product.id}/export",
+        params={"formato": "csv", "fecha_desde": fecha_desde.isoformat()},
+        headers=auth_headers(catalog.user)
+    )
+    assert response.status_code == 200
+    assert f"kardex_{product.codigo}.csv" in response.headers["content-disposition"]
+
+    rows = list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert rows[0][0] == "Fecha"
+    assert rows[1][1:] == ["SALDO INICIAL", "", "", "", "", "50", ""]
+    assert len(rows) == 2 + 5
+    assert rows[-1][6] == "53"
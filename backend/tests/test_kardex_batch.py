@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Kardex en lote: NDJSON con una línea por producto, saldos iniciales y alcance del usuario"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config.settings import settings
+from app.models.movement import MovementType
+
+BATCH_URL = f"{settings.API_V1_PREFIX}/movements/kardex/batch"
+
+
+@pytest.fixture
+def products(catalog, make_product, make_movements):
+    """Tres productos del país 1 (uno sin movimientos) y uno del país 2"""
+    propios = [make_product(cantidad=0) for _ in range(3)]
+    make_movements(propios[0], [(40, MovementType.INICIAL, 10), (20, MovementType.ENTRADA, 5), (2, MovementType.SALIDA, 4)])
+    make_movements(propios[1], [(30, MovementType.INICIAL, 7), (1, MovementType.AJUSTE, 9)])
+    ajeno = make_product(cantidad=0, country_id=catalog.countries[1].id)
+    make_movements(ajeno, [(10, MovementType.INICIAL, 3)])
+    return propios + [ajeno]
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_batch_streams_one_line_per_product(client, catalog, auth_headers, products):
+    fecha_desde = (datetime.now() - timedelta(days=10)).isoformat()
+    response = client.post(
+        BATCH_URL, json={"categoria_id": catalog.category.id, "fecha_desde": fecha_desde},
+        headers=auth_headers(catalog.user)
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    # El usuario solo ve los productos de su país
+    assert response.headers["X-Total-Products"] == "3"
+
+    lines = _lines(response)
+    assert [line["product_id"] for line in lines] == [product.id for product in products[:3]]
+
+    primero, segundo, sin_movimientos = lines
+    assert primero["saldo_inicial"] == 15 and primero["saldo_actual"] == 11
+    assert [m["tipo"] for m in primero["movimientos"]] == ["SALIDA"]
+    assert primero["fecha_desde"] == fecha_desde
+    assert segundo["saldo_inicial"] == 7 and [m["saldo"] for m in segundo["movimientos"]] == [9]
+    assert sin_movimientos["saldo_inicial"] == 0 and sin_movimientos["movimientos"] == []
+
+
+def test_batch_matches_single_product_kardex(client, catalog, auth_headers, products):
+    headers = auth_headers(catalog.admin)
+    lines = _lines(client.post(BATCH_URL, json={"product_ids": [p.id for p in products]}, headers=headers))
+    assert len(lines) == 4
+
+    for line in lines:
+        single = client.get(f"{settings.API_V1_PREFIX}/movements/kardex/{line['product_id']}/page", headers=headers).json()
+        assert [m["id"] for m in line["movimientos"]] == [m["id"] for m in single["movimientos"]]
+
+
+def test_batch_requires_a_product_filter(client, catalog, auth_headers):
+    response = client.post(BATCH_URL, json={}, headers=auth_headers(catalog.admin))
+    assert response.status_code == 400
+
+
+def test_batch_rejects_requests_over_the_product_limit(client, catalog, auth_headers, products, monkeypatch):
+    monkeypatch.setattr(settings, "KARDEX_BATCH_MAX_PRODUCTS", 2)
+    response = client.post(BATCH_URL, json={"categoria_id": catalog.category.id}, headers=auth_headers(catalog.admin))
+    assert response.status_code == 400
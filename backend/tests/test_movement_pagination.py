@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Listado de movimientos: paginación por cursor, conteo y lectura del archivo"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.models import Movement
+from app.models.movement import MovementType
+from app.schemas.movement import MovementFilters
+from app.services.archive_service import ArchiveService
+from app.services.movement_service import MovementService
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def movements(db, catalog, make_product):
+    """30 movimientos de un producto en los últimos 300 días, dos por fecha (desempate por id)"""
+    product = make_product(cantidad=0)
+    inicio = datetime.now().replace(microsecond=0) - timedelta(days=300)
+    saldo = 0
+    for numero in range(30):
+        fecha = inicio + timedelta(days=20 * (numero // 2))
+        db.add(Movement(
+            tipo=MovementType.ENTRADA, cantidad=1, cantidad_anterior=saldo, cantidad_nueva=saldo + 1,
+            responsable="Responsable", motivo=f"Entrada {numero}", fecha_movimiento=fecha,
+            product_id=product.id, user_id=catalog.admin.id
+        ))
+        saldo += 1
+    db.commit()
+    ordered = db.query(Movement.id, Movement.fecha_movimiento).order_by(
+        Movement.fecha_movimiento.desc(), Movement.id.desc()
+    ).all()
+    return [row.id for row in ordered]
+
+
+def _all_pages(db, limit: int, **kwargs):
+    ids, cursor, pages = [], None, 0
+    while True:
+        page = MovementService.get_movements_page(db, MovementFilters(**kwargs), limit, cursor=cursor)
+        ids.extend(item.id for item in page["items"])
+        pages += 1
+        if not page["has_more"]:
+            assert page["next_cursor"] is None
+            return ids, pages
+        cursor = page["next_cursor"]
+
+
+def test_cursor_round_trip():
+    fecha = datetime(2026, 3, 14, 15, 9, 26, 535000)
+    assert decode_cursor(encode_cursor(fecha, 42)) == (fecha, 42)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("no-es-un-cursor")
+    assert error.value.status_code == 400
+
+
+def test_keyset_pages_follow_list_order(db, movements):
+    ids, pages = _all_pages(db, limit=7)
+    assert ids == movements
+    assert pages == 5
+
+
+def test_cursor_pages_match_offset_pages(db, movements):
+    first = MovementService.get_movements_page(db, MovementFilters(), 10)
+    by_cursor = MovementService.get_movements_page(db, MovementFilters(), 10, cursor=first["next_cursor"])
+    by_offset = MovementService.get_movements_page(db, MovementFilters(), 10, skip=10)
+    assert [item.id for item in by_cursor["items"]] == [item.id for item in by_offset["items"]]
+
+
+def test_pages_continue_into_archive(db, movements):
+    result = ArchiveService.archive_movements(db, horizon_days=150, batch_size=4)
+    assert 0 < result["archived"] < len(movements)
+    assert db.query(Movement).count() == len(movements) - result["archived"]
+
+    # El listado recorre movements y después el archivo sin saltos ni duplicados
+    ids, _ = _all_pages(db, limit=7)
+    assert ids == movements
+
+    total, estimated = MovementService.count_movements(db, MovementFilters(), exact=True)
+    assert (total, estimated) == (len(movements), False)
+
+
+def test_range_after_archive_cutoff_reads_only_movements(db, movements):
+    result = ArchiveService.archive_movements(db, horizon_days=150)
+    fecha_desde = result["cutoff"]
+
+    ids, _ = _all_pages(db, limit=50, fecha_desde=fecha_desde)
+    assert ids == movements[:len(movements) - result["archived"]]
+
+    total, _ = MovementService.count_movements(db, MovementFilters(fecha_desde=fecha_desde), exact=True)
+    assert total == len(movements) - result["archived"]
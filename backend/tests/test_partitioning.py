@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Particionado mensual de movements (solo PostgreSQL): conversión, particiones futuras y tabla original"""
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app.db import partitioning
+from app.models import Movement, Product
+from app.models.movement import MovementType
+from app.utils.date_helpers import get_local_today
+
+
+@pytest.fixture
+def history(catalog, make_product, make_movements):
+    product = make_product(cantidad=0)
+    make_movements(product, [(120, MovementType.INICIAL, 10), (60, MovementType.ENTRADA, 5), (1, MovementType.SALIDA, 2)])
+    return product
+
+
+def _foreign_keys(conn, table_name: str) -> list:
+    return conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:name AS regclass) AND contype = 'f'"
+    ), {"name": table_name}).scalars().all()
+
+
+def test_conversion_copies_rows_into_monthly_partitions(postgresql, db, history):
+    result = partitioning.convert_movements_to_partitioned(postgresql, months_ahead=2)
+    assert result["movements"] == 3
+    assert result["legacy_table"] == partitioning.LEGACY_TABLE_NAME
+    assert partitioning.is_partitioned(postgresql)
+
+    names = [name for name, _ in partitioning.list_partitions(postgresql)]
+    assert partitioning.partition_name(date(get_local_today().year, get_local_today().month, 1)) in names
+    assert partitioning.DEFAULT_PARTITION_NAME in names
+    assert db.query(Movement).count() == 3
+
+    # Las particiones de los meses siguientes ya existen: no se crea ninguna
+    assert partitioning.ensure_future_partitions(postgresql, months_ahead=2) == []
+    with pytest.raises(RuntimeError):
+        partitioning.convert_movements_to_partitioned(postgresql)
+
+
+def test_legacy_table_does_not_block_deletes(postgresql, db, catalog, history):
+    partitioning.convert_movements_to_partitioned(postgresql)
+    with postgresql.connect() as conn:
+        assert _foreign_keys(conn, partitioning.LEGACY_TABLE_NAME) == []
+        assert len(_foreign_keys(conn, partitioning.TABLE_NAME)) == 2
+
+    # El producto se elimina con sus movimientos aunque la tabla original conserve copias
+    db.delete(db.get(Product, history.id))
+    db.commit()
+    assert db.query(Movement).count() == 0
+
+
+def test_detached_partition_keeps_rows_without_foreign_keys(postgresql, db, history):
+    partitioning.convert_movements_to_partitioned(postgresql, drop_legacy=True)
+    month = next(m.fecha_movimiento.date() for m in db.query(Movement).order_by(Movement.fecha_movimiento))
+    # DETACH necesita que ninguna transacción tenga abierta la tabla
+    db.commit()
+
+    name = partitioning.detach_partition(postgresql, month)
+    assert name == partitioning.partition_name(date(month.year, month.month, 1))
+    with postgresql.connect() as conn:
+        assert _foreign_keys(conn, name) == []
+        assert conn.execute(text(f'SELECT count(*) FROM "{name}"')).scalar() == 1
+    assert db.query(Movement).count() == 2
+    db.commit()
+    assert partitioning.detach_partition(postgresql, month) is None
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Columnas precalculadas de productos: alert_level y expiry_bucket en las escrituras por el ORM"""
+from datetime import timedelta
+
+from app.models.product import DIAS_POR_VENCER, ExpiryBucket, Product, StockAlertLevel, refresh_expiry_buckets
+from app.utils.date_helpers import get_local_today
+
+
+def test_alert_level_on_create_and_quantity_change(db, make_product):
+    # Umbrales de la categoría de pruebas: mínimo 10, crítico 5
+    assert make_product(cantidad=50).alert_level is None
+    assert make_product(cantidad=10).alert_level == StockAlertLevel.WARNING
+    product = make_product(cantidad=5)
+    assert product.alert_level == StockAlertLevel.CRITICAL
+
+    product.cantidad = 8
+    db.commit()
+    assert product.alert_level == StockAlertLevel.WARNING
+
+    product.cantidad = 11
+    db.commit()
+    assert product.alert_level is None
+
+
+def test_category_thresholds_propagate_to_products(db, catalog, make_product):
+    product = make_product(cantidad=15)
+    assert product.alert_level is None
+
+    catalog.category.stock_minimo = 20
+    db.commit()
+    db.expire_all()
+    assert product.alert_level == StockAlertLevel.WARNING
+
+    catalog.category.stock_critico = 15
+    db.commit()
+    db.expire_all()
+    assert product.alert_level == StockAlertLevel.CRITICAL
+
+
+def test_product_thresholds_override_category(db, catalog, make_product):
+    product = make_product(cantidad=15, stock_minimo=30)
+    assert product.alert_level == StockAlertLevel.WARNING
+
+    # El umbral propio no se pisa con el de la categoría
+    catalog.category.stock_minimo = 5
+    catalog.category.stock_critico = 1
+    db.commit()
+    db.expire_all()
+    assert product.alert_level == StockAlertLevel.WARNING
+
+
+def test_expiry_bucket_on_create_and_date_change(db, make_product):
+    assert make_product(dias_para_vencer=200).expiry_bucket == ExpiryBucket.VIGENTE
+    assert make_product(dias_para_vencer=-1).expiry_bucket == ExpiryBucket.VENCIDO
+    product = make_product(dias_para_vencer=DIAS_POR_VENCER)
+    assert product.expiry_bucket == ExpiryBucket.POR_VENCER
+
+    product.fecha_vencimiento = get_local_today() + timedelta(days=DIAS_POR_VENCER + 1)
+    db.commit()
+    assert product.expiry_bucket == ExpiryBucket.VIGENTE
+
+
+def test_refresh_expiry_buckets_moves_products_with_time(db, make_product):
+    vigente = make_product(dias_para_vencer=40)
+    por_vencer = make_product(dias_para_vencer=5)
+
+    # Las filas que no cambian de estado no se reescriben
+    assert refresh_expiry_buckets(db.connection()) == 0
+
+    assert refresh_expiry_buckets(db.connection(), today=get_local_today() + timedelta(days=20)) == 2
+    db.commit()
+    db.expire_all()
+    assert vigente.expiry_bucket == ExpiryBucket.POR_VENCER
+    assert por_vencer.expiry_bucket == ExpiryBucket.VENCIDO
+    assert db.query(Product).filter(Product.expiry_bucket == ExpiryBucket.VIGENTE).count() == 0
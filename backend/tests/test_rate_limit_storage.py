@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Storage compartido de rate limiting (upsert sobre rate_limit_counters)"""
+import time
+
+import pytest
+
+from app.core.rate_limit_storage import DatabaseStorage
+
+
+@pytest.fixture
+def storage(engine, monkeypatch):
+    monkeypatch.setattr(DatabaseStorage, "_engine", staticmethod(lambda: engine))
+    return DatabaseStorage()
+
+
+def test_incr_counts_within_window(storage):
+    assert [storage.incr("login/1.2.3.4", 60) for _ in range(3)] == [1, 2, 3]
+    assert storage.get("login/1.2.3.4") == 3
+    assert storage.get("otra-clave") == 0
+
+
+def test_fixed_window_keeps_expiry_and_restarts_when_expired(storage):
+    storage.incr("clave", 60)
+    expires_at = storage.get_expiry("clave")
+    storage.incr("clave", 60)
+    assert storage.get_expiry("clave") == expires_at
+
+    # Una clave expirada reinicia conteo y expiración en el mismo upsert
+    assert storage.incr("vencida", 0) == 1
+    assert storage.incr("vencida", 0) == 1
+    assert storage.get("vencida") == 0
+
+
+def test_failed_login_record_extends_expiry(storage):
+    assert storage.lookup("ip") is None
+    assert storage.record("ip", 60) == 1
+    first_expiry = storage.lookup("ip")[1]
+    time.sleep(0.01)
+    assert storage.record("ip", 60) == 2
+    count, expires_at = storage.lookup("ip")
+    assert count == 2 and expires_at > first_expiry
+
+    storage.clear("ip")
+    assert storage.lookup("ip") is None
+
+
+def test_sliding_window_rejects_over_limit(storage):
+    assert storage.acquire_sliding_window_entry("ventana", 2, 60)
+    assert storage.acquire_sliding_window_entry("ventana", 2, 60)
+    assert not storage.acquire_sliding_window_entry("ventana", 2, 60)
+    assert not storage.acquire_sliding_window_entry("ventana", 2, 60, amount=3)
+
+    storage.clear_sliding_window("ventana", 60)
+    assert storage.acquire_sliding_window_entry("ventana", 2, 60)
+
+
+def test_reset_and_check(storage):
+    storage.incr("a", 60)
+    storage.incr("b", 60)
+    assert storage.check()
+    assert storage.reset() == 2
+    assert storage.get("a") == 0
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Registro de consultas lentas: umbral, buffer circular, origen y plan de ejecución"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from app.core.slow_query import SlowQueryRecorder
+from app.models import Country
+
+
+def test_records_statements_over_threshold(engine, db):
+    recorder = SlowQueryRecorder(threshold_ms=0, buffer_size=3, explain=False)
+    recorder.install(engine)
+
+    for numero in range(5):
+        db.execute(text("SELECT :numero"), {"numero": numero})
+
+    samples = recorder.get_samples()
+    # Buffer circular: se conservan las 3 más recientes, la última primero
+    assert len(samples) == 3
+    # Los parámetros quedan serializados con el formato del driver (dict o lista)
+    assert [sample["parameters"].strip("[]{}").split(" ")[-1] for sample in samples] == ["4", "3", "2"]
+    assert samples[0]["plan"] is None
+    assert recorder.get_samples(limit=1) == samples[:1]
+    assert recorder.clear() == 3
+    assert recorder.get_samples() == []
+
+
+def test_fast_statements_are_ignored(engine, db):
+    recorder = SlowQueryRecorder(threshold_ms=60_000, buffer_size=10)
+    recorder.install(engine)
+    db.query(Country).all()
+    assert recorder.get_samples() == []
+
+
+def test_failed_statement_does_not_leak_start_time(engine, db):
+    recorder = SlowQueryRecorder(threshold_ms=0, buffer_size=10, explain=False)
+    recorder.install(engine)
+
+    with pytest.raises((OperationalError, ProgrammingError)):
+        db.execute(text("SELECT * FROM tabla_inexistente"))
+    db.rollback()
+    assert recorder.get_samples() == []
+
+    db.execute(text("SELECT 1"))
+    assert [sample["statement"] for sample in recorder.get_samples()] == ["SELECT 1"]
+
+
+def test_explain_capture_on_postgresql(postgresql, db, catalog):
+    recorder = SlowQueryRecorder(threshold_ms=0, buffer_size=10, explain=True)
+    recorder.install(postgresql)
+
+    db.query(Country).filter(Country.code == "P01").all()
+
+    sample = next(sample for sample in recorder.get_samples() if "FROM countries" in sample["statement"])
+    # SELECT: plan con ANALYZE (tiempos reales) y sin registrar el propio EXPLAIN
+    assert sample["plan"][0]["Plan"]["Actual Rows"] == 1
+    assert not any(s["statement"].startswith("EXPLAIN") for s in recorder.get_samples())
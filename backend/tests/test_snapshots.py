@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Cortes de stock: saldo a una fecha, retención de cortes diarios y escritura con varios workers"""
+import threading
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func
+
+from app.models.movement import MovementType
+from app.models.stock_snapshot import StockSnapshot
+from app.services.snapshot_service import SnapshotService
+from app.utils.date_helpers import get_local_today
+
+
+@pytest.fixture
+def products(make_product, make_movements):
+    a = make_product(cantidad=0, peso_unitario=2.0)
+    make_movements(a, [
+        (100, MovementType.INICIAL, 20), (60, MovementType.ENTRADA, 10),
+        (30, MovementType.SALIDA, 5), (3, MovementType.ENTRADA, 1)
+    ])
+    b = make_product(cantidad=0)
+    make_movements(b, [(45, MovementType.INICIAL, 8)])
+    return a, b
+
+
+def _saldos(db, dias_atras: int) -> dict:
+    result = SnapshotService.get_stock_at_date(db, get_local_today() - timedelta(days=dias_atras))
+    return {row["product_id"]: row["cantidad"] for row in result["products"]}
+
+
+def test_stock_at_date_with_and_without_snapshots(db, products):
+    a, b = products
+    expected = {70: {a.id: 20}, 40: {a.id: 30, b.id: 8}, 10: {a.id: 25, b.id: 8}, 1: {a.id: 26, b.id: 8}}
+
+    # Sin cortes se calcula desde los movimientos; con cortes, desde el corte base
+    assert {dias: _saldos(db, dias) for dias in expected} == expected
+    cortes, _ = SnapshotService.ensure_snapshots(db, retention_days=20)
+    assert cortes > 0
+    assert {dias: _saldos(db, dias) for dias in expected} == expected
+
+    result = SnapshotService.get_stock_at_date(db, get_local_today() - timedelta(days=10))
+    assert result["snapshot_base"] is not None
+    assert result["total_cantidad"] == 33
+    assert result["total_peso"] == 25 * 2.0 + 8 * 1.0
+
+
+def test_daily_snapshots_are_kept_only_within_retention(db, products):
+    SnapshotService.ensure_snapshots(db, retention_days=20)
+    hasta = get_local_today() - timedelta(days=1)
+    fechas = [row[0] for row in db.query(StockSnapshot.fecha_corte).distinct().order_by(StockSnapshot.fecha_corte)]
+
+    assert fechas[-1] == hasta
+    assert [f for f in fechas if f > hasta - timedelta(days=20)] == [hasta - timedelta(days=n) for n in range(19, -1, -1)]
+    # Antes de la ventana solo quedan los cortes de fin de mes
+    assert all((f + timedelta(days=1)).day == 1 for f in fechas if f <= hasta - timedelta(days=20))
+
+    # Sin cortes pendientes no se escribe nada
+    assert SnapshotService.ensure_snapshots(db, retention_days=20) == (0, 0)
+
+
+def test_existing_snapshot_is_replaced_on_request(db, products):
+    a, _ = products
+    fecha = get_local_today() - timedelta(days=10)
+    SnapshotService.write_snapshot(db, fecha)
+    db.query(StockSnapshot).filter(StockSnapshot.product_id == a.id).update({"cantidad": 0})
+    db.commit()
+
+    # only_missing respeta el corte existente; sin él se recalcula
+    assert SnapshotService.write_snapshot(db, fecha, only_missing=True) == 0
+    assert SnapshotService.write_snapshot(db, fecha) == 2
+    assert db.query(StockSnapshot.cantidad).filter(StockSnapshot.product_id == a.id).scalar() == 25
+
+
+def test_concurrent_workers_write_each_snapshot_once(postgresql, session_factory, products):
+    errors = []
+
+    def worker():
+        session = session_factory()
+        try:
+            SnapshotService.ensure_snapshots(session, retention_days=15)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    session = session_factory()
+    por_corte = session.query(StockSnapshot.fecha_corte, func.count()).group_by(StockSnapshot.fecha_corte).all()
+    session.close()
+    assert por_corte and all(count <= 2 for _, count in por_corte)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Revocación de tokens por token_version (credenciales, rol o países del usuario)"""
+import pytest
+
+from app.config.settings import settings
+
+PERMISSIONS_URL = f"{settings.API_V1_PREFIX}/auth/permissions"
+
+
+def _get(client, headers: dict):
+    return client.get(PERMISSIONS_URL, headers=headers)
+
+
+@pytest.fixture(params=[False, True], ids=["bd", "claims"])
+def trust_claims(request, monkeypatch):
+    """Las pruebas corren cargando el usuario de la BD y con AUTH_TRUST_TOKEN_CLAIMS"""
+    monkeypatch.setattr(settings, "AUTH_TRUST_TOKEN_CLAIMS", request.param)
+    return request.param
+
+
+def test_password_change_revokes_issued_tokens(client, db, catalog, auth_headers, trust_claims):
+    user = catalog.user
+    headers = auth_headers(user)
+    response = _get(client, headers)
+    assert response.status_code == 200
+    assert response.json()["role"] == "user"
+
+    user.password_hash = "otro-hash"
+    db.commit()
+    assert user.token_version == 1
+
+    assert _get(client, headers).status_code == 401
+    assert _get(client, auth_headers(user)).status_code == 200
+
+
+def test_country_assignment_revokes_issued_tokens(client, db, catalog, auth_headers, trust_claims):
+    user = catalog.user
+    headers = auth_headers(user)
+    assert _get(client, headers).status_code == 200
+
+    user.assigned_countries = list(catalog.countries)
+    db.commit()
+
+    assert _get(client, headers).status_code == 401
+    response = _get(client, auth_headers(user))
+    assert response.status_code == 200
+    assert sorted(response.json()["filters"]["allowed_countries"]) == [c.id for c in catalog.countries]
+
+
+def test_unrelated_changes_keep_tokens_valid(client, db, catalog, auth_headers, trust_claims):
+    user = catalog.user
+    headers = auth_headers(user)
+
+    user.first_name = "Otro nombre"
+    db.commit()
+
+    assert user.token_version == 0
+    assert _get(client, headers).status_code == 200
+
+
+def test_deactivated_user_is_rejected(client, db, catalog, auth_headers, trust_claims):
+    user = catalog.user
+    headers = auth_headers(user)
+    assert _get(client, headers).status_code == 200
+
+    user.is_active = False
+    db.commit()
+
+    assert _get(client, headers).status_code == 401
@@ -56,7 +56,7 @@ const SimpleAnalyticsPage = () => {
           filters.groupBy
         ),
         reportService.getCountriesSummary(),
-        reportService.getLowStockAlerts(10)
+        reportService.getLowStockAlerts()
       ]);
 
       setData({
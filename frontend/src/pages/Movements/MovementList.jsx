@@ -4,7 +4,6 @@ import {
   MapPin, ChevronLeft, ChevronRight, TrendingUp, ArrowUpDown, Building2, Clock, 
   BarChart3, Users, AlertCircle, CheckCircle2, Globe2, RefreshCw, X, SlidersHorizontal
 } from 'lucide-react';
-import * as XLSX from 'xlsx';
 import movementService from '../../services/movementService';
 import userService from '../../services/userService';
 import authService from '../../services/authService';
@@ -289,21 +288,16 @@ const MovementList = () => {
       // Debug: log de parámetros
       console.log('Loading movements with params:', params);
       
-      const response = await movementService.getMovements(params);
-      setMovements(response);
-      
-      // Para calcular el total, hacer una consulta adicional sin limit
-      const totalParams = {
-        search: searchTerm || undefined,
-        tipo: filters.tipo || undefined,
-        country_id: filters.country_id || undefined,
-        fecha_desde: filters.fecha_desde || undefined,
-        fecha_hasta: filters.fecha_hasta || undefined,
-        limit: 1000 // Usar un límite alto para contar
-      };
-      
-      const totalResponse = await movementService.getMovements(totalParams);
-      setTotalMovements(totalResponse.length);
+      // Con filtros se pide el total exacto; sin filtros basta la estimación del servidor
+      const hasFilters = Boolean(
+        params.search || params.tipo || params.country_id || params.fecha_desde || params.fecha_hasta
+      );
+      const page = await movementService.getMovementsPage({
+        ...params,
+        include_total: hasFilters ? 'exact' : 'estimate'
+      });
+      setMovements(page.items);
+      setTotalMovements(page.total);
       
     } catch (error) {
       console.error('Error loading movements:', error);
@@ -374,78 +368,27 @@ const MovementList = () => {
     try {
       setShowExportLoading(true);
       
-      // Obtener todos los movimientos sin paginación para export
+      // El servidor genera el archivo con los mismos filtros del listado
       const params = {
         search: searchTerm || undefined,
         tipo: filters.tipo || undefined,
         country_id: filters.country_id || undefined,
         fecha_desde: filters.fecha_desde || undefined,
-        fecha_hasta: filters.fecha_hasta || undefined,
-        limit: 25000 // Máximo permitido por el backend
+        fecha_hasta: filters.fecha_hasta || undefined
       };
       
-      const exportData = await movementService.getMovements(params);
-      
-      // Alerta si se alcanzó el límite máximo
-      if (exportData.length === 25000) {
-        alert('⚠️ Se exportaron 25,000 registros (límite máximo). Puede haber más movimientos no incluidos. Considere aplicar filtros de fecha para reducir el conjunto de datos.');
-      }
-      
-      // Preparar datos para el archivo XLSX
-      const worksheetData = [
-        // Encabezados
-        [
-          t('common.date', 'Date'),
-          t('movements.type', 'Type'),
-          t('products.code', 'Product Code'),
-          t('products.name', 'Product Name'),
-          t('common.quantity', 'Quantity'),
-          'Stock Anterior',
-          'Stock Nuevo',
-          'Responsable',
-          'Motivo',
-          'Observaciones'
-        ],
-        // Datos
-        ...exportData.map(movement => [
-          formatDate(movement.fecha_movimiento),
-          movementService.MOVEMENT_TYPE_LABELS[movement.tipo] || movement.tipo,
-          movement.product_codigo,
-          movement.product_nombre,
-          movement.cantidad,
-          movement.cantidad_anterior,
-          movement.cantidad_nueva,
-          movement.responsable,
-          movement.motivo,
-          movement.observaciones || ''
-        ])
-      ];
-      
-      // Crear el workbook y worksheet
-      const workbook = XLSX.utils.book_new();
-      const worksheet = XLSX.utils.aoa_to_sheet(worksheetData);
-      
-      // Configurar anchos de columnas
-      const columnWidths = [
-        { wch: 20 }, // Fecha
-        { wch: 15 }, // Tipo
-        { wch: 15 }, // Código Producto
-        { wch: 30 }, // Nombre Producto
-        { wch: 10 }, // Cantidad
-        { wch: 12 }, // Stock Anterior
-        { wch: 12 }, // Stock Nuevo
-        { wch: 20 }, // Responsable
-        { wch: 30 }, // Motivo
-        { wch: 30 }  // Observaciones
-      ];
-      worksheet['!cols'] = columnWidths;
-      
-      // Agregar el worksheet al workbook
-      XLSX.utils.book_append_sheet(workbook, worksheet, 'Movements');
+      const blob = await movementService.exportMovements(params, 'xlsx');
       
-      // Generar el archivo y descargarlo
+      // Descargar el archivo
       const fileName = `movements_${new Date().toISOString().split('T')[0]}.xlsx`;
-      XLSX.writeFile(workbook, fileName);
+      const url = window.URL.createObjectURL(blob);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = fileName;
+      document.body.appendChild(link);
+      link.click();
+      link.remove();
+      window.URL.revokeObjectURL(url);
       
     } catch (error) {
       console.error('Error exporting data:', error);
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Calendar, Filter, RefreshCw, Download, AlertTriangle } from 'lucide-react';
 import { useTheme } from '../../contexts/ThemeContext';
 import StockByCategoryChart from '../../components/charts/StockByCategoryChart';
@@ -10,6 +10,36 @@ import ProductsByCountryChart from '../../components/charts/ProductsByCountryCha
 import StockByCountryChart from '../../components/charts/StockByCountryChart';
 import reportService from '../../services/reportService';
 
+// Espera tras un evento en vivo antes de recargar los agregados (agrupa ráfagas)
+const LIVE_REFRESH_DELAY_MS = 3000;
+
+// Aplicar un delta de stock a la lista de alertas (agregar, actualizar o quitar el producto)
+const applyStockDelta = (current, data) => {
+  if (!current) return current;
+  const others = current.alerts.filter((alert) => alert.product_id !== data.product_id);
+  const alerts = data.alert_level
+    ? [
+        ...others,
+        {
+          product_id: data.product_id,
+          product_codigo: data.product_codigo,
+          product_nombre: data.product_nombre,
+          current_stock: data.current_stock,
+          category_name: data.category_name,
+          country_name: data.country_name,
+          alert_level: data.alert_level
+        }
+      ].sort((a, b) => a.current_stock - b.current_stock)
+    : others;
+  return {
+    ...current,
+    alerts,
+    total_alerts: alerts.length,
+    critical_count: alerts.filter((alert) => alert.alert_level === 'critical').length,
+    warning_count: alerts.filter((alert) => alert.alert_level === 'warning').length
+  };
+};
+
 const CommercialDashboard = () => {
   const { isDarkMode } = useTheme();
   const [loading, setLoading] = useState(true);
@@ -33,10 +63,10 @@ const CommercialDashboard = () => {
     this_month: { label: 'Este Mes', days: null }
   };
 
-  // Cargar datos iniciales
-  const loadDashboardData = async () => {
+  // Cargar datos iniciales (silent: recarga por eventos en vivo, sin indicador de carga)
+  const loadDashboardData = async ({ silent = false } = {}) => {
     try {
-      setLoading(true);
+      if (!silent) setLoading(true);
       setError(null);
       
       // Obtener rango de fechas
@@ -70,7 +100,7 @@ const CommercialDashboard = () => {
         reportService.getMovementsSummary(fechaDesdeStr, fechaHastaStr, selectedCategory),
         reportService.getMovementsTimeline(fechaDesdeStr, fechaHastaStr, groupBy),
         reportService.getCountriesSummary(),
-        reportService.getLowStockAlerts(10)
+        reportService.getLowStockAlerts()
       ]);
       
       // Cargar métricas de rotación por separado para manejar errores
@@ -94,7 +124,7 @@ const CommercialDashboard = () => {
       console.error('Error details:', err.response?.data);
       setError(`Error al cargar los datos del dashboard: ${err.response?.data?.detail || err.message}`);
     } finally {
-      setLoading(false);
+      if (!silent) setLoading(false);
     }
   };
 
@@ -103,6 +133,33 @@ const CommercialDashboard = () => {
     loadDashboardData();
   }, [dateRange, groupBy, selectedCategory]);
 
+  // Actualizaciones en vivo: las alertas se actualizan con cada delta de stock y
+  // los agregados se recargan una vez por ráfaga de cambios
+  const loadDashboardDataRef = useRef(loadDashboardData);
+  loadDashboardDataRef.current = loadDashboardData;
+
+  useEffect(() => {
+    let refreshTimer = null;
+    const scheduleRefresh = () => {
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(() => loadDashboardDataRef.current({ silent: true }), LIVE_REFRESH_DELAY_MS);
+    };
+
+    const unsubscribe = reportService.subscribeLiveUpdates((type, data) => {
+      if (type === 'stock' || type === 'alert') {
+        setAlerts((current) => applyStockDelta(current, data));
+        scheduleRefresh();
+      } else if (type === 'movement' || type === 'resync') {
+        scheduleRefresh();
+      }
+    });
+
+    return () => {
+      clearTimeout(refreshTimer);
+      unsubscribe();
+    };
+  }, []);
+
   // Función para refrescar datos
   const handleRefresh = () => {
     loadDashboardData();
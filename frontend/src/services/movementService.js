@@ -60,6 +60,59 @@ const movementService = {
     }
   },
 
+  // Obtener una página de movimientos con el total (headers X-Total-Count / X-Next-Cursor)
+  getMovementsPage: async (params = {}) => {
+    try {
+      const queryParams = new URLSearchParams();
+
+      if (params.search) queryParams.append('search', params.search);
+      if (params.tipo) queryParams.append('tipo', params.tipo);
+      if (params.product_id) queryParams.append('product_id', params.product_id);
+      if (params.responsable) queryParams.append('responsable', params.responsable);
+      if (params.country_id) queryParams.append('country_id', params.country_id);
+      if (params.fecha_desde) queryParams.append('fecha_desde', params.fecha_desde);
+      if (params.fecha_hasta) queryParams.append('fecha_hasta', params.fecha_hasta);
+      if (params.skip) queryParams.append('skip', params.skip);
+      if (params.limit) queryParams.append('limit', params.limit);
+      if (params.cursor) queryParams.append('cursor', params.cursor);
+      queryParams.append('include_total', params.include_total || 'estimate');
+
+      const response = await api.get(`/movements/?${queryParams.toString()}`);
+      const total = response.headers['x-total-count'];
+      return {
+        items: response.data,
+        total: total !== undefined ? parseInt(total, 10) : response.data.length,
+        totalEstimated: response.headers['x-total-estimated'] === 'true',
+        nextCursor: response.headers['x-next-cursor'] || null,
+        hasMore: response.headers['x-has-more'] === 'true'
+      };
+    } catch (error) {
+      throw error;
+    }
+  },
+
+  // Exportar movimientos filtrados (el servidor genera el archivo en streaming, sin límite de registros)
+  exportMovements: async (params = {}, formato = 'xlsx') => {
+    try {
+      const queryParams = new URLSearchParams({ formato });
+
+      if (params.search) queryParams.append('search', params.search);
+      if (params.tipo) queryParams.append('tipo', params.tipo);
+      if (params.product_id) queryParams.append('product_id', params.product_id);
+      if (params.responsable) queryParams.append('responsable', params.responsable);
+      if (params.country_id) queryParams.append('country_id', params.country_id);
+      if (params.fecha_desde) queryParams.append('fecha_desde', params.fecha_desde);
+      if (params.fecha_hasta) queryParams.append('fecha_hasta', params.fecha_hasta);
+
+      const response = await api.get(`/movements/export?${queryParams.toString()}`, {
+        responseType: 'blob'
+      });
+      return response.data;
+    } catch (error) {
+      throw error;
+    }
+  },
+
   // Obtener movimiento por ID
   getMovementById: async (movementId) => {
     try {
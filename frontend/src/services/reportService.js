@@ -1,4 +1,5 @@
 import api from './api';
+import { API_CONFIG, buildApiUrl } from '../config/api';
 
 const reportService = {
   // Stock por categoria
@@ -55,10 +56,10 @@ const reportService = {
     }
   },
 
-  // Alertas de stock bajo
-  getLowStockAlerts: async (minStockThreshold = 10) => {
+  // Alertas de stock bajo (sin umbral se usan los de cada producto o categoría)
+  getLowStockAlerts: async (minStockThreshold = null) => {
     try {
-      const params = { min_stock_threshold: minStockThreshold };
+      const params = minStockThreshold === null ? {} : { min_stock_threshold: minStockThreshold };
       const response = await api.get('/reports/commercial/low-stock-alerts', { params });
       return response.data;
     } catch (error) {
@@ -159,6 +160,68 @@ const reportService = {
         generated_at: new Date().toISOString()
       };
     }
+  },
+
+  // Deltas en vivo del dashboard (Server-Sent Events): stock, alert, movement y resync.
+  // Se usa fetch en lugar de EventSource para enviar el token en el header.
+  // Devuelve una función que cierra la conexión.
+  subscribeLiveUpdates: (onEvent) => {
+    const controller = new AbortController();
+    let retryDelay = 5000;
+
+    const dispatch = (block) => {
+      let type = 'message';
+      const dataLines = [];
+      block.split('\n').forEach((line) => {
+        if (line.startsWith('event:')) type = line.slice(6).trim();
+        else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+        else if (line.startsWith('retry:')) retryDelay = parseInt(line.slice(6), 10) || retryDelay;
+      });
+      if (dataLines.length === 0) return;
+      try {
+        onEvent(type, JSON.parse(dataLines.join('\n')));
+      } catch (error) {
+        console.error('Error processing live update:', error);
+      }
+    };
+
+    const connect = async () => {
+      try {
+        const response = await fetch(buildApiUrl('/reports/commercial/live'), {
+          headers: { ...API_CONFIG.getAuthHeaders(), Accept: 'text/event-stream' },
+          signal: controller.signal
+        });
+        // Sin sesión o sin permisos no se reintenta
+        if (response.status === 401 || response.status === 403 || response.status === 404) return;
+        if (response.ok && response.body) {
+          const reader = response.body.getReader();
+          const decoder = new TextDecoder('utf-8');
+          let buffer = '';
+          for (;;) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const blocks = buffer.split('\n\n');
+            buffer = blocks.pop();
+            blocks.forEach(dispatch);
+          }
+        }
+      } catch (error) {
+        if (controller.signal.aborted) return;
+        console.warn('Live updates connection lost:', error.message);
+      }
+      // El servidor cierra la conexión periódicamente; reconectar y pedir los reportes de nuevo
+      if (!controller.signal.aborted) {
+        setTimeout(() => {
+          if (controller.signal.aborted) return;
+          onEvent('resync', {});
+          connect();
+        }, retryDelay);
+      }
+    };
+
+    connect();
+    return () => controller.abort();
   }
 };
 